@@ -1,5 +1,7 @@
-from .utilities import open, fetch, fetch_over_ssh
+from .utilities import open, fetch, fetch_over_ssh, iter_models
+from .utilities import build_index, open_categories
 from .structures import Atom, Residue, Ligand, Chain, Model
+from .superposition import rmsd_matrix, rmsf
 
 __author__ = "Sam Ireland"
 __version__ = "1.0.7"
@@ -101,6 +101,7 @@ def query(func, tuple_=False):
             ))
         else:
             return set(objects.structures)
+    structures.__wrapped__ = func
     return structures
 
 
@@ -126,14 +127,17 @@ class StructureClass(type):
     """A metaclass which can be applied to structure class. It will override
     the instantation behaviour so that all methods that belong to a preset
     list ('atoms', 'chains' etc.) will have the :py:func:`.query` decorator
-    applied and a copy with the :py:func:`.getone` decorator applied."""
+    applied and a copy with the :py:func:`.getone` decorator applied. Methods
+    which have already been decorated (because they are inherited from another
+    structure class) are left as they are."""
 
     METHODS = ["chains", "residues", "ligands", "waters", "molecules", "atoms"]
 
     def __new__(self, *args, **kwargs):
         cls = type.__new__(self, *args, **kwargs)
         for attribute in dir(cls):
-            if attribute in cls.METHODS:
+            if attribute in cls.METHODS and\
+             not hasattr(getattr(cls, attribute), "__wrapped__"):
                 setattr(cls, attribute, query(
                  getattr(cls, attribute),
                  tuple_=(attribute == "residues" and cls.__name__ == "Chain")
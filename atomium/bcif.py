@@ -0,0 +1,358 @@
+"""Contains functions for dealing with the .bcif (BinaryCIF) file format."""
+
+import re
+import msgpack
+import numpy as np
+from .mmcif import mmcif_dict_to_data_dict, structure_to_mmcif_string
+from .mmcif import mmcif_string_to_mmcif_dict
+
+TYPES = {
+ 1: "<i1", 2: "<i2", 3: "<i4", 4: "<u1", 5: "<u2", 6: "<u4",
+ 32: "<f4", 33: "<f8"
+}
+
+INTEGER = re.compile(r"-?(0|[1-9][0-9]*)$")
+
+DECIMAL = re.compile(r"-?(0|[1-9][0-9]*)(\.[0-9]+)?$")
+
+ATOM_SITE_NUMBERS = [
+ "id", "Cartn_x", "Cartn_y", "Cartn_z", "occupancy", "B_iso_or_equiv"
+]
+
+def bcif_bytes_to_bcif_dict(bytestring, metadata_only=False):
+    """Takes the raw bytestring of a .bcif file and turns it into a ``dict``
+    of tables, laid out in the same way as a columnar .mmcif dictionary (see
+    :py:func:`.mmcif_string_to_mmcif_dict`) - each table is a ``dict`` mapping
+    column names to columns.
+
+    Numeric columns are decoded straight into NumPy arrays, and text columns
+    become lists of strings. Columns with values marked as missing become
+    lists of strings, with the missing values as ``"."`` or ``"?"``.
+
+    If ``metadata_only`` is ``True``, the ``atom_site`` and
+    ``atom_site_anisotrop`` tables are not decoded.
+
+    :param bytes bytestring: the .bcif filestring.
+    :param bool metadata_only: if ``True``, atom tables are not decoded.
+    :rtype: ``dict``"""
+
+    skip = {"atom_site", "atom_site_anisotrop"} if metadata_only else set()
+    raw = msgpack.unpackb(bytestring, raw=False)
+    bcif_dict = {}
+    for block in raw["dataBlocks"]:
+        for category in block["categories"]:
+            name = category["name"].lstrip("_")
+            if name in skip: continue
+            bcif_dict[name] = {
+             column["name"]: decode_column(column)
+             for column in category["columns"]
+            }
+    return bcif_dict
+
+
+class FixedPointArray(np.ndarray):
+    """A decoded column of FixedPoint numbers, which remembers how many
+    decimal places they were written with so that they can be turned back into
+    the same strings."""
+
+    def __array_finalize__(self, obj):
+        self.decimals = getattr(obj, "decimals", None)
+
+
+def decode_column(column):
+    """Decodes a single .bcif column, applying its mask if it has one.
+
+    FixedPoint columns are returned as a :py:class:`.FixedPointArray`.
+
+    :param dict column: the column to decode.
+    :rtype: ``numpy.ndarray`` or ``list``"""
+
+    values = decode_data(column["data"])
+    for encoding in column["data"]["encoding"]:
+        if encoding["kind"] == "FixedPoint":
+            values = values.view(FixedPointArray)
+            values.decimals = int(np.ceil(np.log10(encoding["factor"])))
+    if not column.get("mask"): return values
+    mask = decode_data(column["mask"])
+    if not mask.any(): return values
+    values = column_to_strings(values)
+    return [
+     value if m == 0 else "." if m == 1 else "?"
+     for value, m in zip(values, mask.tolist())
+    ]
+
+
+def decode_data(data):
+    """Decodes an encoded .bcif data ``dict`` by applying its encodings in
+    reverse order.
+
+    :param dict data: the data to decode.
+    :rtype: ``numpy.ndarray`` or ``list``"""
+
+    result = data["data"]
+    for encoding in reversed(data["encoding"]):
+        result = CODECS[encoding["kind"]](result, encoding)
+    return result
+
+
+def decode_byte_array(data, encoding):
+    """Reads raw little-endian bytes as an array of the encoded type.
+
+    :param bytes data: the bytes to read.
+    :param dict encoding: the encoding parameters.
+    :rtype: ``numpy.ndarray``"""
+
+    return np.frombuffer(data, dtype=TYPES[encoding["type"]])
+
+
+def decode_fixed_point(data, encoding):
+    """Divides integers by the factor used to turn floats into integers.
+
+    :param numpy.ndarray data: the integers to decode.
+    :param dict encoding: the encoding parameters.
+    :rtype: ``numpy.ndarray``"""
+
+    return (data / encoding["factor"]).astype(TYPES[encoding["srcType"]])
+
+
+def decode_interval_quantization(data, encoding):
+    """Maps integer steps back onto the interval they were quantized from.
+
+    :param numpy.ndarray data: the integers to decode.
+    :param dict encoding: the encoding parameters.
+    :rtype: ``numpy.ndarray``"""
+
+    step = (encoding["max"] - encoding["min"]) / (encoding["numSteps"] - 1)
+    return (encoding["min"] + data * step).astype(TYPES[encoding["srcType"]])
+
+
+def decode_run_length(data, encoding):
+    """Expands value/count pairs into the full array.
+
+    :param numpy.ndarray data: the pairs to decode.
+    :param dict encoding: the encoding parameters.
+    :rtype: ``numpy.ndarray``"""
+
+    return np.repeat(data[0::2], data[1::2]).astype(TYPES[encoding["srcType"]])
+
+
+def decode_delta(data, encoding):
+    """Turns an array of differences back into the values they came from.
+
+    :param numpy.ndarray data: the differences to decode.
+    :param dict encoding: the encoding parameters.
+    :rtype: ``numpy.ndarray``"""
+
+    return (np.cumsum(data, dtype="i8") + encoding["origin"]).astype(
+     TYPES[encoding["srcType"]]
+    )
+
+
+def decode_integer_packing(data, encoding):
+    """Unpacks integers which were packed into 8 or 16 bits. Values too big to
+    fit were stored as a run of the type's limit followed by the remainder, so
+    each value is the sum of a run of limits and the value which ends it.
+
+    :param numpy.ndarray data: the packed integers to decode.
+    :param dict encoding: the encoding parameters.
+    :rtype: ``numpy.ndarray``"""
+
+    data = data.astype("i8")
+    info = np.iinfo(
+     ("u" if encoding["isUnsigned"] else "i") + str(encoding["byteCount"])
+    )
+    limits = data == info.max
+    if not encoding["isUnsigned"]: limits |= data == info.min
+    ends = np.flatnonzero(~limits)
+    totals = np.cumsum(data)[ends]
+    return np.diff(totals, prepend=0).astype("i4")
+
+
+def decode_string_array(data, encoding):
+    """Looks up the strings that a string array's indices refer to.
+
+    :param numpy.ndarray data: the encoded indices.
+    :param dict encoding: the encoding parameters.
+    :rtype: ``list``"""
+
+    offsets = decode_data(
+     {"data": encoding["offsets"], "encoding": encoding["offsetEncoding"]}
+    ).tolist()
+    indices = decode_data(
+     {"data": data, "encoding": encoding["dataEncoding"]}
+    ).tolist()
+    string_data = encoding["stringData"]
+    strings = [string_data[start:end] for start, end in zip(
+     offsets, offsets[1:]
+    )] + [""]
+    return [strings[index] for index in indices]
+
+
+CODECS = {
+ "ByteArray": decode_byte_array, "FixedPoint": decode_fixed_point,
+ "IntervalQuantization": decode_interval_quantization,
+ "RunLength": decode_run_length, "Delta": decode_delta,
+ "IntegerPacking": decode_integer_packing, "StringArray": decode_string_array
+}
+
+
+def bcif_dict_to_data_dict(bcif_dict, lazy_models=False, **filters):
+    """Converts a .bcif dictionary into an atomium data dictionary, with the
+    same standard layout that the other file formats get converted into.
+
+    The numeric columns of ``atom_site`` are used as arrays directly, and every
+    other column is converted to strings so that it can be read in the same
+    way as a .cif file's columns.
+
+    :param dict bcif_dict: the .bcif dictionary.
+    :param bool lazy_models: if ``True``, the models will be a generator which\
+    creates each model dictionary only as it is needed.
+    :rtype: ``dict``"""
+
+    mmcif_dict = {}
+    for name, table in bcif_dict.items():
+        mmcif_dict[name] = {key: column if name == "atom_site" and
+         key in ATOM_SITE_NUMBERS and isinstance(column, np.ndarray)
+         else column_to_strings(column) for key, column in table.items()}
+    return mmcif_dict_to_data_dict(
+     mmcif_dict, lazy_models=lazy_models, **filters
+    )
+
+
+def column_to_strings(column):
+    """Converts a decoded .bcif column to a list of strings.
+
+    :param column: the column to convert.
+    :rtype: ``list``"""
+
+    if getattr(column, "decimals", None) is not None:
+        return ["{:.{}f}".format(value, column.decimals)
+         for value in column.tolist()]
+    if isinstance(column, np.ndarray): return column.astype(str).tolist()
+    return column
+
+
+def structure_to_bcif_string(structure):
+    """Converts a :py:class:`.AtomStructure` to a .bcif filestring.
+
+    The structure's tables are first laid out in the same way as a .cif file,
+    and each column is then encoded - integers as delta and run-length encoded
+    packed integers, decimals as fixed point integers encoded the same way, and
+    text as string arrays.
+
+    :param AtomStructure structure: the structure to convert.
+    :rtype: ``bytes``"""
+
+    mmcif_dict = mmcif_string_to_mmcif_dict(
+     structure_to_mmcif_string(structure), columnar=True
+    )
+    return msgpack.packb({
+     "version": "0.3.0", "encoder": "atomium", "dataBlocks": [{
+      "header": "atomium", "categories": [{
+       "name": "_" + name, "rowCount": len(next(iter(table.values()), [])),
+       "columns": [encode_column(key, column) for key, column in table.items()]
+      } for name, table in mmcif_dict.items()]
+     }]
+    }, use_bin_type=True)
+
+
+def encode_column(name, values):
+    """Encodes a column of .cif strings as a .bcif column. Values of ``"."``
+    and ``"?"`` are recorded in a mask, and the rest are encoded as integers,
+    fixed point decimals, or text, depending on what they all are.
+
+    :param str name: the column's name.
+    :param list values: the column's values as strings.
+    :rtype: ``dict``"""
+
+    mask = [1 if v == "." else 2 if v == "?" else 0 for v in values]
+    return {
+     "name": name, "data": encode_values(values, mask),
+     "mask": encode_integers(mask) if any(mask) else None
+    }
+
+
+def encode_values(values, mask):
+    """Works out the most compact encoding for a column's present values and
+    encodes the whole column with it (missing values are given a placeholder).
+
+    :param list values: the column's values.
+    :param list mask: which values are missing.
+    :rtype: ``dict``"""
+
+    present = [v for v, m in zip(values, mask) if not m]
+    if all(INTEGER.match(v) for v in present):
+        integers = np.array([v if not m else 0 for v, m in zip(values, mask)],
+         dtype="i8")
+        if not len(integers) or np.abs(integers).max() < 2 ** 31:
+            return encode_integers(integers)
+    if all(DECIMAL.match(v) for v in present):
+        digits = max([len(v.partition(".")[2]) for v in present] or [0])
+        floats = np.array([v if not m else 0 for v, m in zip(values, mask)],
+         dtype="f8") * 10 ** digits
+        if digits <= 6 and (not len(floats) or np.abs(floats).max() < 2 ** 31):
+            encoded = encode_integers(np.round(floats))
+            encoded["encoding"].insert(
+             0, {"kind": "FixedPoint", "factor": 10 ** digits, "srcType": 33}
+            )
+            return encoded
+    strings = sorted(set(values))
+    lookup = {string: index for index, string in enumerate(strings)}
+    indices = encode_integers([lookup[v] for v in values])
+    offsets = encode_integers(np.cumsum([0] + [len(s) for s in strings]))
+    return {"data": indices["data"], "encoding": [{
+     "kind": "StringArray", "dataEncoding": indices["encoding"],
+     "stringData": "".join(strings), "offsetEncoding": offsets["encoding"],
+     "offsets": offsets["data"]
+    }]}
+
+
+def encode_integers(array):
+    """Encodes an array of integers using delta encoding, then run-length
+    encoding, then packing them into the smallest integer type which suits.
+
+    :param numpy.ndarray array: the integers to encode.
+    :rtype: ``dict``"""
+
+    array = np.asarray(array, dtype="i4")
+    origin = int(array[0]) if len(array) else 0
+    delta = np.diff(array, prepend=origin).astype("i4")
+    if len(delta):
+        starts = np.flatnonzero(np.diff(delta, prepend=delta[0] - 1))
+        counts = np.diff(np.append(starts, len(delta)))
+        run_length = np.column_stack([delta[starts], counts]).ravel()
+    else:
+        run_length = delta
+    packed, byte_count, unsigned = pack_integers(run_length)
+    return {"data": packed.tobytes(), "encoding": [
+     {"kind": "Delta", "origin": origin, "srcType": 3},
+     {"kind": "RunLength", "srcType": 3, "srcSize": len(array)},
+     {"kind": "IntegerPacking", "byteCount": byte_count,
+      "isUnsigned": unsigned, "srcSize": len(run_length)},
+     {"kind": "ByteArray", "type": {
+      (1, False): 1, (2, False): 2, (1, True): 4, (2, True): 5
+     }[(byte_count, unsigned)]}
+    ]}
+
+
+def pack_integers(array):
+    """Packs 32 bit integers into 8 or 16 bits, whichever takes up less space.
+    Any value which doesn't fit is written as a run of the type's limit
+    followed by the remainder.
+
+    :param numpy.ndarray array: the integers to pack.
+    :rtype: ``tuple``"""
+
+    array = array.astype("i8")
+    unsigned = bool(len(array)) and bool(array.min() >= 0)
+    best = None
+    for byte_count in (1, 2):
+        info = np.iinfo(("u" if unsigned else "i") + str(byte_count))
+        limits = np.where(array >= 0, info.max, info.min)
+        lengths = array // limits + 1
+        if best is None or lengths.sum() * byte_count < best[0]:
+            best = (lengths.sum() * byte_count, byte_count, info, limits, lengths)
+    size, byte_count, info, limits, lengths = best
+    packed = np.repeat(limits, lengths)
+    packed[np.cumsum(lengths) - 1] = array - limits * (lengths - 1)
+    return packed.astype(info.dtype.newbyteorder("<")), byte_count, unsigned
@@ -1,5 +1,8 @@
 """Contains logic for turning data dictionaies into a parsed Python objects."""
 
+from collections.abc import Sequence
+import weakref
+import numpy as np
 from .structures import *
 
 class File:
@@ -157,18 +160,38 @@ class File:
     def models(self):
         """The structure's models.
 
-        :rtype: ``list``"""
+        If the file was opened with ``stack_models=True`` and every model has
+        the same atoms (as in an NMR ensemble or a set of docked poses), this
+        will be a :py:class:`.ModelStack`, which keeps one array of all the
+        models' coordinates and makes each model, as a light view of a shared
+        template, only when it is asked for. Otherwise it is a list.
+
+        :rtype: ``list`` or ``ModelStack``"""
 
         return self._models
 
 
     @property
     def model(self):
-        """The structure's first model (and only model if it has only one).
+        """The structure's first model (and only model if it has only one). If
+        the file has no models (if it was parsed with ``metadata_only`` for
+        example) this will be ``None``.
 
         :rtype: ``Model``"""
 
-        return self._models[0]
+        return self._models[0] if self._models else None
+
+
+    def rmsf(self, *args, **kwargs):
+        """Calculates the Root Mean Square Fluctuation of each atom, and each
+        residue, across all of the file's models - see :py:func:`.rmsf` for
+        the arguments that can be given, and what is returned. If the file has
+        no models, the arrays and residue list returned are empty.
+
+        :rtype: ``tuple``"""
+
+        from .superposition import rmsf
+        return rmsf(self._models, *args, **kwargs)
 
 
     def generate_assembly(self, id):
@@ -212,11 +235,374 @@ class File:
         return Model(*all_structures)
 
 
-def data_dict_to_file(data_dict, filetype):
+class ModelStack(Sequence):
+    """A sequence of models which all have the same chains, ligands and atoms,
+    differing only in their atoms' IDs and locations, and their chains'
+    helices and strands. Rather than keeping a full set of structures for
+    every model, it keeps one template model and an M×N×3 array of every
+    model's coordinates.
+
+    The models it gives out are :py:class:`.StackedModel` objects - light
+    views of the template, which keep their coordinates in their row of the
+    stack, so moving their atoms updates the stack. Changes made to the
+    properties of a model's structures (such as its atoms' names) are recorded
+    in a small overlay kept by the stack. A model is only kept while something
+    else refers to it, and is made again from the template and its overlay
+    the next time it is needed - unless it is changed in a way which can't be
+    recorded (its residues being relinked or its atoms bonded, for example),
+    in which case it is kept from then on. A model which loses atoms (by being
+    dehydrated, for example) stops using the stack.
+
+    :param Model template: the model whose structures every model will view.
+    :param numpy.ndarray coordinates: the M×N×3 array of coordinates, with\
+    each model's atoms in ID order.
+    :param offsets: how much each model's atom IDs differ from the template's.
+    :param list secondary_structures: for each model, ``None`` if its chains\
+    have the template's helices and strands, or a ``dict`` of chain IDs to the\
+    residue IDs of that chain's helices and strands.
+    :raises ValueError: if the coordinates don't fit the template."""
+
+    def __init__(self, template, coordinates, offsets,
+     secondary_structures=None):
+        if coordinates.shape[1:] != template._coordinates.shape:
+            raise ValueError("{} needs coordinates for {} atoms".format(
+             template, len(template._coordinates)
+            ))
+        self._template = template
+        self._coordinates = coordinates
+        self._offsets = [int(offset) for offset in offsets]
+        self._secondary_structures = list(
+         secondary_structures or [None] * len(coordinates)
+        )
+        self._models = weakref.WeakValueDictionary()
+        self._kept, self._overlays = {}, {}
+
+
+    def __repr__(self):
+        return "<ModelStack ({} models, {} atoms)>".format(
+         len(self), self._coordinates.shape[1]
+        )
+
+
+    def __len__(self):
+        return len(self._coordinates)
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0: index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ModelStack index out of range")
+        if index in self._kept: return self._kept[index]
+        model = self._models.get(index)
+        if model is None:
+            model = StackedModel(self, index)
+            self._models[index] = model
+        return model
+
+
+    @property
+    def coordinates(self):
+        """The M×N×3 array of every model's coordinates, with each model's
+        atoms in ID order. This is a read-only view of the array the models
+        use - a model's atoms are moved with its own methods, such as
+        :py:meth:`~.AtomStructure.set_coordinates`.
+
+        :rtype: ``numpy.ndarray``"""
+
+        coordinates = self._coordinates.view()
+        coordinates.flags.writeable = False
+        return coordinates
+
+
+    @property
+    def intact(self):
+        """Whether every model still keeps its coordinates in the stack - this
+        will be ``False`` if atoms have been removed from any of them.
+
+        :rtype: ``bool``"""
+
+        return all(np.may_share_memory(model._coordinates, self._coordinates)
+         for model in self._kept.values())
+
+
+    def _record(self, index, structure, name, value):
+        """Records a change to one of the properties of a model's structure,
+        so that the model has it when it is made again.
+
+        :param int index: the model the structure is in.
+        :param structure: the template structure the changed structure views.
+        :param str name: the attribute that was changed.
+        :param value: its new value."""
+
+        overlay = self._overlays.setdefault(index, {})
+        overlay.setdefault(structure, {})[name] = value
+
+
+    def _keep(self, model):
+        """Keeps one of the stack's models from now on, rather than making it
+        again when it is next needed.
+
+        :param StackedModel model: the model to keep."""
+
+        self._kept[model._stack_index] = model
+
+
+
+class StackedStructure:
+    """A mixin for the structures of a :py:class:`.StackedModel`, which view
+    the structures of their stack's template. Changes to the properties listed
+    in ``RECORDED`` are recorded in the stack, and relinking residues makes
+    the stack keep the model.
+
+    The class would never be instantiated directly."""
+
+    __slots__ = []
+
+    RECORDED = [
+     "_name", "_full_name", "_sequence", "type", "_charge", "_bvalue"
+    ]
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        model = self._stacked_model()
+        if model is None: return
+        if name in self.RECORDED:
+            model._stack._record(
+             model._stack_index, self._template, name, value
+            )
+        elif name in ("_next", "_previous"):
+            model._stack._keep(model)
+
+
+    def _stacked_model(self):
+        """Returns the :py:class:`.StackedModel` the structure is part of, if
+        it is still part of one.
+
+        :rtype: ``StackedModel``"""
+
+        return self.__dict__.get("_model")
+
+
+
+class StackedHet(StackedStructure):
+    """A mixin for the residues and ligands of a :py:class:`.StackedModel`,
+    which makes sure that their copies are ordinary residues and ligands.
+
+    The class would never be instantiated directly."""
+
+    __slots__ = []
+
+    def copy(self, *args, **kwargs):
+        plain = object.__new__(type(self._template))
+        plain.__dict__ = self.__dict__
+        return plain.copy(*args, **kwargs)
+
+
+
+class StackedAtom(StackedStructure, Atom):
+    """An atom of a :py:class:`.StackedModel`. It has the same properties as
+    the template atom it views, but with its ID shifted by the model's offset,
+    and with its location in the model's row of the stack.
+
+    :param Atom template: the template atom.
+    :param StackedModel model: the model the atom belongs to.
+    :param int offset: how much the atom's ID differs from the template's.
+    :param dict overlay: the recorded changes to the model's structures."""
+
+    __slots__ = ["_template"]
+
+    def __init__(self, template, model, offset, overlay):
+        for name in ("_element", "_name", "_charge", "_bvalue", "_anisotropy"):
+            object.__setattr__(self, name, getattr(template, name))
+        for name, value in overlay.get(template, {}).items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_id", template._id + offset)
+        object.__setattr__(self, "_index", template._index)
+        object.__setattr__(self, "_model", model)
+        object.__setattr__(self, "_template", template)
+
+
+    def __getattr__(self, name):
+        if name == "_location":
+            return self._model._coordinates[self._index]
+        if name == "_bonded_atoms":
+            atoms, template = self._model._atom_list, self._template
+            bonded = {atoms[atom._index] for atom in template._bonded_atoms
+             if atom._model is template._model}
+            object.__setattr__(self, "_bonded_atoms", bonded)
+            return bonded
+        raise AttributeError(name)
+
+
+    def _stacked_model(self):
+        return getattr(self, "_model", None)
+
+
+    def bond(self, other):
+        Atom.bond(self, other)
+        for atom in (self, other):
+            if isinstance(atom, StackedAtom):
+                model = atom._stacked_model()
+                if model is not None: model._stack._keep(model)
+
+
+
+class StackedResidue(StackedHet, Residue):
+    """A residue of a :py:class:`.StackedModel`."""
+
+    def _stacked_model(self):
+        return getattr(self.__dict__.get("_chain"), "_model", None)
+
+
+
+class StackedLigand(StackedHet, Ligand):
+    """A ligand of a :py:class:`.StackedModel`."""
+
+
+
+class StackedChain(StackedStructure, Chain):
+    """A chain of a :py:class:`.StackedModel`."""
+
+
+
+class StackedModel(StackedStructure, Model):
+    """One of the models of a :py:class:`.ModelStack`. Its coordinates array is
+    its row of the stack, and its chains, ligands, waters, residues and atoms
+    are only made the first time they are needed, as views of the template's
+    structures.
+
+    :param ModelStack stack: the stack the model belongs to.
+    :param int index: the model's position in the stack."""
+
+    def __init__(self, stack, index):
+        template = stack._template
+        self.__dict__.update(
+         _stack=stack, _stack_index=index, _template=template,
+         _id=template._id, _name=template._name, _file=template._file,
+         _coordinates=stack._coordinates[index],
+         _atom_arrays={}, _internal_grid=None
+        )
+        self.__dict__.update(stack._overlays.get(index, {}).get(template, {}))
+
+
+    def __getattr__(self, name):
+        if name in ("_chains", "_ligands", "_waters", "_atom_list")\
+         and "_template" in self.__dict__:
+            self._create_structures()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+
+    def _stacked_model(self):
+        return self
+
+
+    def _create_structures(self):
+        """Makes the model's structures from the template's - its chains,
+        ligands, waters, and their residues and atoms. The chains are given the
+        model's own helices and strands, and any recorded changes are applied
+        to the structures."""
+
+        stack, template, index = self._stack, self._template, self._stack_index
+        overlay = stack._overlays.get(index, {})
+        secondary_structure = stack._secondary_structures[index] or {}
+        atoms = [StackedAtom(atom, self, stack._offsets[index], overlay)
+         for atom in template._atom_list]
+        views = {}
+        def view(cls, structure, **attributes):
+            new = cls.__new__(cls)
+            new.__dict__.update(structure.__dict__)
+            new.__dict__.update(overlay.get(structure, {}))
+            new.__dict__.update(_template=structure, **attributes)
+            if "_atoms" in attributes:
+                for atom in attributes["_atoms"].structures:
+                    object.__setattr__(atom, "_het", new)
+            views[structure] = new
+            return new
+        def atoms_of(het):
+            return StructureSet(
+             *[atoms[atom._index] for atom in het._atoms.structures]
+            )
+        chains = []
+        for chain in template._chains.structures:
+            residues = [view(StackedResidue, residue, _atoms=atoms_of(residue))
+             for residue in chain._residues.structures]
+            new = view(
+             StackedChain, chain, _model=self, _residues=StructureSet(*residues)
+            )
+            for residue in residues: residue.__dict__["_chain"] = new
+            if chain._id in secondary_structure:
+                helices, strands = [[tuple(
+                 new._residues.get(id) for id in residue_ids
+                ) for residue_ids in section] for section in
+                 secondary_structure[chain._id]]
+            else:
+                helices, strands = [[tuple(views[r] for r in residues)
+                 for residues in section]
+                 for section in (chain._helices, chain._strands)]
+            new.__dict__.update(_helices=helices, _strands=strands)
+            chains.append(new)
+        for residue in [structure for structure in views.values()
+         if isinstance(structure, Residue)]:
+            for name in ("_next", "_previous"):
+                residue.__dict__[name] = views.get(residue.__dict__[name])
+        ligands = [[view(
+         StackedLigand, ligand, _atoms=atoms_of(ligand), _model=self,
+         _chain=views.get(ligand._chain)
+        ) for ligand in ligands.structures]
+         for ligands in (template._ligands, template._waters)]
+        for name, value in (("_chains", StructureSet(*chains)),
+         ("_ligands", StructureSet(*ligands[0])),
+         ("_waters", StructureSet(*ligands[1])), ("_atom_list", atoms)):
+            self.__dict__.setdefault(name, value)
+
+
+    def _store_coordinates(self, coordinates=None):
+        self._stack._keep(self)
+        for atom in self._atom_list:
+            object.__setattr__(atom, "_location", np.array(atom._location))
+        Model._store_coordinates(self, coordinates)
+
+
+
+def make_atom_filter(atoms=None, chains=None, hetatm=True, waters=True):
+    """Creates a function which the parsers use to decide whether an atom
+    should be kept while its model is being built, so that unwanted atoms never
+    become atom dictionaries at all.
+
+    The function returned takes an atom's name, the ID of the chain it belongs
+    to, and the section of the model dictionary it would go in (``"polymer"``,
+    ``"non-polymer"``, ``"water"`` or ``"branched"``). If no filtering has been
+    asked for, ``None`` is returned instead.
+
+    :param atoms: the atom name(s) to keep.
+    :param chains: the chain ID(s) to keep.
+    :param bool hetatm: if ``False``, ligands will be discarded.
+    :param bool waters: if ``False``, waters will be discarded.
+    :rtype: ``function``"""
+
+    if atoms is None and chains is None and hetatm and waters: return None
+    if isinstance(atoms, str): atoms = [atoms]
+    if isinstance(chains, str): chains = [chains]
+    atoms = None if atoms is None else set(atoms)
+    chains = None if chains is None else set(chains)
+    excluded = {s for s, keep in (("non-polymer", hetatm), ("water", waters))
+     if not keep}
+    def keep(name, chain_id, section):
+        return (atoms is None or name in atoms) and\
+         (chains is None or chain_id in chains) and section not in excluded
+    return keep
+
+
+def data_dict_to_file(data_dict, filetype, stack_models=False):
     """Turns an atomium data dictionary into a :py:class:`.File`.
 
     :param dict data_dict: the data dictionary to parse.
     :param str filetype: the file type that is being converted.
+    :param bool stack_models: if ``True``, models which share a topology will\
+    be kept as a :py:class:`.ModelStack`.
     :rtype: ``File``"""
 
     f = File(filetype)
@@ -224,10 +610,99 @@ def data_dict_to_file(data_dict, filetype):
         if key != "models":
             for subkey, value in data_dict[key].items():
                 setattr(f, "_" + subkey, value)
-    f._models = [model_dict_to_model(m) for m in data_dict["models"]]
+    if stack_models:
+        f._models = model_dicts_to_models(data_dict["models"])
+    else:
+        f._models = [model_dict_to_model(m) for m in data_dict["models"]]
     return f
 
 
+def model_dicts_to_models(model_dicts):
+    """Takes model dictionaries and turns them into models. If every model has
+    the same topology - the same chains, ligands and atoms, with only their
+    atoms' locations different, and their atom IDs all shifted by the same
+    amount - a :py:class:`.ModelStack` is returned, which keeps just one set of
+    structures and an array of every model's coordinates. Otherwise a list of
+    :py:class:`.Model` objects is returned.
+
+    Secondary structure isn't part of the topology compared, as some formats
+    (such as .mmtf) assign it to each model separately - the stack keeps the
+    helices and strands of any model whose secondary structure differs from
+    the first model's.
+
+    The model dictionaries can be any iterable, such as a generator, and only
+    one is needed at a time, so they need never all exist at once.
+
+    :param model_dicts: the model dictionaries.
+    :rtype: ``list`` or ``ModelStack``"""
+
+    model_dicts = iter(model_dicts)
+    first = next(model_dicts, None)
+    if first is None: return []
+    topology, ids, coordinates, secondary = split_model_dict(first)
+    template = model_dict_to_model(first)
+    if len(set(ids)) != len(ids):
+        return [template] + [model_dict_to_model(m) for m in model_dicts]
+    rows = {atom._id: atom._index for atom in template._atom_list}
+    ids = np.array(ids)
+    found = np.array([rows.get(id, -1) for id in ids.tolist()], dtype=int)
+    kept = found != -1
+    def stack_row(coordinates):
+        row = np.zeros((len(rows), 3))
+        row[found[kept]] = np.array(coordinates).reshape(-1, 3)[kept]
+        return row
+    stack, offsets, structures = [stack_row(coordinates)], [0], [None]
+    for model_dict in model_dicts:
+        other_topology, other_ids, coordinates, other_secondary =\
+         split_model_dict(model_dict)
+        if other_topology != topology or len(other_ids) != len(ids): break
+        differences = np.array(other_ids) - ids
+        if len(set(differences.tolist())) > 1: break
+        stack.append(stack_row(coordinates))
+        offsets.append(int(differences[0]) if len(differences) else 0)
+        structures.append(None if other_secondary == secondary
+         else other_secondary)
+    else:
+        if len(stack) == 1: return [template]
+        return ModelStack(template, np.stack(stack), offsets, structures)
+    models = ModelStack(template, np.stack(stack), offsets, structures)
+    models = [models[index].copy() for index in range(len(models))]
+    return models + [model_dict_to_model(model_dict)] + [
+     model_dict_to_model(m) for m in model_dicts
+    ]
+
+
+def split_model_dict(model_dict):
+    """Splits a model dictionary into its topology - everything except its
+    atoms' IDs and locations, and its chains' helices and strands, in a form
+    which can be compared with another model's - the IDs and coordinates of
+    its atoms, in the order they appear in the dictionary, and the residue IDs
+    of each chain's helices and strands.
+
+    :param dict model_dict: the model dictionary.
+    :rtype: ``tuple``"""
+
+    ids, coordinates = [], []
+    def strip(value):
+        if not isinstance(value, dict): return value
+        stripped = []
+        for key, item in value.items():
+            if key == "atoms":
+                atoms = []
+                for id, atom in item.items():
+                    ids.append(id)
+                    coordinates.append((atom["x"], atom["y"], atom["z"]))
+                    atoms.append([(k, v) for k, v in atom.items()
+                     if k not in ("x", "y", "z")])
+                stripped.append((key, atoms))
+            elif key not in ("helices", "strands"):
+                stripped.append((key, strip(item)))
+        return stripped
+    secondary_structure = {id: (chain["helices"], chain["strands"])
+     for id, chain in model_dict["polymer"].items()}
+    return strip(model_dict), ids, coordinates, secondary_structure
+
+
 def model_dict_to_model(model_dict):
     """Takes a model dictionary and turns it into a fully processed
     :py:class:`.Model` object.
@@ -1,196 +1,198 @@
 """Contains functions for dealing with the .cif file format."""
 
-from collections import deque
 import re
 from datetime import datetime
 import numpy as np
 import valerius
 from itertools import groupby
-from .data import CODES, Chain, Residue, Ligand
+from .data import CODES, Chain, Residue, Ligand, make_atom_filter
 
-def mmcif_string_to_mmcif_dict(filestring):
+CIF_VALUE = re.compile(r"'(.*?)'(?=\s|$)|\"(.*?)\"(?=\s|$)|(\S+)")
+
+def mmcif_string_to_mmcif_dict(filestring, metadata_only=False, columnar=False,
+                               categories=None):
     """Takes a .cif filestring and turns into a ``dict`` which represents its
-    table structure. Only lines which aren't empty and which don't begin with
-    ``#`` are used.
+    table structure.
+
+    The filestring is read in a single pass, line by line, with each line's
+    values being assigned to the current table as they are read. Semicolon
+    text fields are joined into one value, and loop rows can be broken over as
+    many lines as needed. Loop tables become a ``list`` of row ``dict``
+    objects, and non-loop tables become a ``list`` with a single ``dict``.
 
-    Multi-line strings are consolidated onto one line, and the whole thing is
-    then split into the blocks that will become table lists. At the end, quote
-    marks are removed from any string which retains them.
+    If ``columnar`` is ``True``, every table will instead be a ``dict`` of
+    columns, with each column being a ``list`` of that column's values. This
+    avoids creating a ``dict`` for every row, which for large ``atom_site``
+    tables is most of the memory used.
+
+    If ``metadata_only`` is ``True``, the ``atom_site`` and
+    ``atom_site_anisotrop`` loops are skipped over without being parsed. More
+    generally, if a list of ``categories`` is given, only those tables will be
+    parsed - the lines of every other table are passed over until the next
+    ``loop_`` or table name is reached, without being split into values.
 
     :param str filestring: the .cif filestring to process.
+    :param bool metadata_only: if ``True``, atom tables are not read.
+    :param bool columnar: if ``True``, tables will be stored as columns.
+    :param list categories: if given, the only tables to read.
     :rtype: ``dict``"""
 
-    lines = deque(filter(lambda l: l and l[0] != "#", filestring.split("\n")))
-    lines = consolidate_strings(lines)
-    blocks = mmcif_lines_to_mmcif_blocks(lines)
-    mmcif_dict = {}
-    for block in blocks:
-        if block["lines"][0] == "loop_":
-            mmcif_dict[block["category"]] = loop_block_to_list(block)
+    skip = {"atom_site", "atom_site_anisotrop"} if metadata_only else set()
+    if categories is not None: categories = set(categories)
+    mmcif_dict, category, name, text = {}, None, None, None
+    loop, in_header = None, False
+    for line in filestring.split("\n"):
+        if text is not None:
+            if line[:1] != ";":
+                if line.strip(): text.append(line.rstrip())
+                continue
+            values, text = [" ".join(text)], None
+        elif not line or line[0] == "#":
+            continue
+        elif line[0] == ";":
+            text, in_header = [line[1:].strip()], False
+            continue
+        elif line[0] == "_":
+            line_category, _, name = line[1:].partition(".")
+            if categories is not None and line_category not in categories:
+                skip.add(line_category)
+            if in_header:
+                loop["category"] = line_category
+                loop["names"].append(name.rstrip())
+                continue
+            add_loop(loop, mmcif_dict, skip, columnar)
+            loop = None
+            if line_category != category:
+                category = line_category
+                if category not in skip:
+                    mmcif_dict[category] = {} if columnar else [{}]
+            if category in skip: continue
+            name, *line = name.split(None, 1)
+            values = split_values(line[0]) if line else []
+            if not values: continue
+        elif line.startswith("loop_"):
+            add_loop(loop, mmcif_dict, skip, columnar)
+            loop = {"category": None, "names": [], "values": []}
+            category, in_header = None, True
+            continue
+        elif line.startswith("data_"):
+            continue
         else:
-            mmcif_dict[block["category"]] = non_loop_block_to_list(block)
-    strip_quotes(mmcif_dict)
+            in_header = False
+            if loop and loop["category"] in skip: continue
+            values = split_values(line)
+            if not values: continue
+        if loop:
+            if loop["category"] not in skip: loop["values"] += values
+        elif name is not None:
+            if category in skip:
+                pass
+            elif columnar:
+                mmcif_dict[category][name] = [values[0]]
+            else:
+                mmcif_dict[category][0][name] = values[0]
+            name = None
+    add_loop(loop, mmcif_dict, skip, columnar)
     return mmcif_dict
 
 
-def consolidate_strings(lines):
-    """Generally, .cif files have a one file line to one table row
-    correspondence. Sometimes however, a string cell is given a line of its own,
-    breaking the row over several lines. This function takes the lines of a .cif
-    file and puts all table rows on a single line.
-
-    :param deque lines: the .cif file lines.
-    :rtype: ``deque``"""
-
-    new_lines = deque()
-    while lines:
-        line = lines.popleft()
-        if line.startswith(";"):
-            string = [line[1:].strip()]
-            while not lines[0].startswith(";"):
-                string.append(lines.popleft())
-            lines.popleft()
-            new_lines[-1] += " \"{}\"".format(
-             " ".join(string).replace('"', "\x1a").replace("'", "\x1b")
-            )
+def add_loop(loop, mmcif_dict, skip=(), columnar=False):
+    """Takes a finished loop - its category, column names, and every value in
+    it - and adds it to the .mmcif dictionary as a list of row ``dict``
+    objects, or as a ``dict`` of column lists. The values are grouped purely
+    by the number of columns, so it doesn't matter how the rows were broken
+    over lines.
+
+    :param dict loop: the loop to add (can be ``None``).
+    :param dict mmcif_dict: the .mmcif dictionary to update.
+    :param tuple skip: categories which should not be added.
+    :param bool columnar: if ``True``, the table will be stored as columns."""
+
+    if loop and loop["category"] and loop["category"] not in skip:
+        names, values = loop["names"], loop["values"]
+        if columnar:
+            del values[len(values) - len(values) % len(names):]
+            mmcif_dict[loop["category"]] = {
+             name: values[index::len(names)] for index, name in enumerate(names)
+            }
         else:
-            new_lines.append(line)
-    return new_lines
+            values = iter(values)
+            mmcif_dict[loop["category"]] = [
+             dict(zip(names, row)) for row in zip(*[values] * len(names))
+            ]
 
 
-def mmcif_lines_to_mmcif_blocks(lines):
-    """A .cif file is ultimately a list of tables. This function takes a list of
-    .cif file lines and splits them into these table blocks. Each block will be
-    a ``dict`` containing a category name and a list of lines.
-
-    :param deque lines: the .cif file lines.
-    :rtype: ``list``"""
-
-    category = None
-    block, blocks = [], []
-    while lines:
-        line = lines.popleft()
-        if line.startswith("data_"): continue
-        if line.startswith("_"):
-            line_category = line.split(".")[0]
-            if line_category != category:
-                if category:
-                    blocks.append({"category": category[1:], "lines": block})
-                category = line_category
-                block = []
-        if line.startswith("loop_"):
-            if category:
-                blocks.append({"category": category[1:], "lines": block})
-            category = lines[0].split(".")[0]
-            block = []
-        block.append(line)
-    if block: blocks.append({"category": category[1:], "lines": block})
-    return blocks
-
+def mmcif_lines_to_category_offsets(lines):
+    """Goes through the lines of a .cif file (as ``bytes``) and records where
+    each table's block starts and ends, as byte offsets into the file. A block
+    starts at its ``loop_`` line, or at its first line for non-loop tables, and
+    ends where the next block starts. Semicolon text fields are passed over so
+    that lines inside them can't be mistaken for table names.
 
-def non_loop_block_to_list(block):
-    """Takes a simple block ``dict`` with no loop and turns it into a table
-    ``list``.
+    The result maps each table name to a list of ``[start, end]`` offsets -
+    there is usually one block per table, but a table can appear twice.
 
-    :param dict block: the .cif block to process.
-    :rtype: ``list``"""
-
-    d = {}
-    category = block["lines"][0].split(".")[0]
-    for index in range(len(block["lines"]) - 1):
-        if block["lines"][index + 1][0] != "_":
-            block["lines"][index] += " " + block["lines"][index + 1]
-    block["lines"] = [l for l in block["lines"] if l[0] == "_"]
-    for line in block["lines"]:
-        name = line.split(".")[1].split()[0]
-        value = line
-        if line.startswith("_"):
-            value = " ".join(line.split()[1:])
-        d[name] = value
-    return [d]
-
-
-def loop_block_to_list(block):
-    """Takes a loop block ``dict`` where the initial lines are table headers and
-    turns it into a table ``list``. Sometimes a row is broken over several lines
-    so this function deals with that too.
-
-    :param dict block: the .cif block to process.
-    :rtype: ``list``"""
+    :param lines: the file's lines, such as a file opened in binary mode.
+    :rtype: ``dict``"""
 
-    names, lines, header = [], [], True
-    body_start = 0
-    for index, line in enumerate(block["lines"][1:], start=1):
-        if not line.startswith("_" + block["category"]):
-            body_start = index
-            break
-    names = [l.split(".")[1].rstrip() for l in block["lines"][1:body_start]]
-    lines = [split_values(l) for l in block["lines"][body_start:]]
-    l = []
-    for n in range(len(lines) - 1):
-        while n < len(lines) - 1 and\
-         len(lines[n]) + len(lines[n + 1]) <= len(names):
-            lines[n] += lines[n + 1]
-            lines.pop(n + 1)
+    blocks, category, start, offset = [], None, 0, 0
+    in_header, in_loop, in_text = False, False, False
     for line in lines:
-        l.append({
-         name: value for name, value in zip(names, line)
-        })
-    return l
+        if in_text:
+            if line[:1] == b";": in_text = False
+        elif line[:1] == b";":
+            in_text, in_header = True, False
+        elif line[:1] == b"_":
+            line_category = line[1:].split(b".", 1)[0].decode()
+            if in_header:
+                category = category or line_category
+            elif in_loop or line_category != category:
+                blocks.append((category, start, offset))
+                category, start, in_loop = line_category, offset, False
+        elif line.startswith(b"loop_"):
+            blocks.append((category, start, offset))
+            category, start, in_header, in_loop = None, offset, True, True
+        elif line.strip() and line[:1] != b"#" and not line.startswith(b"data_"):
+            in_header = False
+        offset += len(line)
+    blocks.append((category, start, offset))
+    offsets = {}
+    for category, start, end in blocks:
+        if category: offsets.setdefault(category, []).append([start, end])
+    return offsets
 
 
 def split_values(line):
     """The body of a .cif table is a series of lines, with each cell divided by
     whitespace. This function takes a string line and breaks it into cells.
 
-    There are a few peculiarities to handle. Sometimes a cell is a string
-    enclosed in quote marks, and spaces within this string obviously shouldn't
-    be used to break the line. This function handles all of that.
+    Sometimes a cell is a string enclosed in quote marks, and spaces within
+    this string shouldn't be used to break the line. A quote mark only ends
+    such a string if it is followed by whitespace, so that values like
+    ``"O5'"`` are read correctly. The quote marks themselves are removed.
 
     :param str line: the .cif line to split.
     :rtype: ``list``"""
 
-    if not re.search("[\'\"]", line): return line.split()
-    chars = deque(line.strip())
-    values, value, in_string = [], [], False
-    while chars:
-        char = chars.popleft()
-        if char == " " and not in_string:
-            values.append(value)
-            value = []
-        elif char in "'\"":
-            if in_string and chars and chars[0] != " ":
-                value.append(char)
-            else:
-                in_string = not in_string
-        else:
-            value.append(char)
-    values.append(value)
-    return ["".join(v) for v in values if v]
-
-
-def strip_quotes(mmcif_dict):
-    """Goes through each table in the mmcif ``dict`` and removes any unneeded
-    quote marks from the cells.
-
-    :param dict mmcif_dict: the almost finished .mmcif dictionary to clean."""
-
-    for name, table in mmcif_dict.items():
-        for row in table:
-            for k, value in row.items():
-                for char in "'\"":
-                    if value[0] == char and value[-1] == char:
-                        row[k] = value[1:-1]
-                    row[k] = row[k].replace("\x1a", '"').replace("\x1b", "'")
+    if "'" not in line and '"' not in line: return line.split()
+    return [match.group(match.lastindex) for match in CIF_VALUE.finditer(line)]
 
 
-def mmcif_dict_to_data_dict(mmcif_dict):
+def mmcif_dict_to_data_dict(mmcif_dict, lazy_models=False, **filters):
     """Converts an .mmcif dictionary into an atomium data dictionary, with the
     same standard layout that the other file formats get converted into.
 
+    Any of the keyword arguments of :py:func:`.make_atom_filter` (``atoms``,
+    ``chains``, ``hetatm`` and ``waters``) can be given to discard atoms while
+    the models are being built.
+
     :param dict mmcif_dict: the .mmcif dictionary.
+    :param bool lazy_models: if ``True``, the models will be a generator which\
+    creates each model dictionary only as it is needed.
     :rtype: ``dict``"""
 
+    mmcif_dict = {name: table if name in ("atom_site", "atom_site_anisotrop")
+     else table_to_rows(table) for name, table in mmcif_dict.items()}
     data_dict = {
      "description": {
       "code": None, "title": None, "deposition_date": None,
@@ -205,7 +207,9 @@ def mmcif_dict_to_data_dict(mmcif_dict):
     update_experiment_dict(mmcif_dict, data_dict)
     update_quality_dict(mmcif_dict, data_dict)
     update_geometry_dict(mmcif_dict, data_dict)
-    update_models_list(mmcif_dict, data_dict)
+    update_models_list(
+     mmcif_dict, data_dict, keep=make_atom_filter(**filters), lazy=lazy_models
+    )
     return data_dict
 
 
@@ -403,49 +407,161 @@ def operation_id_groups_to_operations(operations, operation_id_groups):
     return operation_groups[0]
 
 
-def update_models_list(mmcif_dict, data_dict):
+def update_models_list(mmcif_dict, data_dict, keep=None, lazy=False):
     """Takes a data dictionary and updates its models list with
     information from a .mmcif dictionary.
 
     :param dict mmcif_dict: the .mmcif dictionary to read.
-    :param dict data_dict: the data dictionary to update."""
+    :param dict data_dict: the data dictionary to update.
+    :param function keep: if given, the atom filter to apply.
+    :param bool lazy: if ``True``, the models will be a generator."""
+
+    models = mmcif_dict_to_model_dicts(mmcif_dict, keep=keep)
+    data_dict["models"] = models if lazy else list(models)
+
+
+def mmcif_dict_to_model_dicts(mmcif_dict, atoms=None, keep=None):
+    """A generator which works through the atom rows of a .mmcif dictionary
+    and yields a model dictionary as soon as each model's rows have been read.
+
+    By default the rows are taken from the dictionary's ``atom_site`` table,
+    but any iterable of atom rows can be given instead, in which case they will
+    only be consumed as needed.
+
+    :param dict mmcif_dict: the .mmcif dictionary to read.
+    :param atoms: if given, the atom rows to use.
+    :param function keep: if given, the atom filter to apply.
+    :rtype: ``dict``"""
 
-    data_dict["models"] = []
     types = {e["id"]: e["type"] for e in mmcif_dict.get("entity", {})}
     names = {e["id"]: e["name"] for e in mmcif_dict.get("chem_comp", {})
      if e["mon_nstd_flag"] != "y"}
     entities = {
      m["id"]: m["entity_id"] for m in mmcif_dict.get("struct_asym", []) 
     }
+    poly_types = {
+     e["entity_id"]: e["type"] for e in mmcif_dict.get("entity_poly", [])
+    }
     sequences = make_sequences(mmcif_dict)
     secondary_structure = make_secondary_structure(mmcif_dict)
     aniso = make_aniso(mmcif_dict)
-    model = {"polymer": {}, "non-polymer": {}, "water": {}, "branched": {}}
-    model_num = mmcif_dict["atom_site"][0]["pdbx_PDB_model_num"]
-    for atom in mmcif_dict["atom_site"]:
+    model, model_num = None, None
+    if atoms is None: atoms = atom_site_rows(mmcif_dict.get("atom_site", []))
+    for atom in atoms:
         if atom["pdbx_PDB_model_num"] != model_num:
-            data_dict["models"].append(model)
+            if model:
+                add_sequences_to_polymers(model, sequences, entities)
+                add_secondary_structure_to_polymers(model, secondary_structure)
+                yield model
             model = {"polymer": {}, "non-polymer": {}, "water": {}, "branched": {}}
             model_num = atom["pdbx_PDB_model_num"]
         mol_type = types[entities[atom["label_asym_id"]]]
+        if keep and not keep(
+         atom["label_atom_id"], atom["auth_asym_id"], mol_type
+        ): continue
         if mol_type == "polymer":
-            if 'entity_poly' in mmcif_dict:
-                poly_type = [ el for el in mmcif_dict['entity_poly'] if el['entity_id'] == model_num]
-                if len(poly_type) > 0:
-                    poly_type = poly_type[0]['type']
-                else:
-                    poly_type = None
-            else:
-                poly_type = None
+            poly_type = poly_types.get(entities[atom["label_asym_id"]])
             add_polymer_to_polymer(atom, aniso, model, names, poly_type)
         elif mol_type == "branched":
             add_atom_to_polymer(atom, aniso, model, names)
         else:
             add_atom_to_non_polymer(atom, aniso, model, mol_type, names)
-    data_dict["models"].append(model)
-    for model in data_dict["models"]:
-        add_sequences_to_polymers(model, mmcif_dict, entities)
+    if model:
+        add_sequences_to_polymers(model, sequences, entities)
         add_secondary_structure_to_polymers(model, secondary_structure)
+        yield model
+
+
+def mmcif_lines_to_model_dicts(f):
+    """A generator which reads a .cif file and yields a model dictionary for
+    each of its models, without ever holding more than one model's atom rows.
+
+    The file is read twice - once to parse every table except ``atom_site``
+    (some of which, such as ``atom_site_anisotrop``, come after it), and then
+    again to feed the ``atom_site`` rows through one at a time.
+
+    :param f: an open, seekable .cif file.
+    :rtype: ``dict``"""
+
+    header_lines, names = [], []
+    for line, in_atom_site in category_scan(f):
+        if not in_atom_site:
+            header_lines.append(line)
+        elif line.startswith("_atom_site."):
+            names.append(line.split(".")[1].rstrip())
+    mmcif_dict = mmcif_string_to_mmcif_dict("\n".join(header_lines))
+    del header_lines
+    f.seek(0)
+    values = (value for line, in_atom_site in category_scan(f)
+     if in_atom_site and not line.startswith("_atom_site.")
+      for value in split_values(line))
+    rows = (dict(zip(names, row)) for row in zip(*[values] * len(names)))
+    for model in mmcif_dict_to_model_dicts(mmcif_dict, atoms=rows):
+        yield model
+
+
+def category_scan(lines, categories=("atom_site",)):
+    """A generator which goes through the lines of a .cif file, and yields each
+    non-empty, non-comment line along with whether it is part of a loop
+    belonging to one of the given categories (header or row).
+
+    :param lines: an open .cif file, or some other iterable of its lines.
+    :param tuple categories: the names of the categories to flag.
+    :rtype: ``tuple``"""
+
+    prefixes = tuple("_{}.".format(category) for category in categories)
+    in_category, after_loop = False, False
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line or line[0] == "#": continue
+        if after_loop:
+            in_category = line.startswith(prefixes)
+            if not in_category: yield "loop_", False
+            after_loop = False
+        elif line.startswith(("_", "data_")) and not line.startswith(prefixes):
+            in_category = False
+        if line.startswith("loop_"):
+            in_category, after_loop = False, True
+        else:
+            yield line, in_category
+
+
+def table_to_rows(table):
+    """Takes a table from a .mmcif dictionary and returns it as a list of row
+    ``dict`` objects. Tables that are already rows are returned as they are,
+    and tables stored as columns are converted.
+
+    :param table: the table to convert.
+    :rtype: ``list``"""
+
+    if not isinstance(table, dict): return table
+    names = list(table.keys())
+    return [dict(zip(names, row)) for row in zip(*table.values())]
+
+
+def atom_site_rows(table):
+    """Takes an ``atom_site`` table and returns an iterable of its rows. If the
+    table is stored as columns, the coordinate, B-factor, occupancy and ID
+    columns are converted to numbers in bulk first, and the row ``dict``
+    objects are then only created one at a time as they are needed.
+
+    :param table: the ``atom_site`` table.
+    :rtype: ``iterable``"""
+
+    if not isinstance(table, dict): return table
+    columns = dict(table)
+    for name in ["Cartn_x", "Cartn_y", "Cartn_z", "B_iso_or_equiv",
+     "occupancy"]:
+        if name in columns:
+            try:
+                columns[name] = np.array(columns[name], dtype=float).tolist()
+            except: pass
+    if "id" in columns:
+        try:
+            columns["id"] = np.array(columns["id"], dtype=int).tolist()
+        except: pass
+    names = list(columns.keys())
+    return (dict(zip(names, row)) for row in zip(*columns.values()))
 
 
 def make_aniso(mmcif_dict):
@@ -454,10 +570,16 @@ def make_aniso(mmcif_dict):
     :param mmcif_dict: the .mmcif dict to read.
     :rtype: ``dict``"""
 
+    table = mmcif_dict.get("atom_site_anisotrop", [])
+    if isinstance(table, dict):
+        return {int(id): list(values) for id, *values in zip(table["id"], *[
+         np.array(table["U[{}][{}]".format(x, y)], dtype=float).tolist()
+          for x, y in ["11", "22", "33", "12", "13", "23"]
+        ])}
     return {int(a["id"]): [
      float(a["U[{}][{}]".format(x, y)]) for
       x, y in ["11", "22", "33", "12", "13", "23"]
-    ] for a in mmcif_dict.get("atom_site_anisotrop", [])}
+    ] for a in table}
 
 
 def make_secondary_structure(mmcif_dict):
@@ -555,15 +677,14 @@ def make_residue_id(d):
     return "{}.{}{}".format(d["auth_asym_id"], d["auth_seq_id"], insert)
 
 
-def add_sequences_to_polymers(model, mmcif_dict, entities):
+def add_sequences_to_polymers(model, sequences, entities):
     """Takes a pre-populated mapping of chain IDs to entity IDs, and uses them
     to add sequence information to a model.
 
     :param dict model: the model to update.
-    :param dict mmcif_dict: the .mmcif dictionary to read.
+    :param dict sequences: a mapping of entity IDs to sequences.
     :param dict entities: a mapping of chain IDs to entity IDs."""
 
-    sequences = make_sequences(mmcif_dict)
     for polymer in model["polymer"].values():
         polymer["sequence"] = sequences.get(
          entities.get(polymer["internal_id"], ""), ""
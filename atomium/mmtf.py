@@ -2,19 +2,35 @@
 
 import msgpack
 import struct
+import numpy as np
 from collections import deque
+from collections.abc import MutableMapping
 from datetime import datetime
 from .mmcif import get_structure_from_atom, create_entities, split_residue_id
 from .structures import Chain, Ligand
+from .data import make_atom_filter
 
-def mmtf_bytes_to_mmtf_dict(bytestring):
+ATOM_FIELDS = (
+ "xCoordList", "yCoordList", "zCoordList", "bFactorList", "atomIdList",
+ "altLocList", "occupancyList", "groupIdList", "groupTypeList",
+ "secStructList", "insCodeList", "sequenceIndexList", "groupList",
+ "bondAtomList", "bondOrderList"
+)
+
+def mmtf_bytes_to_mmtf_dict(bytestring, metadata_only=False):
     """Takes the raw bytestring of a .mmtf file and turns it into a normal,
     fully decoded JSON dictionary.
 
+    If ``metadata_only`` is ``True``, the atom and group fields are discarded
+    without being decoded, and there will be no models.
+
     :patam bytes bytestring: the .mmtf filestring.
+    :param bool metadata_only: if ``True``, atom fields are not decoded.
     :rtype: ``dict``"""
 
     raw = msgpack.unpackb(bytestring)
+    if metadata_only:
+        for field in ATOM_FIELDS: raw.pop(field.encode(), None)
     return decode_dict(raw)
 
 
@@ -23,123 +39,172 @@ def decode_dict(d):
     values, .mmtf binary values, or other weirdness, and returns a dully decoded
     version of it which is a JSON-valid dictionary.
 
+    .mmtf binary values are left as they are, and are only decoded when they
+    are first looked up (see :py:class:`.MmtfDict`).
+
     :param dict d: the dictionary to read.
-    :rtype: ``dict``"""
+    :rtype: ``MmtfDict``"""
 
-    new = {}
+    new = MmtfDict()
     for key, value in d.items():
         try:
             new_value = value.decode()
         except: new_value = value
         if isinstance(new_value, str) and new_value and new_value[0] == "\x00":
             new_value = new_value.encode()
-        if isinstance(new_value, bytes):
-            new_value = parse_binary_field(new_value)
         if isinstance(new_value, list) and new_value:
             if isinstance(new_value[0], dict):
                 new_value = [decode_dict(x) for x in new_value]
             elif isinstance(new_value[0], bytes):
                 new_value = [x.decode() for x in new_value]
-        new[key.decode()] = new_value
+        new._fields[key.decode()] = new_value
     return new
 
 
+
+class MmtfDict(MutableMapping):
+    """A .mmtf dictionary which holds its binary fields undecoded until they
+    are first looked up. They are then decoded with
+    :py:func:`.parse_binary_field` and the decoded value is kept, so fields
+    which are never used are never decoded.
+
+    Every way of reading the dictionary - including iterating over its items,
+    copying it, or converting it to a ``dict`` - goes through the same lookup,
+    so undecoded fields are never seen."""
+
+    def __init__(self, *args, **kwargs):
+        self._fields = {}
+        self.update(*args, **kwargs)
+
+
+    def __repr__(self):
+        return "MmtfDict({})".format(dict(self))
+
+
+    def __getitem__(self, key):
+        value = self._fields[key]
+        if isinstance(value, bytes):
+            value = self._fields[key] = parse_binary_field(value)
+        return value
+
+
+    def __setitem__(self, key, value):
+        self._fields[key] = value
+
+
+    def __delitem__(self, key):
+        del self._fields[key]
+
+
+    def __iter__(self):
+        return iter(self._fields)
+
+
+    def __len__(self):
+        return len(self._fields)
+
+
+    def __contains__(self, key):
+        return key in self._fields
+
+
+    def copy(self):
+        """Returns a shallow copy of the dictionary, with any fields not yet
+        decoded still undecoded.
+
+        :rtype: ``MmtfDict``"""
+
+        new = MmtfDict()
+        new._fields = dict(self._fields)
+        return new
+
+
+
 def parse_binary_field(b):
     """Some fields in a .mmtf file cannot be unpacked by msgpack and have
     special .mmtf encoding, as specified in its documentation. This function
     takes such a field and decodes it.
 
+    Numeric fields are decoded into NumPy arrays, and text fields into lists
+    of strings.
+
     :param bytestring b: the field to parse.
     :returns: the parsed result (type varies)."""
 
-
     codec, length, params = struct.unpack(">iii", b[:12])
-    len4 = lambda b: int(len(b[12:]) / 4)
-    if codec == 1: return struct.unpack("f" * length, b[12:])
-    elif codec == 2: return struct.unpack("b" * length, b[12:])
-    elif codec == 3: return struct.unpack(">" + "h" * length, b[12:])
-    elif codec == 4: return struct.unpack(">" + "i" * length, b[12:])
+    if codec == 1: return np.frombuffer(b[12:], ">f4").astype("f8")
+    elif codec == 2: return np.frombuffer(b[12:], ">i1").astype("i4")
+    elif codec == 3: return np.frombuffer(b[12:], ">i2").astype("i4")
+    elif codec == 4: return np.frombuffer(b[12:], ">i4").astype("i4")
     elif codec == 5:
-        chars = struct.unpack("c" * (length * 4), b[12:])
-        return [b"".join([
-         c for c in chars[i * 4: (i + 1) * 4] if c != b"\x00"
-        ]).decode() for i in range(length)]
+        return [s.decode() for s in np.frombuffer(b[12:], "S4").tolist()]
     elif codec == 6:
-        integers = struct.unpack(">" + ("i" * len4(b)), b[12:])
-        return [chr(c) if c != 0 else "" for c in run_length_decode(integers)]
+        integers = np.frombuffer(b[12:], ">i4")
+        chars = np.array(
+         [chr(c) if c != 0 else "" for c in integers[0::2].tolist()],
+         dtype=object
+        )
+        return np.repeat(chars, integers[1::2]).tolist()
     elif codec == 7:
-        integers = struct.unpack(">" + ("i" * len4(b)), b[12:])
-        return run_length_decode(integers)
+        return run_length_decode(np.frombuffer(b[12:], ">i4"))
     elif codec == 8:
-        integers = struct.unpack(">" + ("i" * len4(b)), b[12:])
-        return delta_decode(run_length_decode(integers))
+        return delta_decode(run_length_decode(np.frombuffer(b[12:], ">i4")))
     elif codec == 9:
-        integers = struct.unpack(">" + ("i" * len4(b)), b[12:])
-        return [n / params for n in run_length_decode(integers)]
+        return run_length_decode(np.frombuffer(b[12:], ">i4")) / params
     elif codec == 10:
-        integers = struct.unpack(">" + ("h" * int(len(b[12:]) / 2)), b[12:])
-        return [n / params for n in delta_decode(recursive_decode(integers))]
+        integers = np.frombuffer(b[12:], ">i2")
+        return delta_decode(recursive_decode(integers)) / params
     else: raise ValueError(".mmtf error: {} is invalid codec".format(codec))
 
 
 def run_length_decode(integers):
-    """Expands a list of integers where every second integer is a count of the
-    integer before it.
+    """Expands an array of integers where every second integer is a count of
+    the integer before it.
 
-    :param list integers: the integers to decode.
-    :rtype: ``list``"""
+    :param numpy.ndarray integers: the integers to decode.
+    :rtype: ``numpy.ndarray``"""
 
-    x = []
-    for index, val in enumerate(integers[::2]):
-        x += [val] * integers[1::2][index]
-    return x
+    integers = np.asarray(integers, dtype="i4")
+    return np.repeat(integers[0::2], integers[1::2])
 
 
 def delta_decode(integers):
-    """Turns a list of integers into a new list of integers where the values in
-    the first are treated as deltas to be applied to the previous value.
+    """Turns an array of integers into a new array of integers where the values
+    in the first are treated as deltas to be applied to the previous value.
 
-    :param list integers: the integers to decode.
-    :rtype: ``list``"""
+    :param numpy.ndarray integers: the integers to decode.
+    :rtype: ``numpy.ndarray``"""
 
-    array, last = [], 0
-    for i in integers:
-        last += i
-        array.append(last)
-    return array
+    return np.cumsum(np.asarray(integers, dtype="i4"), dtype="i4")
 
 
 def recursive_decode(integers, bits=16):
-    """Turns a list of integers into a new list of integers where the values in
-    the first are merged if it looks like a higher order integer split over two
-    integers.
+    """Turns an array of integers into a new array of integers where the values
+    in the first are merged if it looks like a higher order integer split over
+    several integers - any integer at the limit of the type is added to the
+    integers after it, up to and including the first which isn't.
 
-    (Code here adapted from the official python-mmtf package.)
+    :param numpy.ndarray integers: the integers to decode.
+    :param int bits: the size of the integer type the values were packed into.
+    :rtype: ``numpy.ndarray``"""
 
-    :param list integers: the integers to decode.
-    :rtype: ``list``"""
-
-    new = []
+    integers = np.asarray(integers, dtype="i8")
     power = 2 ** (bits - 1)
-    cutoff = [power - 1, 0 - power]
-    index = 0
-    while index < len(integers):
-        value = 0
-        while integers[index] in cutoff:
-            value += integers[index]
-            index += 1
-            if integers[index] == 0: break
-        value += integers[index]
-        index += 1
-        new.append(value)
-    return new
+    ends = np.flatnonzero((integers != power - 1) & (integers != -power))
+    return np.diff(np.cumsum(integers)[ends], prepend=0).astype("i4")
 
 
-def mmtf_dict_to_data_dict(mmtf_dict):
+def mmtf_dict_to_data_dict(mmtf_dict, lazy_models=False, **filters):
     """Converts an .mmtf dictionary into an atomium data dictionary, with the
     same standard layout that the other file formats get converted into.
 
+    Any of the keyword arguments of :py:func:`.make_atom_filter` (``atoms``,
+    ``chains``, ``hetatm`` and ``waters``) can be given to discard atoms while
+    the models are being built.
+
     :param dict mmtf_dict: the .mmtf dictionary.
+    :param bool lazy_models: if ``True``, the models will be a generator which\
+    creates each model dictionary only as it is needed.
     :rtype: ``dict``"""
 
     data_dict = {
@@ -180,44 +245,101 @@ def mmtf_dict_to_data_dict(mmtf_dict):
       "vector": t["matrix"][3:-4:4]} for t in a.get("transformList", [])
      ]
     } for a in mmtf_dict.get("bioAssemblyList", [])]
-    update_models_list(mmtf_dict, data_dict)
+    update_models_list(
+     mmtf_dict, data_dict, keep=make_atom_filter(**filters), lazy=lazy_models
+    )
     return data_dict
 
 
-def update_models_list(mmtf_dict, data_dict):
+def update_models_list(mmtf_dict, data_dict, keep=None, lazy=False):
     """Takes a data dictionary and updates its models list with
     information from a .mmtf dictionary.
 
     :param dict mmtf_dict: the .mmtf dictionary to read.
-    :param dict data_dict: the data dictionary to update."""
+    :param dict data_dict: the data dictionary to update.
+    :param function keep: if given, the atom filter to apply.
+    :param bool lazy: if ``True``, the models will be a generator."""
+
+    models = mmtf_dict_to_model_dicts(mmtf_dict, keep=keep)
+    data_dict["models"] = models if lazy else list(models)
+
+
+def mmtf_dict_to_model_dicts(mmtf_dict, keep=None):
+    """A generator which yields the model dictionaries of a .mmtf dictionary
+    one at a time. Atom dictionaries are only created for the model currently
+    being built, and only for those atoms which pass the atom filter if one is
+    given.
+
+    :param dict mmtf_dict: the .mmtf dictionary to read.
+    :param function keep: if given, the atom filter to apply.
+    :rtype: ``dict``"""
 
-    atoms = get_atoms_list(mmtf_dict)
+    if "xCoordList" not in mmtf_dict: return
     group_definitions = get_group_definitions_list(mmtf_dict)
     groups = get_groups_list(mmtf_dict, group_definitions)
     chains = get_chains_list(mmtf_dict, groups)
+    atom_start, chain_start = 0, 0
     for model_num in range(mmtf_dict["numModels"]):
+        chain_end = chain_start + int(mmtf_dict["chainsPerModel"][model_num])
+        model_chains = chains[chain_start:chain_end]
+        atom_end = atom_start + sum(
+         len(group["atoms"]) for chain in model_chains
+          for group in chain["groups"]
+        )
+        mask = [keep(atom["name"], chain["id"], chain["type"])
+         for chain in model_chains for group in chain["groups"]
+          for atom in group["atoms"]] if keep else None
+        atoms = get_atoms_list(mmtf_dict, atom_start, atom_end, mask)
         model = {"polymer": {}, "non-polymer": {}, "water": {}, "branched": {}}
-        for chain_num in range(mmtf_dict["chainsPerModel"][model_num]):
-            chain = chains[chain_num]
-            add_chain_to_model(chain, model, atoms)
-        data_dict["models"].append(model)
+        offset = 0
+        for chain in model_chains:
+            offset = add_chain_to_model(chain, model, atoms, offset)
+        atom_start, chain_start = atom_end, chain_end
+        yield model
 
 
-def get_atoms_list(mmtf_dict):
+def get_atoms_list(mmtf_dict, start=0, end=None, mask=None):
     """Creates a list of atom dictionaries from a .mmtf dictionary by zipping
-    together some of its fields.
+    together some of its fields. A range of atoms can be given to only create
+    some of them, and a mask of booleans over that range can be given to leave
+    some out - those atoms will be ``None`` in the list.
+
+    Only the coordinates are required - reduced .mmtf files leave out the other
+    atom fields, and atoms are then given default values and numbered in order.
 
     :param dict mmtf_dict: the .mmtf dictionary to read.
+    :param int start: the index of the first atom to create.
+    :param int end: the index after the last atom to create.
+    :param list mask: if given, which atoms in the range to create.
     :rtype: ``list``"""
 
+    fields = [to_list(mmtf_dict[key][start:end])
+     for key in ("xCoordList", "yCoordList", "zCoordList")]
+    count = len(fields[0])
+    defaults = {
+     "altLocList": [""] * count, "bFactorList": [0] * count,
+     "atomIdList": range(start + 1, start + count + 1),
+     "occupancyList": [1.0] * count
+    }
+    for key, default in defaults.items():
+        fields.append(
+         to_list(mmtf_dict[key][start:end]) if key in mmtf_dict else default
+        )
+    if mask is None: mask = [True] * count
     return [{
      "x": x, "y": y, "z": z, "alt_loc": a or None, "bvalue": b, "occupancy": o,
      "id": i
-    } for x, y, z, a, b, i, o in zip(
-     mmtf_dict["xCoordList"], mmtf_dict["yCoordList"], mmtf_dict["zCoordList"],
-     mmtf_dict["altLocList"], mmtf_dict["bFactorList"], mmtf_dict["atomIdList"],
-     mmtf_dict["occupancyList"]
-    )]
+    } if m else None for x, y, z, a, b, i, o, m in zip(*fields, mask)]
+
+
+def to_list(values):
+    """Turns a decoded .mmtf field into a list of ordinary Python values, if it
+    is a NumPy array.
+
+    :param values: the field to convert.
+    :rtype: ``list``"""
+
+    return values.tolist() if isinstance(values, np.ndarray) else values
 
 
 def get_group_definitions_list(mmtf_dict):
@@ -255,9 +377,11 @@ def get_groups_list(mmtf_dict, group_definitions):
      "number": id, "insert": insert, "secondary_structure": sec_struct[ss],
      **group_definitions[type_]
     } for id, insert, ss, type_, in zip(
-     mmtf_dict["groupIdList"], mmtf_dict["insCodeList"],
-     mmtf_dict.get("secStructList", [-1] * len(mmtf_dict["groupIdList"])),
-     mmtf_dict["groupTypeList"]
+     to_list(mmtf_dict["groupIdList"]),
+     mmtf_dict.get("insCodeList", [""] * len(mmtf_dict["groupIdList"])),
+     to_list(mmtf_dict.get(
+      "secStructList", [-1] * len(mmtf_dict["groupIdList"])
+     )), to_list(mmtf_dict["groupTypeList"])
     )]
 
 
@@ -268,28 +392,36 @@ def get_chains_list(mmtf_dict, groups):
     :param dict mmtf_dict: the .mmtf dictionary to read.
     :rtype: ``list``"""
 
-    chains = []
+    entities = {index: entity for entity in mmtf_dict["entityList"]
+     for index in entity["chainIndexList"]}
+    chains, start = [], 0
     for i_id, id, group_num in zip(mmtf_dict["chainIdList"],
-     mmtf_dict["chainNameList"], mmtf_dict["groupsPerChain"]):
-        chain = {"id": id, "internal_id": i_id, "groups": groups[:group_num]}
-        del groups[:group_num]
-        for entity in mmtf_dict["entityList"]:
-            if len(chains) in entity["chainIndexList"]:
-                chain["type"] = entity["type"]
-                chain["sequence"] = entity.get("sequence", "")
-                chain["full_name"] = entity.get("description", None)
-                break
+     mmtf_dict.get("chainNameList", mmtf_dict["chainIdList"]),
+     to_list(mmtf_dict["groupsPerChain"])):
+        chain = {"id": id, "internal_id": i_id}
+        chain["groups"] = groups[start:start + group_num]
+        start += group_num
+        entity = entities.get(len(chains))
+        if entity:
+            chain["type"] = entity["type"]
+            chain["sequence"] = entity.get("sequence", "")
+            chain["full_name"] = entity.get("description", None)
         chains.append(chain)
     return chains
 
 
-def add_chain_to_model(chain, model, atoms):
+def add_chain_to_model(chain, model, atoms, offset=0):
     """Adds a 'chain' to a model - a chain in the .mmtf dict, which can also be
     a non-polymer.
 
+    The chain's atoms are read from the atoms list starting at the offset
+    given, and the offset of the atom after the chain's last atom is returned.
+
     :param dict chain: the 'chain' to add.
     :param dict model: the model to add it to.
-    :param list atoms: the atoms list to work through."""
+    :param list atoms: the atoms list to work through.
+    :param int offset: the position of the chain's first atom in the list.
+    :rtype: ``int``"""
 
     if chain["type"] == "polymer" or chain["type"] == "branched":
         polymer = {
@@ -297,12 +429,22 @@ def add_chain_to_model(chain, model, atoms):
          "helices": [], "strands": [], "residues": {}
         }
         for i, group in enumerate(chain["groups"], start=1):
-            add_het_to_dict(group, chain, atoms, polymer["residues"], number=i)
+            end = offset + len(group["atoms"])
+            add_het_to_dict(
+             group, chain, atoms[offset:end], polymer["residues"], number=i
+            )
+            offset = end
         add_ss_to_chain(polymer)
-        model["polymer"][chain["id"]] = polymer
+        if polymer["residues"] or not chain["groups"]:
+            model["polymer"][chain["id"]] = polymer
     else:
         for group in chain["groups"]:
-            add_het_to_dict(group, chain, atoms, model[chain["type"]])
+            end = offset + len(group["atoms"])
+            add_het_to_dict(
+             group, chain, atoms[offset:end], model[chain["type"]]
+            )
+            offset = end
+    return offset
          
 
 def add_het_to_dict(group, chain, atoms, d, number=None):
@@ -311,16 +453,15 @@ def add_het_to_dict(group, chain, atoms, d, number=None):
 
     :param dict group: the group template the het should be based on.
     :param dict chain: the chain (in the real sense) the het is associated with.
-    :param list atoms: the atoms list to work through.
+    :param list atoms: the het's atoms, in the same order as the group's.
     :param dict d: the dictionary to add to.
     :param int number: if given, the residue number to use."""
 
     het_id = f"{chain['id']}.{group['number']}{group['insert']}"
-    het_atoms = atoms[:len(group["atoms"])]
-    del atoms[:len(het_atoms)]
     het_atoms = {a["id"]: {
      "anisotropy": [0] * 6, **a, **g_a
-    } for a, g_a in zip(het_atoms, group["atoms"])}
+    } for a, g_a in zip(atoms, group["atoms"]) if a}
+    if group["atoms"] and not het_atoms: return
     for a in het_atoms.values(): del a["id"]
     het = {
      "name": group["name"], "atoms": het_atoms, "full_name": None,
@@ -384,7 +525,10 @@ def mmtf_to_data_transfer(mmtf_dict, data_dict, d_cat, d_key, m_key,
 def structure_to_mmtf_string(structure):
     """Converts a :py:class:`.AtomStructure` to a .mmtf filestring.
 
-    No compression is currently performed.
+    The atom and group fields are compressed with the standard .mmtf codecs -
+    coordinates and B-factors as integer-packed, delta and run-length encoded
+    integers, atom and group IDs as delta and run-length encoded integers, and
+    so on (see :py:func:`.encode_binary_field`).
 
     :param AtomStructure structure: the structure to convert.
     :rtype: ``bytes``"""
@@ -393,18 +537,101 @@ def structure_to_mmtf_string(structure):
     entity_list = get_entity_list(entities, chains, ligands, waters)
     chain_ids, chain_names = get_chain_ids_and_names(chains, ligands, waters)
     groups_per_chain = get_groups_per_chain(chains, ligands, waters)
-    group_types, group_ids, groups, ins = get_groups(chains, ligands, waters)
+    group_types, group_ids, groups, ins, ss = get_groups(
+     chains, ligands, waters
+    )
     x, y, z, alt, bfactor, ids, occupancy = zip(*properties)
     chain_count = len(chains) + len(ligands) + len(set(l.chain for l in waters))
     d = {
      "numModels": 1, "numChains": chain_count, "chainsPerModel": [chain_count],
-     "xCoordList": x, "yCoordList": y, "zCoordList": z, "altLocList": alt,
-     "bFactorList": bfactor, "atomIdList": ids, "occupancyList": occupancy,
-     "entityList": entity_list, "chainIdList": chain_ids, "insCodeList": ins,
-     "chainNameList": chain_names, "groupsPerChain": groups_per_chain,
-     "groupList": groups, "groupIdList": group_ids, "groupTypeList": group_types
+     "numAtoms": len(ids), "numGroups": len(group_ids),
+     "xCoordList": encode_binary_field(x, 10, 1000),
+     "yCoordList": encode_binary_field(y, 10, 1000),
+     "zCoordList": encode_binary_field(z, 10, 1000),
+     "altLocList": encode_binary_field(alt, 6),
+     "bFactorList": encode_binary_field(bfactor, 10, 100),
+     "atomIdList": encode_binary_field(ids, 8),
+     "occupancyList": encode_binary_field(occupancy, 9, 100),
+     "entityList": entity_list,
+     "chainIdList": encode_binary_field(chain_ids, 5, 4),
+     "chainNameList": encode_binary_field(chain_names, 5, 4),
+     "insCodeList": encode_binary_field(ins, 6),
+     "groupsPerChain": groups_per_chain, "groupList": groups,
+     "groupIdList": encode_binary_field(group_ids, 8),
+     "groupTypeList": encode_binary_field(group_types, 4),
+     "secStructList": encode_binary_field(ss, 2)
     }
-    return msgpack.packb(d)
+    return msgpack.packb(d, use_bin_type=True)
+
+
+def encode_binary_field(values, codec, params=0):
+    """Encodes a list of values as a .mmtf binary field, using one of the
+    codecs from its documentation. This is the reverse of
+    :py:func:`.parse_binary_field`.
+
+    :param list values: the values to encode.
+    :param int codec: the codec to use.
+    :param int params: the codec parameter (the divisor for codecs 9 and 10,\
+    and the string length for codec 5).
+    :rtype: ``bytes``"""
+
+    header = struct.pack(">iii", codec, len(values), params)
+    if codec == 2: data = np.asarray(values, dtype=">i1")
+    elif codec == 4: data = np.asarray(values, dtype=">i4")
+    elif codec == 5:
+        data = np.array([v.encode() for v in values], dtype="S" + str(params))
+    elif codec == 6:
+        data = run_length_encode([ord(v) if v else 0 for v in values])
+    elif codec == 8: data = run_length_encode(delta_encode(values))
+    elif codec == 9:
+        data = run_length_encode(np.round(np.asarray(values) * params))
+    elif codec == 10:
+        integers = np.round(np.asarray(values) * params)
+        data = recursive_encode(delta_encode(integers)).astype(">i2")
+    else: raise ValueError(".mmtf error: {} is invalid codec".format(codec))
+    return header + data.tobytes()
+
+
+def run_length_encode(integers):
+    """Compresses an array of integers into pairs of integers, where the second
+    of each pair is the number of times the first is repeated.
+
+    :param numpy.ndarray integers: the integers to encode.
+    :rtype: ``numpy.ndarray``"""
+
+    integers = np.asarray(integers, dtype=">i4")
+    if not len(integers): return integers
+    starts = np.flatnonzero(np.diff(integers, prepend=integers[0] - 1))
+    counts = np.diff(np.append(starts, len(integers)))
+    return np.column_stack([integers[starts], counts]).ravel().astype(">i4")
+
+
+def delta_encode(integers):
+    """Turns an array of integers into the differences between each integer
+    and the one before it.
+
+    :param numpy.ndarray integers: the integers to encode.
+    :rtype: ``numpy.ndarray``"""
+
+    return np.diff(np.asarray(integers, dtype="i8"), prepend=0).astype("i4")
+
+
+def recursive_encode(integers, bits=16):
+    """Splits an array of integers so that they fit into a smaller integer type
+    - any integer which doesn't fit is written as a run of the type's limit
+    followed by the remainder.
+
+    :param numpy.ndarray integers: the integers to encode.
+    :param int bits: the size of the integer type to pack the values into.
+    :rtype: ``numpy.ndarray``"""
+
+    integers = np.asarray(integers, dtype="i8")
+    power = 2 ** (bits - 1)
+    limits = np.where(integers >= 0, power - 1, -power)
+    lengths = integers // limits + 1
+    encoded = np.repeat(limits, lengths)
+    encoded[np.cumsum(lengths) - 1] = integers - limits * (lengths - 1)
+    return encoded
 
 
 def get_structures(structure):
@@ -415,15 +642,16 @@ def get_structures(structure):
     :param AtomStructure structure: the structure to unpack.
     :rtype: ``tuple``"""
 
-    chains, ligands, waters, atom_properties = set(), set(), set(), []
+    chains, ligands, waters = set(), set(), set()
     for atom in sorted(structure.atoms(), key=lambda a: a.id):
         get_structure_from_atom(atom, chains, ligands, waters)
-        atom_properties.append(list(atom.location) + [
-         "", atom.bvalue, atom.id, 1
-        ])
     chains = sorted(chains, key=lambda c: c._internal_id)
     ligands = sorted(ligands, key=lambda l: l._internal_id)
     waters = sorted(waters, key=lambda w: w._internal_id)
+    hets = [res for chain in chains for res in chain.residues()]
+    atom_properties = [list(atom.location) + ["", atom.bvalue, atom.id, 1]
+     for het in hets + ligands + waters
+      for atom in sorted(het.atoms(), key=lambda a: a.id)]
     entities = create_entities(chains, ligands, waters)
     return (chains, ligands, waters, atom_properties, entities)
 
@@ -508,13 +736,17 @@ def get_groups(chains, ligands, waters):
     :param list waters: the waters to pack.
     :rtype: ``tuple``"""
 
-    group_types, group_ids, groups, inserts = [], [], [], []
+    group_types, group_ids, groups, inserts, ss = [], [], [], [], []
     for chain in chains:
+        helices = set(res for helix in chain.helices for res in helix)
+        strands = set(res for strand in chain.strands for res in strand)
         for res in chain.residues():
             add_het_to_groups(res, group_types, group_ids, groups, inserts)
+            ss.append(2 if res in helices else 3 if res in strands else -1)
     for ligand in ligands + waters:
         add_het_to_groups(ligand, group_types, group_ids, groups, inserts)
-    return (group_types, group_ids, groups, inserts)
+        ss.append(-1)
+    return (group_types, group_ids, groups, inserts, ss)
 
 
 def add_het_to_groups(het, group_type_list, group_id_list, group_list, ins_list):
@@ -3,13 +3,21 @@
 from datetime import datetime
 import re
 from itertools import groupby, chain
+import numpy as np
 import valerius
 from math import ceil
-from .data import CODES
+from .data import CODES, make_atom_filter
 from .structures import Residue, Ligand
 from .mmcif import add_secondary_structure_to_polymers
 
-def pdb_string_to_pdb_dict(filestring):
+# The fixed-width text fields of ATOM and HETATM records
+TEXT_COLUMNS = {
+ "record": (0, 6), "name": (12, 16), "alt_loc": (16, 17),
+ "residue_name": (17, 20), "chain": (21, 22), "insertion_code": (26, 27),
+ "element": (76, 78)
+}
+
+def pdb_string_to_pdb_dict(filestring, metadata_only=False):
     """Takes a .pdb filestring and turns into a ``dict`` which represents its
     record structure. Only lines which aren't empty are used.
 
@@ -20,10 +28,17 @@ def pdb_string_to_pdb_dict(filestring):
     REMARK numbers as keys, and the structure records themselves which are just
     arranged into lists - one for each model.
 
+    If ``metadata_only`` is ``True``, the filestring is only read as far as the
+    first structure record, and there will be no models.
+
     :param str filestring: the .pdb filestring to process.
+    :param bool metadata_only: if ``True``, structure records are not read.
     :rtype: ``dict``"""
 
     pdb_dict = {}
+    if metadata_only:
+        match = re.search(r"^(ATOM  |HETATM|MODEL )", filestring, re.M)
+        if match: filestring = filestring[:match.start()]
     lines = list(filter(lambda l: bool(l.strip()), filestring.split("\n")))
     lines = [[line[:6].rstrip(), line.rstrip()] for line in lines]
     model_recs = ("ATOM", "HETATM", "ANISOU", "MODEL", "TER", "ENDMDL")
@@ -62,11 +77,23 @@ def update_dict(d, key, value):
     except: d[key] = [value]
 
 
-def pdb_dict_to_data_dict(pdb_dict):
+def pdb_dict_to_data_dict(pdb_dict, columnar=False, lazy_models=False,
+ **filters):
     """Converts an .pdb dictionary into an atomium data dictionary, with the
     same standard layout that the other file formats get converted into.
 
+    If ``columnar`` is ``True``, each model will be a ``dict`` of NumPy arrays
+    (one per atom column) rather than the usual nested model dictionary - see
+    :py:func:`.model_lines_to_columns`.
+
+    Any of the keyword arguments of :py:func:`.make_atom_filter` (``atoms``,
+    ``chains``, ``hetatm`` and ``waters``) can be given to discard atoms while
+    the models are being built.
+
     :param dict pdb_dict: the .pdb dictionary.
+    :param bool columnar: if ``True``, models will be column arrays.
+    :param bool lazy_models: if ``True``, the models will be a generator which\
+    creates each model dictionary only as it is needed.
     :rtype: ``dict``"""
 
     data_dict = {
@@ -83,7 +110,10 @@ def pdb_dict_to_data_dict(pdb_dict):
     update_experiment_dict(pdb_dict, data_dict)
     update_quality_dict(pdb_dict, data_dict)
     update_geometry_dict(pdb_dict, data_dict)
-    update_models_list(pdb_dict, data_dict)
+    update_models_list(
+     pdb_dict, data_dict, columnar=columnar, keep=make_atom_filter(**filters),
+     lazy=lazy_models
+    )
     return data_dict
 
 
@@ -134,31 +164,106 @@ def update_geometry_dict(pdb_dict, data_dict):
     extract_crystallography(pdb_dict, data_dict["geometry"])
 
 
-def update_models_list(pdb_dict, data_dict):
+def update_models_list(pdb_dict, data_dict, columnar=False, keep=None,
+ lazy=False):
     """Creates model dictionaries in a data dictionary.
 
     :param dict pdb_dict: The .pdb dictionary to read.
-    :param dict data_dict: The data dictionary to update."""
+    :param dict data_dict: The data dictionary to update.
+    :param bool columnar: if ``True``, models will be column arrays.
+    :param function keep: if given, the atom filter to apply.
+    :param bool lazy: if ``True``, the models will be a generator."""
+
+    models = pdb_dict_to_model_dicts(pdb_dict, columnar=columnar, keep=keep)
+    data_dict["models"] = models if lazy else list(models)
+
+
+def pdb_dict_to_model_dicts(pdb_dict, columnar=False, keep=None):
+    """A generator which yields the model dictionaries of a .pdb dictionary
+    one at a time, creating each only when it is needed.
+
+    :param dict pdb_dict: The .pdb dictionary to read.
+    :param bool columnar: if ``True``, models will be column arrays.
+    :param function keep: if given, the atom filter to apply.
+    :rtype: ``dict``"""
 
     sequences = make_sequences(pdb_dict)
     secondary_structure = make_secondary_structure(pdb_dict)
     full_names = get_full_names(pdb_dict)
-    for model_lines in pdb_dict["MODEL"]:
-        aniso = make_aniso(model_lines)
-        last_ter = get_last_ter_line(model_lines)
-        model = {"polymer": {}, "non-polymer": {}, "water": {}}
-        for index, line in enumerate(model_lines):
-            if line[:6] in ["ATOM  ", "HETATM"]:
-                chain_id = line[21] if index < last_ter else id_from_line(line)
-                res_id = id_from_line(line)
-                if index < last_ter:
-                    add_atom_to_polymer(line, model, chain_id, res_id, aniso, full_names)
-                else:
-                    add_atom_to_non_polymer(line, model, res_id, aniso, full_names)
-            for chain_id, chain in model["polymer"].items():
-                chain["sequence"] = sequences.get(chain_id, "")
-        add_secondary_structure_to_polymers(model, secondary_structure)
-        data_dict["models"].append(model)
+    for model_lines in pdb_dict.get("MODEL", []):
+        if keep: model_lines = filter_model_lines(model_lines, keep)
+        if columnar:
+            yield model_lines_to_columns(model_lines)
+        else:
+            yield model_lines_to_model_dict(
+             model_lines, sequences, secondary_structure, full_names
+            )
+
+
+def pdb_lines_to_model_dicts(lines):
+    """A generator which reads .pdb records one at a time and yields a model
+    dictionary as soon as all of a model's records have been read, so that only
+    one model's records are ever held at once.
+
+    The records needed to describe the models (SEQRES, HELIX etc.) come before
+    the first model in a .pdb file, so they will have been read by then.
+
+    :param lines: an iterable of .pdb records, such as an open file.
+    :rtype: ``dict``"""
+
+    pdb_dict, model_lines, lookups = {}, [], None
+    for line in lines:
+        if not line.strip(): continue
+        line = line.rstrip()
+        head = line[:6].rstrip()
+        if head in ("ATOM", "HETATM", "ANISOU", "TER"):
+            if lookups is None:
+                lookups = (make_sequences(pdb_dict),
+                 make_secondary_structure(pdb_dict), get_full_names(pdb_dict))
+            model_lines.append(line)
+        elif head == "ENDMDL":
+            if model_lines:
+                yield model_lines_to_model_dict(model_lines, *lookups)
+            model_lines = []
+        elif head not in ("MODEL", "REMARK"):
+            update_dict(pdb_dict, head, line)
+    if model_lines: yield model_lines_to_model_dict(model_lines, *lookups)
+
+
+def model_lines_to_model_dict(model_lines, sequences, secondary_structure,
+                              full_names):
+    """Creates a model dictionary from the records of a single model.
+
+    The numeric columns of the model's atom records are parsed in bulk first,
+    and the atom dictionaries are then made from those columns.
+
+    :param list model_lines: the model's records.
+    :param dict sequences: the mapping of chain IDs to sequences.
+    :param dict secondary_structure: the helices and strands to assign.
+    :param dict full_names: lookup dictionary for full name information.
+    :rtype: ``dict``"""
+
+    columns = model_lines_to_columns(model_lines)
+    atoms = columns_to_atom_dicts(columns, make_aniso(model_lines))
+    last_ter = get_last_ter_line(model_lines)
+    model = {"polymer": {}, "non-polymer": {}, "water": {}}
+    for index, line in enumerate(model_lines):
+        if line[:6] in ["ATOM  ", "HETATM"]:
+            atom_id, atom = next(atoms)
+            chain_id = line[21] if index < last_ter else id_from_line(line)
+            res_id = id_from_line(line)
+            if index < last_ter:
+                add_atom_to_polymer(
+                 line, atom_id, atom, model, chain_id, res_id, full_names
+                )
+            else:
+                add_atom_to_non_polymer(
+                 line, atom_id, atom, model, res_id, full_names
+                )
+    for chain_id, chain in model["polymer"].items():
+        chain["sequence"] = sequences.get(chain_id, "")
+    add_secondary_structure_to_polymers(model, secondary_structure)
+    return model
 
 
 def extract_header(pdb_dict, description_dict):
@@ -431,6 +536,24 @@ def make_aniso(model_lines):
     ] for line in model_lines if line[:6] == "ANISOU"}
 
 
+def filter_model_lines(model_lines, keep):
+    """Removes the ATOM and HETATM records of a model which an atom filter
+    rejects, before any of them are parsed. Other records are left in place,
+    so that the polymer/non-polymer split still falls at the last TER record.
+
+    :param list model_lines: the model's records.
+    :param function keep: the atom filter to apply.
+    :rtype: ``list``"""
+
+    last_ter = get_last_ter_line(model_lines)
+    return [line for index, line in enumerate(model_lines)
+     if line[:6] not in ("ATOM  ", "HETATM") or keep(
+      line[12:16].strip(), line[21],
+      "polymer" if index < last_ter else
+      "water" if line[17:20] in ["HOH", "DOD"] else "non-polymer"
+     )]
+
+
 def get_last_ter_line(model_lines):
     """Gets the index of the last TER record in a list of records. 0 will be
     returned if there are none.
@@ -455,88 +578,173 @@ def id_from_line(line):
     return "{}.{}{}".format(line[21], line[22:26].strip(), line[26].strip())
 
 
-def add_atom_to_polymer(line, model, chain_id, res_id, aniso_dict, full_names):
-    """Takes an .pdb ATOM or HETATM record, converts it, and adds it to a
-    polymer dictionary.
+def model_lines_to_columns(model_lines):
+    """Takes the records of a single model and parses all of its ATOM and
+    HETATM records at once, by viewing them as a fixed-width block of bytes and
+    slicing each field out of every record in one go.
+
+    The result is a ``dict`` of NumPy arrays, one per atom field, in record
+    order. Missing B-values are ``nan``, and missing occupancies are 1. As well
+    as the atoms' own fields, there are ``record`` (``"ATOM"`` or
+    ``"HETATM"``), ``residue_name``, ``residue_number``, ``insertion_code`` and
+    ``chain`` columns, and a boolean ``polymer`` column which is ``True`` for
+    atoms before the model's last TER record - which is everything needed to
+    put the atoms into chains, residues and ligands.
+
+    Records are mostly ASCII, and are read as such - the text fields of any
+    record with other characters in it are then read from the record itself,
+    so that they are never altered.
+
+    :param list model_lines: the model's records.
+    :rtype: ``dict``"""
+
+    lines = [line for line in model_lines if line[:6] in ("ATOM  ", "HETATM")]
+    block = np.frombuffer("".join(
+     line[:80].ljust(80) for line in lines
+    ).encode("ascii", "replace"), dtype="S1").reshape(len(lines), 80)
+    columns = {
+     "id": fixed_width_column(block, 6, 11).astype(int),
+     "x": fixed_width_column(block, 30, 38).astype(float),
+     "y": fixed_width_column(block, 38, 46).astype(float),
+     "z": fixed_width_column(block, 46, 54).astype(float),
+     "occupancy": float_column(fixed_width_column(block, 54, 60), 1),
+     "bvalue": float_column(fixed_width_column(block, 60, 66), np.nan),
+     "charge": charge_column(fixed_width_column(block, 78, 80)),
+     "residue_number": fixed_width_column(block, 22, 26).astype(int)
+    }
+    for name, (start, end) in TEXT_COLUMNS.items():
+        columns[name] = fixed_width_column(block, start, end).astype(
+         "U{}".format(end - start)
+        )
+    for row, line in enumerate(lines):
+        if not line.isascii():
+            for name, (start, end) in TEXT_COLUMNS.items():
+                columns[name][row] = line[start:end].strip()
+    last_ter = get_last_ter_line(model_lines)
+    columns["polymer"] = np.array([index < last_ter for index, line in
+     enumerate(model_lines) if line[:6] in ("ATOM  ", "HETATM")], dtype=bool)
+    return columns
+
+
+def fixed_width_column(block, start, end):
+    """Takes a 2D array of record bytes and returns one fixed-width field from
+    every record as a 1D array of stripped bytestrings.
+
+    :param numpy.ndarray block: the records, one byte per cell.
+    :param int start: the field's first column.
+    :param int end: the column after the field's last column.
+    :rtype: ``numpy.ndarray``"""
+
+    column = np.ascontiguousarray(block[:, start:end])
+    return np.char.strip(column.view(f"S{end - start}").ravel())
+
+
+def float_column(column, default):
+    """Converts a column of bytestrings to floats, using a default value
+    wherever the field was left blank.
+
+    :param numpy.ndarray column: the stripped bytestrings to convert.
+    :param float default: the value to use for blank fields.
+    :rtype: ``numpy.ndarray``"""
+
+    values = np.full(len(column), default, dtype=float)
+    filled = column != b""
+    values[filled] = column[filled].astype(float)
+    return values
+
+
+def charge_column(column):
+    """Converts a column of charge bytestrings to integers. Charges can be
+    written as either ``-1`` or ``1-``, and as there are only ever a handful of
+    distinct values, each is only parsed once.
+
+    :param numpy.ndarray column: the stripped bytestrings to convert.
+    :rtype: ``numpy.ndarray``"""
+
+    values, inverse = np.unique(column, return_inverse=True)
+    charges = []
+    for value in values.tolist():
+        try:
+            charges.append(int(value) if value else 0)
+        except: charges.append(int(value[::-1]))
+    return np.array(charges, dtype=int)[inverse.ravel()]
+
+
+def columns_to_atom_dicts(columns, aniso_dict):
+    """A generator which turns the column arrays of a model into atom
+    dictionaries, yielding ``(id, atom)`` pairs in record order.
+
+    :param dict columns: the model's column arrays.
+    :param dict aniso_dict: lookup dictionary for anisotropy information.
+    :rtype: ``tuple``"""
+
+    keys = ("id", "name", "alt_loc", "x", "y", "z",
+     "occupancy", "bvalue", "element", "charge")
+    for id, name, alt_loc, x, y, z, occupancy, bvalue, element, charge in zip(
+     *[columns[key].tolist() for key in keys]):
+        yield id, {
+         "occupancy": occupancy, "bvalue": None if bvalue != bvalue else bvalue,
+         "charge": charge, "anisotropy": aniso_dict.get(id, [0, 0, 0, 0, 0, 0]),
+         "name": name or None, "alt_loc": alt_loc or None,
+         "x": x, "y": y, "z": z, "element": element or None
+        }
+
+
+def add_atom_to_polymer(line, atom_id, atom, model, chain_id, res_id, full_names):
+    """Takes an .pdb ATOM or HETATM record and its already converted atom
+    dictionary, and adds it to a polymer dictionary.
 
     :param dict line: the line to read.
+    :param int atom_id: the atom's ID.
+    :param dict atom: the atom dictionary to add.
     :param dict model: the model to update.
     :param str chain_id: the chain ID to add to.
     :param str res_id: the molecule ID to add to.
-    :param dict aniso_dict: lookup dictionary for anisotropy information."""
+    :param dict full_names: lookup dictionary for full name information."""
 
     try:
-        model["polymer"][chain_id]["residues"][res_id]["atoms"][
-         int(line[6:11])
-        ] = atom_line_to_dict(line, aniso_dict)
+        model["polymer"][chain_id]["residues"][res_id]["atoms"][atom_id] = atom
     except:
         name = line[17:20].strip()
         try:
             model["polymer"][chain_id]["residues"][res_id] = {
              "name": name, "full_name": full_names.get(name),
-             "atoms": {int(line[6:11]): atom_line_to_dict(line, aniso_dict)},
+             "atoms": {atom_id: atom},
              "number": len(model["polymer"][chain_id]["residues"]) + 1
             }
         except:
             model["polymer"][chain_id] = {
              "internal_id": chain_id, "helices": [], "strands": [],
              "residues": {res_id: {
-              "name": line[17:20].strip(),
-              "atoms": {int(line[6:11]): atom_line_to_dict(line, aniso_dict)},
+              "name": name, "atoms": {atom_id: atom},
               "number": 1, "full_name": None,
              }}
             }
 
 
-def add_atom_to_non_polymer(line, model, res_id, aniso_dict, full_names):
-    """Takes an .pdb ATOM or HETATM record, converts it, and adds it to a
-    non-polymer dictionary.
+def add_atom_to_non_polymer(line, atom_id, atom, model, res_id, full_names):
+    """Takes an .pdb ATOM or HETATM record and its already converted atom
+    dictionary, and adds it to a non-polymer dictionary.
 
     :param dict line: the line to read.
+    :param int atom_id: the atom's ID.
+    :param dict atom: the atom dictionary to add.
     :param dict model: the model to update.
     :param str res_id: the molecule ID to add to.
-    :param dict aniso_dict: lookup dictionary for anisotropy information."""
+    :param dict full_names: lookup dictionary for full name information."""
 
     key = "water" if line[17:20] in ["HOH", "DOD"] else "non-polymer"
     try:
-        model[key][res_id]["atoms"][
-         int(line[6:11])
-        ] = atom_line_to_dict(line, aniso_dict)
+        model[key][res_id]["atoms"][atom_id] = atom
     except:
         name = line[17:20].strip()
         model[key][res_id] = {
          "name": name, "full_name": full_names.get(name),
          "internal_id": line[21], "polymer": line[21],
-         "atoms": {int(line[6:11]): atom_line_to_dict(line, aniso_dict)}
+         "atoms": {atom_id: atom}
         }
 
 
-def atom_line_to_dict(line, aniso_dict):
-    """Converts an ATOM or HETATM record to an atom dictionary.
-
-    :param str line: the record to convert.
-    :param dict aniso_dict: the anisotropy dictionary to use.
-    :rtype: ``dict``"""
-
-    a = {
-     "occupancy": 1, "bvalue": None, "charge": 0,
-     "anisotropy": aniso_dict.get(int(line[6:11].strip()), [0, 0, 0, 0, 0, 0])
-    }
-    a["name"] = line[12:16].strip() or None
-    a["alt_loc"] = line[16].strip() or None
-    a["x"] = float(line[30:38].strip())
-    a["y"] = float(line[38:46].strip())
-    a["z"] = float(line[46:54].strip())
-    if line[54:60].strip(): a["occupancy"] = float(line[54:60].strip())
-    if line[60:66].strip(): a["bvalue"] = float(line[60:66].strip())
-    a["element"] = line[76:78].strip() or None
-    if line[78:80].strip():
-        try:
-            a["charge"] = int(line[78:80].strip())
-        except: a["charge"] = int(line[78:80][::-1].strip())
-    return a
-
-
 def merge_lines(lines, start, join=" "):
     """Gets a single continuous string from a sequence of lines.
 
@@ -0,0 +1,151 @@
+"""Contains the spatial index used to find atoms near a point."""
+
+import numpy as np
+
+class CellList:
+    """A spatial index over a set of coordinates, which divides space into
+    cubic cells so that only the points in nearby cells need to be checked when
+    looking for points near some location.
+
+    Points are identified by their row in the coordinates array the index was
+    built from. The index is a snapshot - if the coordinates change it needs to
+    be built again.
+
+    :param coordinates: an N×3 array of coordinates.
+    :param float cell_size: the length of each cell's sides."""
+
+    def __init__(self, coordinates, cell_size=5):
+        self._coordinates = np.array(coordinates, dtype=float).reshape(-1, 3)
+        self._cell_size = cell_size
+        if len(self._coordinates):
+            self._origin = self._coordinates.min(axis=0)
+            cells = self.cells_of(self._coordinates)
+            self._shape = tuple((cells.max(axis=0) + 1).tolist())
+            keys = np.ravel_multi_index(cells.T, self._shape)
+        else:
+            self._origin, self._shape = np.zeros(3), (1, 1, 1)
+            keys = np.zeros(0, dtype=int)
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+
+
+    def __repr__(self):
+        return "<CellList ({} points, {} Å cells)>".format(
+         len(self._coordinates), self._cell_size
+        )
+
+
+    def __len__(self):
+        return len(self._coordinates)
+
+
+    @property
+    def cell_size(self):
+        """The length of each cell's sides.
+
+        :rtype: ``float``"""
+
+        return self._cell_size
+
+
+    def cells_of(self, coordinates):
+        """Works out which cell each of some coordinates falls in, as an N×3
+        array of integer cell positions.
+
+        :param coordinates: an N×3 array of coordinates.
+        :rtype: ``numpy.ndarray``"""
+
+        return np.floor(
+         (np.asarray(coordinates, dtype=float) - self._origin) / self._cell_size
+        ).astype(int)
+
+
+    def query(self, location, radius):
+        """Returns the rows of all the points within a given distance of a
+        location, in ascending order.
+
+        :param location: the (x, y, z) centre of the sphere to search.
+        :param float radius: the radius of the sphere.
+        :rtype: ``numpy.ndarray``"""
+
+        return self.query_many([location], radius)[1]
+
+
+    def query_many(self, locations, radius, chunk=4096):
+        """Finds all the points within a given distance of each of many
+        locations in one go. Two aligned arrays are returned - which location
+        each match is for, and the row of the point matched - sorted by
+        location and then by row.
+
+        The locations are searched in chunks, so that memory use doesn't grow
+        with the number of locations.
+
+        :param locations: an N×3 array of sphere centres.
+        :param float radius: the radius of the spheres.
+        :param int chunk: how many locations to search at once.
+        :rtype: ``tuple``"""
+
+        locations = np.asarray(locations, dtype=float).reshape(-1, 3)
+        found = [(np.zeros(0, dtype=int), np.zeros(0, dtype=int))]
+        if len(self):
+            for start in range(0, len(locations), chunk):
+                points, rows = self._search(
+                 locations[start:start + chunk], radius
+                )
+                found.append((points + start, rows))
+        points = np.concatenate([f[0] for f in found])
+        rows = np.concatenate([f[1] for f in found])
+        order = np.lexsort((rows, points))
+        return points[order], rows[order]
+
+
+    def _search(self, locations, radius):
+        """Finds all the points within a given distance of each of some
+        locations, in no particular order. Each location's sphere is covered
+        by columns of cells along the z axis, and the points in each column are
+        found with one binary search at each end.
+
+        :param locations: an N×3 array of sphere centres.
+        :param float radius: the radius of the spheres.
+        :rtype: ``tuple``"""
+
+        low = np.maximum(self.cells_of(locations - radius), 0)
+        high = np.minimum(
+         self.cells_of(locations + radius), np.array(self._shape) - 1
+        )
+        width = int(np.ceil(2 * radius / self._cell_size)) + 1
+        dx, dy = [d.ravel() for d in np.meshgrid(
+         np.arange(width), np.arange(width), indexing="ij"
+        )]
+        xs, ys = low[:, 0, None] + dx, low[:, 1, None] + dy
+        valid = (xs <= high[:, 0, None]) & (ys <= high[:, 1, None])
+        valid &= (low[:, 2] <= high[:, 2])[:, None]
+        points = np.nonzero(valid)[0]
+        xs, ys = xs[valid], ys[valid]
+        starts = np.searchsorted(self._keys, np.ravel_multi_index(
+         (xs, ys, low[points, 2]), self._shape
+        ), "left")
+        ends = np.searchsorted(self._keys, np.ravel_multi_index(
+         (xs, ys, high[points, 2]), self._shape
+        ), "right")
+        rows = self._order[ranges(starts, ends)]
+        points = np.repeat(points, ends - starts)
+        distances = np.sqrt(np.sum(
+         (self._coordinates[rows] - locations[points]) ** 2, axis=1
+        ))
+        within = distances <= radius
+        return points[within], rows[within]
+
+
+
+def ranges(starts, ends):
+    """Takes arrays of start and end positions and returns one array of all the
+    integers in each of those ranges, one after the other.
+
+    :param numpy.ndarray starts: the first integer of each range.
+    :param numpy.ndarray ends: the integer after the last of each range.
+    :rtype: ``numpy.ndarray``"""
+
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.arange(lengths.sum()) + offsets
@@ -1,11 +1,11 @@
 """Structure classes."""
 
 import numpy as np
-import rmsd
-import math
 import warnings
-from collections import Counter, OrderedDict, defaultdict
+from collections import Counter, OrderedDict
 from .base import StructureClass, query, StructureSet
+from .spatial import CellList
+from .superposition import kabsch, rmsd, apply_transformation, AtomPairing
 
 class AtomStructure:
     """A structure made of atoms. This contains various useful methods that rely
@@ -63,7 +63,7 @@ class AtomStructure:
 
         :rtype: ``float``"""
 
-        return round(sum([atom.mass for atom in self.atoms()]), 12)
+        return round(float(self.masses.sum()), 12)
 
 
     @property
@@ -72,7 +72,7 @@ class AtomStructure:
 
         :rtype: ``float``"""
 
-        return round(sum([atom.charge for atom in self.atoms()]), 12)
+        return round(float(self.charges.sum()), 12)
 
 
     @property
@@ -82,7 +82,25 @@ class AtomStructure:
 
         :rtype: ``Counter``"""
 
-        return Counter([atom.element for atom in self.atoms()])
+        formula = Counter(self.elements.tolist())
+        if "" in formula: formula[None] = formula.pop("")
+        return formula
+
+
+    @property
+    def coordinates(self):
+        """The coordinates of the structure's atoms, as an N×3 NumPy array with
+        one row per atom, in atom ID order.
+
+        Atoms which are part of a :py:class:`.Model` have their coordinates
+        stored in a single array belonging to that model. If this structure's
+        atoms make up one unbroken block of that array, the array returned is
+        a view of it and no copying is done. Either way the array is read-only
+        - use :py:meth:`.set_coordinates` to move the atoms.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return Atom.coordinates_of(self._sorted_atoms())
 
 
     @property
@@ -92,9 +110,10 @@ class AtomStructure:
 
         :rtype: ``tuple``"""
 
-        mass = self.mass
-        locations = np.array([a._location * a.mass for a in self.atoms()])
-        return np.sum(locations, axis=0) / mass
+        masses = self.masses
+        return np.sum(self.coordinates * masses[:, None], axis=0) / round(
+         masses.sum(), 12
+        )
 
 
     @property
@@ -105,13 +124,179 @@ class AtomStructure:
 
         :rtype: ``float``"""
 
-        center_of_mass = self.center_of_mass
-        atoms = self.atoms()
-        square_deviation = sum(
-         [atom.distance_to(center_of_mass) ** 2 for atom in atoms]
-        )
-        mean_square_deviation = square_deviation / len(atoms)
-        return np.sqrt(mean_square_deviation)
+        deviations = self.coordinates - self.center_of_mass
+        return np.sqrt(np.mean(np.sum(deviations ** 2, axis=1)))
+
+
+    @property
+    def elements(self):
+        """The elements of the structure's atoms, as a NumPy array in the same
+        order as :py:meth:`.coordinates`. Atoms with no element have an empty
+        string.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._atom_array("elements")
+
+
+    @property
+    def names(self):
+        """The names of the structure's atoms, as a NumPy array in the same
+        order as :py:meth:`.coordinates`. Atoms with no name have an empty
+        string.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._atom_array("names")
+
+
+    @property
+    def masses(self):
+        """The masses of the structure's atoms, as a NumPy array in the same
+        order as :py:meth:`.coordinates`.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._atom_array("masses")
+
+
+    @property
+    def charges(self):
+        """The charges of the structure's atoms, as a NumPy array in the same
+        order as :py:meth:`.coordinates`.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._atom_array("charges")
+
+
+    @property
+    def bvalues(self):
+        """The B-values of the structure's atoms, as a NumPy array in the same
+        order as :py:meth:`.coordinates`.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._atom_array("bvalues")
+
+
+    @property
+    def residue_indices(self):
+        """An integer for each of the structure's atoms (in the same order as
+        :py:meth:`.coordinates`) saying which residue it is in. Atoms in the
+        same residue have the same number, and residues are numbered from 0 in
+        the order they first appear in the model. Atoms which aren't in a
+        residue get -1.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._atom_array("residue_indices")
+
+
+    @property
+    def chain_indices(self):
+        """An integer for each of the structure's atoms (in the same order as
+        :py:meth:`.coordinates`) saying which chain it belongs to. Atoms in the
+        same chain have the same number, and chains are numbered from 0 in the
+        order they first appear in the model. Atoms which aren't in or
+        associated with a chain get -1.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._atom_array("chain_indices")
+
+
+    def _atom_array(self, name):
+        """Returns one of the per-atom property arrays of the structure. If all
+        the structure's atoms are in the same model, the array is taken from
+        that model's arrays, which are only built once.
+
+        :param str name: the property array to get.
+        :rtype: ``numpy.ndarray``"""
+
+        atoms = self._sorted_atoms()
+        model = atoms[0]._model if atoms else None
+        if model is not None and all(atom._model is model for atom in atoms):
+            return model._atom_array(name)[[atom._index for atom in atoms]]
+        return Atom.array_of(name, atoms)
+
+
+    def get_coordinates(self, order=None):
+        """Returns a copy of the coordinates of the structure's atoms, as an
+        N×3 NumPy array. By default the rows are in atom ID order (the same as
+        :py:meth:`.coordinates`), but a sequence of the structure's atoms can
+        be given to use that order instead.
+
+        The array can be modified freely and written back with
+        :py:meth:`.set_coordinates`.
+
+        :param order: if given, the atoms to get coordinates for, in order.
+        :rtype: ``numpy.ndarray``"""
+
+        return np.array(Atom.coordinates_of(self._ordered_atoms(order)))
+
+
+    def set_coordinates(self, coordinates, order=None):
+        """Moves all of the structure's atoms at once, to the rows of an N×3
+        array of coordinates. By default the rows are taken to be in atom ID
+        order (the same as :py:meth:`.coordinates`), but a sequence of the
+        structure's atoms can be given to say which atom each row is for.
+
+        :param coordinates: the new coordinates, one row per atom.
+        :param order: if given, the atoms the rows belong to, in order.
+        :raises ValueError: if there isn't one row of three values per atom."""
+
+        atoms = self._ordered_atoms(order)
+        coordinates = np.asarray(coordinates, dtype=float)
+        if coordinates.shape != (len(atoms), 3):
+            raise ValueError("Expected coordinates of shape {}, not {}".format(
+             (len(atoms), 3), coordinates.shape
+            ))
+        Atom.place_atoms(coordinates, *atoms)
+
+
+    def _ordered_atoms(self, order=None):
+        """Returns the structure's atoms as a list, either in atom ID order or
+        in the order of a sequence of atoms given.
+
+        :param order: if given, the structure's atoms in the order to use.
+        :raises ValueError: if the atoms given aren't the structure's atoms.
+        :rtype: ``list``"""
+
+        if order is None: return self._sorted_atoms()
+        order, atoms = list(order), set(self._sorted_atoms())
+        if len(order) != len(atoms) or len(set(order)) != len(order) or\
+         any(atom not in atoms for atom in order):
+            raise ValueError("The order must contain each of {}'s atoms once"
+             .format(self))
+        return order
+
+
+    def _sorted_atoms(self):
+        """Returns the structure's atoms as a list, in the same order as the
+        rows of :py:meth:`.coordinates` - that is, in atom ID order, with atoms
+        that share an ID kept in the order of their model's array.
+
+        :rtype: ``list``"""
+
+        return sorted(self._own_atoms(), key=lambda a: (
+         a._id, -1 if a._index is None else a._index
+        ))
+
+
+    def _own_atoms(self):
+        """Returns the structure's atoms as a list, in no particular order,
+        without going through the query machinery of :py:meth:`.atoms`.
+
+        :rtype: ``list``"""
+
+        try:
+            return self._atoms.structures
+        except:
+            atoms = []
+            for res in self._residues.structures:
+                atoms += res._atoms.structures
+            return atoms
 
 
     def pairing_with(self, structure):
@@ -129,44 +314,130 @@ class AtomStructure:
         atoms.
         :rtype: ``dict``"""
 
-        atoms = self.atoms()
-        other_atoms = structure.atoms()
+        atoms, other_atoms = self._sorted_atoms(), structure._sorted_atoms()
+        pairing = self._pair_rows(atoms, other_atoms, structure)
+        return {atoms[row]: other_atoms[other_row] for row, other_row in zip(
+         pairing.indices.tolist(), pairing.other_indices.tolist()
+        )}
+
+
+    def index_pairing_with(self, structure):
+        """Pairs the atoms of this structure with those of another in the same
+        way as :py:meth:`.pairing_with`, but returns the pairing as an
+        :py:class:`.AtomPairing` of rows in the two structures'
+        :py:meth:`.coordinates` arrays.
+
+        This can be passed to :py:meth:`.rmsd_with` and
+        :py:meth:`.superpose_onto` so that structures which are compared again
+        and again (or other structures with the same topologies) don't need to
+        be paired every time.
+
+        :param AtomStructure structure: the structure to pair with.
+        :raises ValueError: if the other structure has a different number of\
+        atoms.
+        :rtype: ``AtomPairing``"""
+
+        return self._pair_rows(
+         self._sorted_atoms(), structure._sorted_atoms(), structure
+        )
+
+
+    def _pair_rows(self, atoms, other_atoms, structure):
+        """Pairs two lists of atoms, in linear time after sorting - atoms with
+        an ID found in both lists are paired first, and the rest are paired in
+        order of ID, element, name and memory address. The pairing is returned
+        as positions in the two lists, in order of the first.
+
+        :param list atoms: this structure's atoms.
+        :param list other_atoms: the other structure's atoms.
+        :param AtomStructure structure: the other structure.
+        :raises ValueError: if the lists are different lengths.
+        :rtype: ``AtomPairing``"""
+
         if len(atoms) != len(other_atoms):
             raise ValueError("{} and {} have different numbers of atoms".format(
              self, structure
             ))
-        pair = {}
-        common_ids = set(a._id for a in atoms) & set(a._id for a in other_atoms)
-        id_atoms = {a._id: a for a in atoms}
-        id_other_atoms = {a._id: a for a in other_atoms}
-        for id_ in common_ids:
-            pair[id_atoms[id_]] = id_other_atoms[id_]
-            atoms.remove(id_atoms[id_])
-            other_atoms.remove(id_other_atoms[id_])
-        atoms, other_atoms = list(atoms), list(other_atoms)
-        for l in atoms, other_atoms:
-            l.sort(key=lambda a: (
-             a._id, a._element, a._name, id(a)
-            ))
-        return {**pair, **{a1: a2 for a1, a2 in zip(atoms, other_atoms)}}
-
-
-    def rmsd_with(self, structure):
+        id_rows = {a._id: row for row, a in enumerate(atoms)}
+        other_id_rows = {a._id: row for row, a in enumerate(other_atoms)}
+        pairs = {
+         row: other_id_rows[id_] for id_, row in id_rows.items()
+         if id_ in other_id_rows
+        }
+        unpaired = [sorted(
+         [row for row in range(len(l)) if row not in paired],
+         key=lambda row: (l[row]._id, l[row]._element, l[row]._name, id(l[row]))
+        ) for l, paired in ((atoms, pairs), (other_atoms, set(pairs.values())))]
+        pairs.update(zip(*unpaired))
+        rows = sorted(pairs)
+        return AtomPairing(rows, [pairs[row] for row in rows])
+
+
+    def rmsd_with(self, structure, superpose=True, pairing=None):
         """Calculates the Root Mean Square Deviation between this structure and
-        another.
+        another. By default this is after the best superposition of the two
+        (see :py:meth:`.superpose_onto`), but it can be measured as they
+        currently are instead - neither structure is moved either way.
 
         :param AtomStructure structure: the structure to check against.
+        :param bool superpose: if ``False``, the structures won't be\
+        superposed first.
+        :param AtomPairing pairing: if given, the atoms won't be paired again\
+        (see :py:meth:`.index_pairing_with`).
         :raises ValueError: if the other structure has a different number of\
         atoms.
         :rtype: ``float``"""
 
-        pairing = self.pairing_with(structure)
-        coords1, coords2 = [[a.location for a in atoms]
-         for atoms in zip(*pairing.items())]
-        c1, c2 = self.center_of_mass, structure.center_of_mass
-        coords1 = [[x - c1[0], y - c1[1], z - c1[2]] for x, y, z in coords1]
-        coords2 = [[x - c2[0], y - c2[1], z - c2[2]] for x, y, z in coords2]
-        return round(rmsd.kabsch_rmsd(coords1, coords2), 12)
+        coordinates, target = self._paired_coordinates(structure, pairing)
+        return round(float(rmsd(coordinates, target, superpose)), 12)
+
+
+    def superpose_onto(self, structure, move=True, trim=12, pairing=None):
+        """Finds the rotation and translation which best superpose this
+        structure onto another with the same number of atoms, using the Kabsch
+        algorithm on the paired atoms' coordinates, and moves the structure
+        there.
+
+        The rotation matrix and translation vector are returned - the new
+        location of each atom is the rotation matrix multiplied by its old
+        location, plus the translation vector.
+
+        :param AtomStructure structure: the structure to superpose onto.
+        :param bool move: if ``False``, the structure won't actually be moved.
+        :param int trim: The amount of rounding to do to the atoms' coordinates\
+        after moving - the default is 12 decimal places but this can be\
+        set to ``None`` if no rounding is to be done.
+        :param AtomPairing pairing: if given, the atoms won't be paired again\
+        (see :py:meth:`.index_pairing_with`).
+        :raises ValueError: if the other structure has a different number of\
+        atoms.
+        :rtype: ``tuple``"""
+
+        rotation, translation = kabsch(
+         *self._paired_coordinates(structure, pairing)
+        )
+        if move:
+            atoms = self._sorted_atoms()
+            Atom.place_atoms(apply_transformation(
+             Atom.coordinates_of(atoms), rotation, translation
+            ), *atoms)
+            self.trim(trim)
+        return rotation, translation
+
+
+    def _paired_coordinates(self, structure, pairing=None):
+        """Pairs this structure's atoms with another's (unless a pairing is
+        given), and returns the coordinates of both sets of atoms as N×3 arrays
+        with paired atoms in the same rows.
+
+        :param AtomStructure structure: the structure to pair with.
+        :param AtomPairing pairing: the pairing to use, if already known.
+        :raises ValueError: if the other structure has a different number of\
+        atoms.
+        :rtype: ``tuple``"""
+
+        if pairing is None: pairing = self.index_pairing_with(structure)
+        return pairing.coordinates(self, structure)
 
 
     def create_grid(self, size=1, margin=0):
@@ -179,11 +450,11 @@ class AtomStructure:
         coordinates. The default is 0.
         :rtype: ``tuple``"""
 
-        atom_locations = [atom.location for atom in self.atoms()]
+        coordinates = self.coordinates
+        mins = coordinates.min(axis=0) - margin
+        maxes = coordinates.max(axis=0) + margin
         dimension_values = []
-        for dimension in range(3):
-            coordinates = [loc[dimension] for loc in atom_locations]
-            min_, max_ = min(coordinates) - margin, max(coordinates) + margin
+        for min_, max_ in zip(mins.tolist(), maxes.tolist()):
             values = [0]
             while values[0] > min_: values.insert(0, values[0] - size)
             while values[-1] < max_: values.append(values[-1] + size)
@@ -225,6 +496,9 @@ class AtomStructure:
         elif ext == "mmtf":
             from .mmtf import structure_to_mmtf_string
             string = structure_to_mmtf_string(self)
+        elif ext == "bcif":
+            from .bcif import structure_to_bcif_string
+            string = structure_to_bcif_string(self)
         elif ext == "pdb":
             from .pdb import structure_to_pdb_string
             string = structure_to_pdb_string(self)
@@ -234,32 +508,26 @@ class AtomStructure:
 
 
     def atoms_in_sphere(self, location, radius, *args, **kwargs):
-        """Returns all the atoms in a given sphere within this structure. This
-        will be a lot faster if the structure is a :py:class:`.Model` and if
-        :py:meth:`.optimise_distances` has been called, as it won't have to
-        search all atoms.
+        """Returns all the atoms in a given sphere within this structure. If
+        the structure is a :py:class:`.Model`, its spatial index is used (and
+        built if needed) so that only atoms near the sphere are checked.
 
         :param tuple location: the centre of the sphere.
         :param float radius: the radius of the sphere.
         :rtype: ``set``"""
 
-        if "_internal_grid" in self.__dict__ and self._internal_grid:
-            r, atoms = math.ceil(radius / 10), set()
-            x, y, z = [int(math.floor(n / 10)) * 10 for n in location]
-            x_range, y_range, z_range = [
-             [(val - (n * 10)) for n in range(1, r + 1)][::-1] + [val] + [
-              (val + n * 10) for n in range(1, r + 1)
-             ] for val in (x, y, z)
-            ]
-            for x in x_range:
-                for y in y_range:
-                    for z in z_range:
-                        atoms = atoms.union(self._internal_grid[x][y][z])
-            atoms = StructureSet(*atoms)
-            atoms = query(lambda self: atoms)(self, *args, **kwargs)
+        if isinstance(self, Model):
+            atoms = [self._atom_list[index] for index in
+             self._spatial_index().query(location, radius).tolist()]
         else:
-            atoms = self.atoms(*args, **kwargs)
-        return {a for a in atoms if a.distance_to(location) <= radius}
+            atoms = self._sorted_atoms()
+            distances = np.sqrt(np.sum((Atom.coordinates_of(atoms)
+             - np.array(location, dtype=float)) ** 2, axis=1))
+            atoms = [a for a, d in zip(atoms, distances <= radius) if d]
+        if args or kwargs:
+            atoms = StructureSet(*atoms)
+            return set(query(lambda self: atoms)(self, *args, **kwargs))
+        return set(atoms)
 
 
     def pairwise_atoms(self, *args, **kwargs):
@@ -275,55 +543,112 @@ class AtomStructure:
                 yield {atoms[a_index], atoms[o_index]}
 
 
-    def nearby_atoms(self, *args, **kwargs):
+    def nearby_atoms(self, cutoff, *args, **kwargs):
         """Returns all atoms within a given distance of this structure,
         excluding the structure's own atoms.
 
-        This will be a lot faster if the model's
-        :py:meth:`.optimise_distances` has been called, as it won't have to
-        search all atoms.
+        All of the structure's atoms are searched around at once, using the
+        model's spatial index. If the atoms aren't all in the same model, each
+        atom is searched around separately instead.
 
         :param float cutoff: the distance cutoff to use.
         :rtype: ``set``"""
 
-        atoms = set()
-        for atom in self.atoms():
-            atoms.update(atom.nearby_atoms(*args, **kwargs))
-        return atoms - self.atoms()
+        model, rows, own = self._nearby_rows(cutoff, *args, **kwargs)
+        if model is None:
+            atoms = set()
+            for atom in self.atoms():
+                atoms.update(atom.nearby_atoms(cutoff, *args, **kwargs))
+            return atoms - self.atoms()
+        return {model._atom_list[row] for row in rows.tolist()}
     
 
-    def nearby_hets(self, *args, **kwargs):
+    def nearby_hets(self, cutoff, *args, residues=True, ligands=True, **kwargs):
         """Returns all other het structures within a given distance of this
         structure, excluding itself.
 
-        This will be a lot faster if the model's
-        :py:meth:`.optimise_distances` has been called, as it won't have to
-        search all atoms.
+        All of the structure's atoms are searched around at once, using the
+        model's spatial index, and the atoms found are mapped to their hets in
+        one step. If the atoms aren't all in the same model, each atom is
+        searched around separately instead.
 
         :param float cutoff: the distance cutoff to use.
+        :param bool residues: if ``False``, residues will not be returned.
+        :param bool ligands: if ``False``, ligands will not be returned.
         :rtype: ``set``"""
 
-        structures = set()
-        hets = set()
-        for atom in self.atoms():
-            structures.update(atom.nearby_hets(*args, **kwargs))
-            hets.add(atom.het)
-        return structures - hets
+        structures = self._nearby_owners(
+         "hets", cutoff, *args, **kwargs
+        )
+        if not residues:
+            structures = {s for s in structures if not isinstance(s, Residue)}
+        if not ligands:
+            structures = {s for s in structures if not isinstance(s, Ligand)}
+        return structures
     
 
-    def nearby_chains(self, *args, **kwargs):
+    def nearby_chains(self, cutoff, *args, **kwargs):
         """Returns all other chain structures within a given distance of this
         structure, excluding itself.
 
+        All of the structure's atoms are searched around at once, using the
+        model's spatial index, and the atoms found are mapped to their chains
+        in one step. If the atoms aren't all in the same model, each atom is
+        searched around separately instead.
+
         :param float cutoff: the distance cutoff to use.
         :rtype: ``set``"""
 
-        structures = set()
-        chains = set()
-        for atom in self.atoms():
-            structures.update(atom.nearby_chains(*args, **kwargs))
-            chains.add(atom.chain)
-        return structures - chains
+        return self._nearby_owners("chains", cutoff, *args, **kwargs)
+
+
+    def _nearby_rows(self, cutoff, *args, **kwargs):
+        """Finds the atoms within a given distance of any of the structure's
+        atoms, other than its own, with one search of the model's spatial
+        index. The model is returned along with the rows of the atoms found
+        and the rows of the structure's own atoms - if the structure's atoms
+        aren't all in one model, ``None`` and two empty arrays are returned.
+
+        :param float cutoff: the distance cutoff to use.
+        :rtype: ``tuple``"""
+
+        atoms = self._sorted_atoms()
+        model = atoms[0]._model if atoms else None
+        if model is None or any(atom._model is not model for atom in atoms):
+            return None, np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        own = np.array([atom._index for atom in atoms], dtype=int)
+        rows = np.setdiff1d(model._spatial_index().query_many(
+         model._coordinates[own], cutoff
+        )[1], own)
+        if args or kwargs:
+            found = StructureSet(*[model._atom_list[r] for r in rows.tolist()])
+            rows = np.array(sorted(atom._index for atom in query(
+             lambda self: found
+            )(self, *args, **kwargs)), dtype=int)
+        return model, rows, own
+
+
+    def _nearby_owners(self, kind, cutoff, *args, **kwargs):
+        """Returns the structures of some kind (``"hets"`` or ``"chains"``)
+        which have atoms within a given distance of this structure, other than
+        the ones this structure's own atoms belong to.
+
+        :param str kind: the kind of structure to look for.
+        :param float cutoff: the distance cutoff to use.
+        :rtype: ``set``"""
+
+        model, rows, own = self._nearby_rows(cutoff, *args, **kwargs)
+        if model is None:
+            structures, owners = set(), set()
+            for atom in self.atoms():
+                structures.update(
+                 getattr(atom, "nearby_" + kind)(cutoff, *args, **kwargs)
+                )
+                owners.add(atom.het if kind == "hets" else atom.chain)
+            return structures - owners
+        numbers, structures = model._atom_owners(kind)
+        found = np.setdiff1d(numbers[rows], np.append(numbers[own], -1))
+        return {structures[number] for number in found.tolist()}
 
 
     def translate(self, dx=0, dy=0, dz=0, trim=12):
@@ -342,7 +667,7 @@ class AtomStructure:
             _,_,_ = dx
             vector = dx
         except TypeError: vector = (dx, dy, dz)
-        Atom.translate_atoms(vector, *self.atoms())
+        Atom.translate_atoms(vector, *self._sorted_atoms())
         self.trim(trim)
 
 
@@ -357,7 +682,7 @@ class AtomStructure:
         after transforming - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        Atom.transform_atoms(matrix, *self.atoms())
+        Atom.transform_atoms(matrix, *self._sorted_atoms())
         self.trim(trim)
 
 
@@ -371,7 +696,7 @@ class AtomStructure:
         after translating - the default is 12 decimal places but this can be\
         set to ``None`` if no rounding is to be done."""
 
-        Atom.rotate_atoms(angle, axis, *self.atoms())
+        Atom.rotate_atoms(angle, axis, *self._sorted_atoms())
         self.trim(trim)
 
 
@@ -382,8 +707,11 @@ class AtomStructure:
         :param int places: The number of places to round the coordinates to. If\
         ``None``, no rounding will be done."""
 
-        for atom in self.atoms():
-            atom.trim(places)
+        if places is not None:
+            atoms = self._sorted_atoms()
+            Atom.place_atoms(
+             np.round(Atom.coordinates_of(atoms), places), *atoms
+            )
 
 
 
@@ -479,6 +807,10 @@ class Model(AtomStructure, metaclass=StructureClass):
 
     It is a cotainer of its molecules, residues, and atoms.
 
+    A model keeps its atoms' coordinates in one array, so an atom can only be
+    part of one model. Any molecules given which have atoms already in some
+    other model are copied, and the copies are used instead.
+
     :param \*molecules: The chains, ligands, and waters that will inhabit the\
     model."""
 
@@ -487,7 +819,12 @@ class Model(AtomStructure, metaclass=StructureClass):
         self._chains = set()
         self._ligands = set()
         self._waters = set()
-        for mol in molecules:
+        copies = {mol: mol.copy() for mol in molecules
+         if any(atom._model is not None for atom in mol._own_atoms())}
+        for original in molecules:
+            mol = copies.get(original, original)
+            if isinstance(mol, Ligand):
+                mol._chain = copies.get(original._chain, original._chain)
             mol._model = self
             d = (self._chains if isinstance(mol, Chain) else self._waters
              if mol._water else self._ligands)
@@ -497,6 +834,7 @@ class Model(AtomStructure, metaclass=StructureClass):
         self._waters = StructureSet(*self._waters)
         self._file = file
         self._internal_grid = None
+        self._store_coordinates()
 
 
     def __repr__(self):
@@ -519,6 +857,22 @@ class Model(AtomStructure, metaclass=StructureClass):
         return self._file
 
 
+    @property
+    def coordinates(self):
+        """The coordinates of all the model's atoms, as an N×3 NumPy array with
+        one row per atom, in atom ID order.
+
+        This is a read-only view of the array the atoms' locations are actually
+        stored in, so no copying is done - use :py:meth:`.set_coordinates` to
+        move the atoms.
+
+        :rtype: ``numpy.ndarray``"""
+
+        coordinates = self._coordinates.view()
+        coordinates.flags.writeable = False
+        return coordinates
+
+
     def chains(self):
         """Returns the model's chains.
 
@@ -581,23 +935,177 @@ class Model(AtomStructure, metaclass=StructureClass):
         """Removes all water ligands from the model."""
 
         self._waters = StructureSet()
+        self._store_coordinates()
+
+
+    def _sorted_atoms(self):
+        """Returns the model's atoms as a list, in the same order as the rows
+        of its coordinates array.
+
+        :rtype: ``list``"""
+
+        return list(self._atom_list)
+
+
+    def _store_coordinates(self, coordinates=None):
+        """Gathers the coordinates of all the model's atoms into one array,
+        and makes each atom's location a view of its row in that array.
+
+        If an N×3 array is given, it is used as the model's coordinates array
+        instead, in place of the atoms' current locations - this is how models
+        can keep their coordinates in some larger array.
+
+        :param numpy.ndarray coordinates: the array to use, if any.
+        :raises ValueError: if the array given is the wrong shape."""
+
+        atoms = []
+        for mol in (self._chains + self._ligands + self._waters).structures:
+            try:
+                atoms += mol._atoms.structures
+            except:
+                for res in mol._residues.structures:
+                    atoms += res._atoms.structures
+        for atom in getattr(self, "_atom_list", []):
+            atom._index, atom._model = None, None
+        self._atom_list = sorted(atoms, key=lambda a: a._id)
+        if coordinates is None:
+            coordinates = np.array(
+             [atom._location for atom in self._atom_list], dtype=float
+            ).reshape(len(self._atom_list), 3)
+        elif coordinates.shape != (len(self._atom_list), 3):
+            raise ValueError("{} needs an array of {} coordinates".format(
+             self, len(self._atom_list)
+            ))
+        self._coordinates = coordinates
+        for index, atom in enumerate(self._atom_list):
+            atom._location, atom._index = self._coordinates[index], index
+            atom._model = self
+        self._atom_arrays, self._internal_grid = {}, None
+
+
+    def _atom_array(self, name):
+        """Returns one of the model's per-atom property arrays, building it the
+        first time it is needed. The arrays are thrown away if any of the
+        atoms' properties are changed.
+
+        :param str name: the property array to get.
+        :rtype: ``numpy.ndarray``"""
+
+        if name not in self._atom_arrays:
+            self._atom_arrays[name] = Atom.array_of(name, self._atom_list)
+        return self._atom_arrays[name]
     
 
-    def optimise_distances(self):
-        """Calling this method makes finding atoms within a sphere faster, and
-        consequently makes all 'nearby' methods faster. It organises the atoms
-        in the model into grids, so that only relevant atoms are checked for
-        distances."""
+    def _atom_owners(self, kind):
+        """Returns the number of the structure of some kind each of the model's
+        atoms belongs to, and the list of those structures (see
+        :py:meth:`.Atom.owners_of`), working them out the first time they are
+        needed.
+
+        :param str kind: ``"residues"``, ``"hets"`` or ``"chains"``.
+        :rtype: ``tuple``"""
+
+        if kind + "_owners" not in self._atom_arrays:
+            self._atom_arrays[kind + "_owners"] = Atom.owners_of(
+             kind, self._atom_list
+            )
+        return self._atom_arrays[kind + "_owners"]
+
+
+    def optimise_distances(self, cell_size=5):
+        """Builds the model's spatial index - a :py:class:`.CellList` over its
+        coordinates array - which makes finding atoms within a sphere faster,
+        and consequently makes all 'nearby' methods faster.
+
+        This happens automatically the first time it is needed, and the index
+        is thrown away whenever atoms are moved, so you only need to call this
+        to choose a different cell size.
+
+        :param float cell_size: the length of each cell's sides."""
+
+        self._internal_grid = CellList(self._coordinates, cell_size)
 
-        self._internal_grid = defaultdict(
-         lambda: defaultdict(lambda: defaultdict(set))
-        )
-        for atom in self.atoms():
-            x, y, z = [int(math.floor(n / 10)) * 10 for n in atom.location]
-            self._internal_grid[x][y][z].add(atom)
 
+    def _spatial_index(self):
+        """Returns the model's spatial index, building it if there isn't one.
+
+        :rtype: ``CellList``"""
+
+        if self._internal_grid is None: self.optimise_distances()
+        return self._internal_grid
+
+
+    def contacts(self, cutoff, selection_a=None, selection_b=None, atoms=False):
+        """Finds every pair of atoms within a given distance of each other,
+        with one atom from each of two selections, in one neighbour search.
+
+        Each selection can be a structure in the model (such as a chain or
+        ligand) or a collection of the model's atoms - if not given, all the
+        model's atoms are used. Pairs are returned as two aligned arrays of
+        rows in the model's :py:meth:`.coordinates` array, the first from
+        ``selection_a`` and the second from ``selection_b``. An atom is never
+        paired with itself, and if the selections overlap, pairs of atoms that
+        are in both are only returned once.
+
+        :param float cutoff: the distance cutoff to use.
+        :param selection_a: the atoms to find contacts from.
+        :param selection_b: the atoms to find contacts with.
+        :param bool atoms: if ``True``, a list of atom pairs is returned\
+        instead of two arrays.
+        :raises ValueError: if a selection has atoms from another model.
+        :rtype: ``tuple``"""
+
+        rows_a = self._selection_rows(selection_a)
+        rows_b = self._selection_rows(selection_b)
+        index = CellList(self._coordinates[rows_b], cutoff)
+        points, rows = index.query_many(self._coordinates[rows_a], cutoff)
+        a, b = rows_a[points], rows_b[rows]
+        in_a, in_b = [np.zeros(len(self._atom_list), dtype=bool)
+         for _ in range(2)]
+        in_a[rows_a], in_b[rows_b] = True, True
+        keep = (a != b) & ~(in_b[a] & in_a[b] & (a > b))
+        a, b = a[keep], b[keep]
+        if atoms:
+            return [(self._atom_list[row_a], self._atom_list[row_b])
+             for row_a, row_b in zip(a.tolist(), b.tolist())]
+        return a, b
+
+
+    def _selection_rows(self, selection):
+        """Takes a structure or collection of atoms, and returns the rows of
+        the model's coordinates array that they are stored in, in ascending
+        order. ``None`` selects every atom.
+
+        :param selection: the atoms to look up.
+        :raises ValueError: if any of the atoms are from another model.
+        :rtype: ``numpy.ndarray``"""
+
+        if selection is None: return np.arange(len(self._atom_list))
+        if isinstance(selection, AtomStructure): selection = selection.atoms()
+        rows = []
+        for atom in selection:
+            if atom._model is not self:
+                raise ValueError("{} is not in {}".format(atom, self))
+            rows.append(atom._index)
+        return np.unique(np.array(rows, dtype=int))
+
+
+    def copy(self, atom_ids=None):
+        """Creates a copy of the model, with new chains, ligands, waters and
+        atoms.
+
+        :param function atom_ids: a callable which, if given, will generate new\
+        atom IDs.
+        :rtype: ``Model``"""
 
-    #TODO copy
+        chains = {chain: chain.copy(atom_ids=atom_ids)
+         for chain in self._chains.structures}
+        ligands = []
+        for ligand in (self._ligands + self._waters).structures:
+            copy = ligand.copy(atom_ids=atom_ids)
+            copy._chain = chains.get(ligand._chain)
+            ligands.append(copy)
+        return Model(*chains.values(), *ligands, file=self._file)
 
 
 
@@ -717,7 +1225,7 @@ class Chain(Molecule, metaclass=StructureClass):
             residues[r].next = residues[r.next] if r.next else None
         return Chain(
          *residues.values(), id=id or self._id, internal_id=self._internal_id,
-         name=self._name, sequence=self._sequence,
+         name=self._name, sequence=self._sequence, type=self.type,
          helices=[tuple(residues[r] for r in h) for h in self._helices],
          strands=[tuple(residues[r] for r in s) for s in self._strands]
         )
@@ -803,7 +1311,8 @@ class Ligand(Molecule, Het, metaclass=StructureClass):
         else:
             atoms = [a.copy() for a in self.atoms()]
         return self.__class__(*atoms, id=id or self._id,
-         name=self._name, internal_id=self._internal_id, water=self._water)
+         name=self._name, internal_id=self._internal_id, water=self._water,
+         full_name=self._full_name)
 
 
 
@@ -926,7 +1435,9 @@ class Residue(Het, metaclass=StructureClass):
             atoms = [a.copy(id=id) for a, id in zip(atoms, new_ids)]
         else:
             atoms = [a.copy() for a in self.atoms()]
-        return self.__class__(*atoms, id=id or self._id, name=self._name)
+        return self.__class__(
+         *atoms, id=id or self._id, name=self._name, full_name=self._full_name
+        )
     
 
     @property
@@ -963,11 +1474,12 @@ class Atom:
 
     __slots__ = [
      "_element", "_location", "_id", "_name", "_charge",
-     "_bvalue", "_anisotropy", "_het", "_bonded_atoms",
+     "_bvalue", "_anisotropy", "_het", "_bonded_atoms", "_index", "_model"
     ]
 
     def __init__(self, element, x, y, z, id, name, charge, bvalue, anisotropy):
-        self._location = np.array([x, y, z])
+        self._location = np.array([x, y, z], dtype=float)
+        self._index, self._model = None, None
         self._element = element
         self._id, self._name, self._charge = id, name, charge
         self._bvalue, self._anisotropy = bvalue, anisotropy
@@ -984,8 +1496,10 @@ class Atom:
 
     def __eq__(self, other):
         if not isinstance(other, Atom): return False
-        for attr in self.__slots__:
-            if attr not in ("_id", "_het", "_bonded_atoms", "_location"):
+        for attr in Atom.__slots__:
+            if attr not in (
+             "_id", "_het", "_bonded_atoms", "_location", "_index", "_model"
+            ):
                 if getattr(self, attr) != getattr(other, attr): return False
             if list(self._location) != list(other._location): return False
         return True
@@ -1002,8 +1516,7 @@ class Atom:
         :param vector: the three values representing the delta position.
         :param \*atoms: the atoms to translate."""
 
-        for atom in atoms:
-            atom._location += np.array(vector)
+        Atom.place_atoms(Atom.coordinates_of(atoms) + np.array(vector), *atoms)
 
 
     @staticmethod
@@ -1013,10 +1526,128 @@ class Atom:
         :param matrix: the transformation matrix.
         :param \*atoms: the atoms to transform."""
 
-        locations = [list(a) for a in atoms]
-        output = np.dot(np.array(matrix), np.array(locations).transpose())
-        for atom, location in zip(atoms, output.transpose()):
-            atom._location = location
+        locations = Atom.coordinates_of(atoms)
+        output = np.dot(np.array(matrix), locations.transpose())
+        Atom.place_atoms(output.transpose(), *atoms)
+
+
+    @staticmethod
+    def coordinates_of(atoms):
+        """Gets the coordinates of a sequence of atoms as a read-only N×3 array,
+        in the order given. If the atoms are consecutive rows of the same
+        model's coordinate array, a view of those rows is returned rather than
+        a copy.
+
+        :param atoms: the atoms to get the coordinates of.
+        :rtype: ``numpy.ndarray``"""
+
+        coordinates = Atom._rows_of(atoms)
+        if coordinates is None:
+            coordinates = np.array(
+             [atom._location for atom in atoms], dtype=float
+            ).reshape(len(atoms), 3)
+        else:
+            coordinates = coordinates.view()
+        coordinates.flags.writeable = False
+        return coordinates
+
+
+    @staticmethod
+    def array_of(name, atoms):
+        """Builds a NumPy array of one property of a sequence of atoms, in the
+        order given - one of ``"elements"``, ``"names"``, ``"masses"``,
+        ``"charges"``, ``"bvalues"``, ``"residue_indices"`` or
+        ``"chain_indices"``.
+
+        :param str name: the property to get.
+        :param atoms: the atoms to get the property of.
+        :rtype: ``numpy.ndarray``"""
+
+        if name == "elements":
+            return np.array([atom._element or "" for atom in atoms], dtype=str)
+        if name == "names":
+            return np.array([atom._name or "" for atom in atoms], dtype=str)
+        if name == "masses":
+            masses = {}
+            for atom in atoms:
+                if atom._element not in masses:
+                    masses[atom._element] = atom.mass
+            return np.array(
+             [masses[atom._element] for atom in atoms], dtype=float
+            )
+        if name == "charges":
+            return np.array([atom._charge for atom in atoms], dtype=float)
+        if name == "bvalues":
+            return np.array([atom._bvalue for atom in atoms], dtype=float)
+        if name in ("residue_indices", "chain_indices"):
+            return Atom.owners_of(name.split("_")[0] + "s", atoms)[0]
+        raise ValueError("'{}' is not an atom property array".format(name))
+
+
+    @staticmethod
+    def owners_of(kind, atoms):
+        """Works out which structure of some kind - ``"residues"``, ``"hets"``
+        (residues and ligands) or ``"chains"`` - each of a sequence of atoms
+        belongs to. The structures are numbered in the order they are first
+        seen, and an array of each atom's number (-1 if it has none) is
+        returned, along with the list of structures those numbers refer to.
+
+        :param str kind: the kind of structure to look up.
+        :param atoms: the atoms to look up.
+        :rtype: ``tuple``"""
+
+        if kind == "residues":
+            structures = [atom._het if isinstance(atom._het, Residue)
+             else None for atom in atoms]
+        elif kind == "hets":
+            structures = [atom._het for atom in atoms]
+        elif kind == "chains":
+            structures = [atom._het._chain if atom._het else None
+             for atom in atoms]
+        else:
+            raise ValueError("'{}' is not a kind of structure".format(kind))
+        numbers = {None: -1}
+        for structure in structures:
+            numbers.setdefault(structure, len(numbers) - 1)
+        owners = sorted(numbers, key=numbers.get)[1:]
+        return np.array([numbers[s] for s in structures], dtype=int), owners
+
+
+    @staticmethod
+    def place_atoms(coordinates, *atoms):
+        """Moves a sequence of atoms to the rows of an N×3 array of
+        coordinates, in the order given. If the atoms are consecutive rows of
+        the same model's coordinate array, the rows are written in one go.
+
+        :param coordinates: the new coordinates.
+        :param \*atoms: the atoms to move."""
+
+        rows = Atom._rows_of(atoms)
+        if rows is not None:
+            rows[:] = coordinates
+            atoms[0]._model._internal_grid = None
+        else:
+            for atom, location in zip(atoms, coordinates):
+                atom._location[:] = location
+                if atom._model is not None: atom._model._internal_grid = None
+
+
+    @staticmethod
+    def _rows_of(atoms):
+        """Returns the block of a model's coordinate array that a sequence of
+        atoms are stored in, if they are consecutive rows of the same array in
+        the order given - otherwise ``None`` is returned.
+
+        :param atoms: the atoms to look up.
+        :rtype: ``numpy.ndarray``"""
+
+        if not len(atoms) or atoms[0]._model is None: return None
+        model, start = atoms[0]._model, atoms[0]._index
+        if len(model._coordinates) < start + len(atoms): return None
+        for offset, atom in enumerate(atoms):
+            if atom._index != start + offset or atom._model is not model:
+                return None
+        return model._coordinates[start:start + len(atoms)]
 
 
     @staticmethod
@@ -1086,6 +1717,7 @@ class Atom:
     @name.setter
     def name(self, name):
         self._name = name
+        if self._model is not None: self._model._atom_arrays = {}
 
 
     @property
@@ -1100,6 +1732,7 @@ class Atom:
     @charge.setter
     def charge(self, charge):
         self._charge = charge
+        if self._model is not None: self._model._atom_arrays = {}
 
 
     @property
@@ -1115,6 +1748,7 @@ class Atom:
     @bvalue.setter
     def bvalue(self, bvalue):
         self._bvalue = bvalue
+        if self._model is not None: self._model._atom_arrays = {}
 
 
     @property
@@ -1379,7 +2013,7 @@ class Atom:
         :param number y: The atom's new y coordinate.
         :param number z: The atom's new z coordinate."""
 
-        self._location[0], self._location[1], self._location[2] = x, y, z
+        Atom.place_atoms([(x, y, z)], self)
 
 
     def trim(self, places):
@@ -1390,7 +2024,7 @@ class Atom:
         ``None``, no rounding will be done."""
 
         if places is not None:
-            self._location = np.round(self._location, places)
+            Atom.place_atoms([np.round(self._location, places)], self)
 
 
     def bond(self, other):
@@ -0,0 +1,294 @@
+"""Contains functions for superposing sets of coordinates onto one another,
+and the atom pairings that say which coordinates go together."""
+
+from collections.abc import Sequence
+import numpy as np
+
+class AtomPairing:
+    """A record of which atoms of one structure are paired with which atoms of
+    another, as two aligned arrays of rows in the structures'
+    :py:meth:`~.AtomStructure.coordinates` arrays.
+
+    A pairing only refers to atoms by position, so once made it can be used
+    again for any two structures with the same topologies as the ones it was
+    made from - the same structures after they have moved, for example, or
+    other models of the same ensemble.
+
+    :param indices: the rows of the first structure's atoms.
+    :param other_indices: the rows of the atoms they are paired with."""
+
+    def __init__(self, indices, other_indices):
+        self._indices = np.asarray(indices, dtype=int)
+        self._other_indices = np.asarray(other_indices, dtype=int)
+
+
+    def __repr__(self):
+        return "<AtomPairing ({} atoms)>".format(len(self))
+
+
+    def __len__(self):
+        return len(self._indices)
+
+
+    @property
+    def indices(self):
+        """The rows of the first structure's atoms.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._indices
+
+
+    @property
+    def other_indices(self):
+        """The rows of the second structure's atoms, aligned with
+        :py:meth:`.indices`.
+
+        :rtype: ``numpy.ndarray``"""
+
+        return self._other_indices
+
+
+    def coordinates(self, structure, other):
+        """Returns the coordinates of two structures' atoms as N×3 arrays, with
+        paired atoms in the same rows.
+
+        :param AtomStructure structure: the first structure.
+        :param AtomStructure other: the structure paired with it.
+        :raises ValueError: if either structure has the wrong number of atoms.
+        :rtype: ``tuple``"""
+
+        coordinates = structure.coordinates
+        other_coordinates = other.coordinates
+        if not len(coordinates) == len(other_coordinates) == len(self):
+            raise ValueError("{} and {} don't have {} atoms each".format(
+             structure, other, len(self)
+            ))
+        return (
+         coordinates[self._indices], other_coordinates[self._other_indices]
+        )
+
+
+
+def kabsch(coordinates, target):
+    """Uses the Kabsch algorithm to find the rotation and translation which
+    best superpose one N×3 array of coordinates onto another, in the sense of
+    giving the lowest RMSD between them. Stacks of arrays (M×N×3) can be given
+    to superpose many pairs at once.
+
+    The coordinates are moved by ``rotation @ point + translation``.
+
+    :param coordinates: the coordinates to move.
+    :param target: the coordinates to move them onto.
+    :rtype: ``tuple``"""
+
+    coordinates = np.asarray(coordinates, dtype=float)
+    target = np.asarray(target, dtype=float)
+    centre = coordinates.mean(axis=-2)
+    target_centre = target.mean(axis=-2)
+    covariance = np.swapaxes(coordinates - centre[..., None, :], -1, -2) @ (
+     target - target_centre[..., None, :]
+    )
+    u, s, vt = np.linalg.svd(covariance)
+    handedness = np.where(np.linalg.det(u) * np.linalg.det(vt) < 0, -1, 1)
+    vt[..., 2, :] *= handedness[..., None]
+    rotation = np.swapaxes(vt, -1, -2) @ np.swapaxes(u, -1, -2)
+    translation = target_centre - (rotation @ centre[..., None])[..., 0]
+    return rotation, translation
+
+
+def rmsd(coordinates, target, superpose=True):
+    """Calculates the Root Mean Square Deviation between two N×3 arrays of
+    coordinates (or two stacks of them), whose rows are paired atoms. By default
+    the first are superposed onto the second before measuring.
+
+    :param coordinates: the first set of coordinates.
+    :param target: the second set of coordinates.
+    :param bool superpose: if ``False``, the coordinates will be compared as\
+    they are.
+    :rtype: ``float``"""
+
+    coordinates = np.asarray(coordinates, dtype=float)
+    target = np.asarray(target, dtype=float)
+    if superpose:
+        coordinates = apply_transformation(
+         coordinates, *kabsch(coordinates, target)
+        )
+    deviations = np.sum((coordinates - target) ** 2, axis=-1)
+    return np.sqrt(np.mean(deviations, axis=-1))
+
+
+def apply_transformation(coordinates, rotation, translation):
+    """Rotates and then translates an N×3 array of coordinates (or a stack of
+    them, with a rotation and translation for each).
+
+    :param coordinates: the coordinates to move.
+    :param rotation: the 3×3 rotation matrix.
+    :param translation: the vector to translate by.
+    :rtype: ``numpy.ndarray``"""
+
+    return coordinates @ np.swapaxes(rotation, -1, -2)\
+     + np.asarray(translation)[..., None, :]
+
+
+def rmsd_matrix(structures, pairing=None, processes=1, chunk=256):
+    """Calculates the superposed RMSD between every pair of a sequence of
+    structures with the same number of atoms - such as the models of an NMR
+    ensemble, or a set of docked poses - as an M×M array.
+
+    Atoms are paired only once, between the first structure and each of the
+    others, and all the RMSDs are then calculated together from one M×N×3
+    stack of coordinates (see :py:func:`.pairwise_rmsds`). If the structures
+    all share one topology, an :py:class:`.AtomPairing` between the first
+    structure and any other can be given to skip pairing altogether.
+
+    :param structures: the structures to compare.
+    :param AtomPairing pairing: if given, the pairing to use for every\
+    structure.
+    :param int processes: if more than one, the work will be shared among\
+    this many processes.
+    :param int chunk: how many rows of the matrix to calculate at once.
+    :raises ValueError: if the structures have different numbers of atoms.
+    :rtype: ``numpy.ndarray``"""
+
+    if not isinstance(structures, Sequence): structures = list(structures)
+    if not structures: return np.zeros((0, 0))
+    return pairwise_rmsds(
+     paired_stack(structures, pairing), processes=processes, chunk=chunk
+    )
+
+
+def rmsf(structures, *args, superpose=True, pairing=None, iterations=20,
+ tolerance=1e-6, **kwargs):
+    """Calculates the Root Mean Square Fluctuation of each atom across a
+    sequence of structures with the same number of atoms - such as the models
+    of an NMR ensemble - and of each residue. This is how far, on average,
+    each atom is from its mean location.
+
+    Atoms are paired between the first structure and each of the others, and
+    their coordinates stacked into one M×N×3 array. By default, the structures
+    are then iteratively superposed onto their mean structure until it stops
+    changing. Any query arguments given select which of the first structure's
+    atoms to use (``name="CA"`` for example), and only those are superposed
+    and measured.
+
+    Three things are returned - an array of the per-atom values, in atom ID
+    order, an array of the per-residue values (the root mean square of their
+    atoms' values), and the list of the first structure's residues those
+    values are for, in the same order. Atoms which aren't in residues only
+    appear in the first array. If there are no structures, all three are
+    empty.
+
+    :param structures: the structures to compare.
+    :param bool superpose: if ``False``, the structures won't be superposed.
+    :param AtomPairing pairing: if given, the pairing to use for every\
+    structure.
+    :param int iterations: the most superposition rounds to do.
+    :param float tolerance: how little the mean structure must move (by RMSD)\
+    in a round for superposition to be finished.
+    :raises ValueError: if the structures have different numbers of atoms.
+    :rtype: ``tuple``"""
+
+    from .structures import Atom
+    if not isinstance(structures, Sequence): structures = list(structures)
+    if not len(structures): return np.zeros(0), np.zeros(0), []
+    stack = paired_stack(structures, pairing)
+    atoms = structures[0]._sorted_atoms()
+    if args or kwargs:
+        selected = structures[0].atoms(*args, **kwargs)
+        keep = np.array([atom in selected for atom in atoms], dtype=bool)
+        stack, atoms = stack[:, keep], [a for a, k in zip(atoms, keep) if k]
+    mean = stack.mean(axis=0)
+    for iteration in range(iterations if superpose else 0):
+        stack = apply_transformation(stack, *kabsch(stack, mean))
+        mean, previous = stack.mean(axis=0), mean
+        if rmsd(mean, previous, superpose=False) < tolerance: break
+    squares = np.mean(np.sum((stack - mean) ** 2, axis=-1), axis=0)
+    numbers, residues = Atom.owners_of("residues", atoms)
+    in_residue = numbers != -1
+    residue_squares = np.bincount(
+     numbers[in_residue], weights=squares[in_residue]
+    ) / np.bincount(numbers[in_residue])
+    return np.sqrt(squares), np.sqrt(residue_squares), residues
+
+
+def paired_stack(structures, pairing=None):
+    """Pairs the atoms of the first of a sequence of structures with those of
+    each of the others, and stacks their coordinates into one M×N×3 array,
+    with the atoms of every structure in the first structure's atom ID order.
+
+    If the structures are a :py:class:`.ModelStack` whose models all still
+    use its coordinates, no pairing is needed and a copy of those coordinates
+    is returned.
+
+    :param structures: the structures to stack.
+    :param AtomPairing pairing: if given, the pairing to use for every\
+    structure.
+    :raises ValueError: if the structures have different numbers of atoms.
+    :rtype: ``numpy.ndarray``"""
+
+    from .data import ModelStack
+    if isinstance(structures, ModelStack) and pairing is None\
+     and structures.intact:
+        return structures.coordinates.copy()
+    reference, stack = structures[0], []
+    for structure in structures:
+        pair = reference.index_pairing_with(structure)\
+         if pairing is None else pairing
+        coordinates = pair.coordinates(reference, structure)[1]
+        stack.append(coordinates[np.argsort(pair.indices)])
+    return np.stack(stack)
+
+
+def pairwise_rmsds(stack, processes=1, chunk=256):
+    """Calculates the superposed RMSD between every pair of sets of
+    coordinates in an M×N×3 stack, as an M×M array.
+
+    Rather than superposing each pair, the RMSD after the best superposition is
+    worked out directly from the singular values of each pair's covariance
+    matrix. The rows of the matrix are calculated in blocks, which can be
+    shared among several processes.
+
+    :param stack: the stack of coordinates, with paired atoms in the same rows.
+    :param int processes: if more than one, the work will be shared among\
+    this many processes.
+    :param int chunk: how many rows of the matrix to calculate at once.
+    :rtype: ``numpy.ndarray``"""
+
+    stack = np.asarray(stack, dtype=float)
+    centred = stack - stack.mean(axis=1)[:, None, :]
+    blocks = [(start, min(start + chunk, len(stack)))
+     for start in range(0, len(stack), chunk)]
+    if processes > 1 and len(blocks) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(processes) as executor:
+            rows = list(executor.map(
+             rmsd_block, [centred] * len(blocks), *zip(*blocks)
+            ))
+    else:
+        rows = [rmsd_block(centred, start, end) for start, end in blocks]
+    matrix = np.concatenate(rows) if rows else np.zeros((0, 0))
+    np.fill_diagonal(matrix, 0)
+    return matrix
+
+
+def rmsd_block(centred, start, end):
+    """Calculates a block of rows of a superposed RMSD matrix, from an M×N×3
+    stack of coordinates which have each been centred on the origin.
+
+    :param numpy.ndarray centred: the centred coordinates.
+    :param int start: the first row to calculate.
+    :param int end: the row after the last one to calculate.
+    :rtype: ``numpy.ndarray``"""
+
+    count, atoms = centred.shape[:2]
+    block = centred[start:end]
+    covariances = (
+     block.transpose(0, 2, 1).reshape(-1, atoms)
+     @ centred.transpose(1, 0, 2).reshape(atoms, -1)
+    ).reshape(end - start, 3, count, 3).transpose(0, 2, 1, 3)
+    values = np.linalg.svd(covariances, compute_uv=False)
+    values[..., 2] *= np.where(np.linalg.det(covariances) < 0, -1, 1)
+    squares = np.sum(centred ** 2, axis=(1, 2))
+    deviations = squares[start:end, None] + squares - 2 * values.sum(axis=-1)
+    return np.sqrt(np.maximum(deviations / atoms, 0))
@@ -2,12 +2,30 @@
 
 import builtins
 import gzip
+import hashlib
+import json
+import mmap
+import os
 import paramiko
 from requests import get
 from .mmcif import mmcif_string_to_mmcif_dict, mmcif_dict_to_data_dict
+from .mmcif import mmcif_lines_to_model_dicts, mmcif_lines_to_category_offsets
 from .mmtf import mmtf_bytes_to_mmtf_dict, mmtf_dict_to_data_dict
+from .bcif import bcif_bytes_to_bcif_dict, bcif_dict_to_data_dict
+from .mmtf import mmtf_dict_to_model_dicts
 from .pdb import pdb_string_to_pdb_dict, pdb_dict_to_data_dict
-from .data import data_dict_to_file
+from .pdb import pdb_lines_to_model_dicts
+from .data import data_dict_to_file, model_dict_to_model
+
+# The file type of each parsing function, and the options it can take
+FILE_OPTIONS = {
+ mmcif_string_to_mmcif_dict: (
+  ".cif", {"metadata_only", "columnar", "categories"}
+ ),
+ mmtf_bytes_to_mmtf_dict: (".mmtf", {"metadata_only"}),
+ bcif_bytes_to_bcif_dict: (".bcif", {"metadata_only"}),
+ pdb_string_to_pdb_dict: (".pdb", {"metadata_only"})
+}
 
 def open(path, *args, **kwargs):
     """Opens a file at a given path, works out what filetype it is, and parses
@@ -20,11 +38,40 @@ def open(path, *args, **kwargs):
     This will parse file.pdb as a .pdb file, but only go as far as converting it
     to an atomium data dictionary.
 
+    If only the file's metadata (resolution, deposition date etc.) is needed,
+    ``metadata_only=True`` will skip the atom records entirely and return a
+    ``File`` with no models, which is much faster for large structures.
+
+    Atoms can also be filtered out as the file is parsed, so that they are
+    never created:
+
+        >>> atomium.open('/path/to/file.cif', atoms="CA", chains="A")
+
+    If only a few tables of a .cif file are needed, they can be read on their
+    own:
+
+        >>> atomium.open('/path/to/file.cif', file_dict=True, categories=["entity"])
+
+    Files with many models of the same atoms, such as NMR ensembles or docking
+    poses, can keep them as a :py:class:`.ModelStack` - one array of every
+    model's coordinates, with each model created only when it is needed:
+
+        >>> atomium.open('/path/to/poses.pdb', stack_models=True)
+
     If the file extension is .gz, the file will be unzipped first.
 
     :param str path: the location of the file.
     :param bool file_dict: if ``True``, parsing will stop at the file ``dict``.
     :param bool data_dict: if ``True``, parsing will stop at the data ``dict``.
+    :param bool metadata_only: if ``True``, atoms and models won't be parsed.
+    :param bool stack_models: if ``True``, models which share a topology will\
+    be kept as a :py:class:`.ModelStack`.
+    :param bool columnar: if ``True``, .cif tables will be stored as columns.
+    :param list categories: if given, the only .cif tables to read.
+    :param atoms: if given, the only atom name(s) to keep.
+    :param chains: if given, the only chain ID(s) to keep.
+    :param bool hetatm: if ``False``, ligands will be discarded.
+    :param bool waters: if ``False``, waters will be discarded.
     :rtype: ``File``"""
 
     if str(path)[-3:] == ".gz":
@@ -41,13 +88,122 @@ def open(path, *args, **kwargs):
         return parse_string(filestring, path, *args, **kwargs)
 
 
-def fetch(code, *args, **kwargs):
+def iter_models(path):
+    """Opens a file at a given path and yields its models one at a time, rather
+    than creating all of them at once. Only one model's atoms are held in
+    memory at any point, which makes this suitable for very large NMR
+    ensembles or files of docking poses.
+
+    For example:
+
+        >>> for model in atomium.iter_models('/path/to/poses.pdb'):
+        ...     print(model.center_of_mass)
+
+    .pdb and .cif files are read line by line. .mmtf files are binary and have
+    to be read in full, but each model is still only created as it is needed.
+    Files with other extensions are parsed in full, and then their models
+    yielded.
+
+    If the file extension is .gz, the file will be unzipped first.
+
+    :param str path: the location of the file.
+    :rtype: ``Model``"""
+
+    gz = str(path)[-3:] == ".gz"
+    ending = str(path)[:-3 if gz else None].split(".")[-1]
+    opener = gzip.open if gz else builtins.open
+    if ending in ("cif", "pdb"):
+        with opener(path, "rt") as f:
+            for model_dict in (mmcif_lines_to_model_dicts if ending == "cif"
+             else pdb_lines_to_model_dicts)(f):
+                yield model_dict_to_model(model_dict)
+    elif ending == "mmtf":
+        with opener(path, "rb") as f:
+            mmtf_dict = mmtf_bytes_to_mmtf_dict(f.read())
+        for model_dict in mmtf_dict_to_model_dicts(mmtf_dict):
+            yield model_dict_to_model(model_dict)
+    else:
+        for model in open(path).models: yield model
+
+
+def build_index(path):
+    """Records the byte offsets of every table in a .cif file, and saves them
+    to a sidecar index file alongside it (the same path with ``.idx`` added).
+    The index is also returned.
+
+    Once a file has been indexed, :py:func:`.open_categories` can read
+    individual tables from it without reading the rest of the file.
+
+    :param str path: the location of the .cif file.
+    :rtype: ``dict``"""
+
+    with builtins.open(path, "rb") as f:
+        index = {
+         **file_signature(path),
+         "categories": mmcif_lines_to_category_offsets(f)
+        }
+    with builtins.open(str(path) + ".idx", "w") as f: json.dump(index, f)
+    return index
+
+
+def file_signature(path):
+    """Describes the current state of a file - its size, its modification
+    time, and a hash of its first 64 KiB - so that an index made from it can
+    be checked against it later.
+
+    :param str path: the location of the file.
+    :rtype: ``dict``"""
+
+    with builtins.open(path, "rb") as f:
+        head = hashlib.sha1(f.read(65536)).hexdigest()
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "head": head}
+
+
+def open_categories(path, categories, columnar=False):
+    """Reads just the given tables from a .cif file, and returns them as a
+    .mmcif dictionary. The file is memory-mapped and only the byte ranges of
+    the requested tables are read and parsed.
+
+    The ranges come from the file's sidecar index (see :py:func:`.build_index`)
+    if there is one and it matches the file's current size, modification time
+    and opening bytes - otherwise the file is scanned for them first, and no
+    index is saved.
+
+        >>> atomium.open_categories('/path/to/file.cif', ["entity"])
+
+    :param str path: the location of the .cif file.
+    :param list categories: the names of the tables to read.
+    :param bool columnar: if ``True``, tables will be stored as columns.
+    :rtype: ``dict``"""
+
+    index = None
+    try:
+        with builtins.open(str(path) + ".idx") as f: index = json.load(f)
+        signature = file_signature(path)
+        if any(index[key] != value for key, value in signature.items()):
+            index = None
+    except (OSError, ValueError, KeyError, TypeError): index = None
+    with builtins.open(path, "rb") as f:
+        offsets = index["categories"] if index else\
+         mmcif_lines_to_category_offsets(f)
+        if not os.path.getsize(path): return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            blocks = [mm[start:end].decode() for category in categories
+             for start, end in offsets.get(category, [])]
+    return mmcif_string_to_mmcif_dict(
+     "\n".join(blocks), columnar=columnar, categories=categories
+    )
+
+
+def fetch(code, *args, reduced=False, **kwargs):
     """Fetches a file from a remote location via HTTP.
 
     If a PDB code is given, the .cif form of that struture will be fetched from
     the RCSB servers. If that code is given an extension, that file format will
-    be obtained instead of .cif. If a URL is given, the function will simply
-    look in that location.
+    be obtained instead of .cif (.bcif and .mmtf files are binary and come from
+    RCSB's model servers). If a URL is given, the function will simply look in
+    that location.
 
     For example:
     
@@ -56,22 +212,38 @@ def fetch(code, *args, **kwargs):
     This will get the .mmtf version of structure 1LOL, but only go as far as
     converting it to an atomium file dictionary.
 
+    If ``reduced`` is ``True``, the reduced .mmtf file will be fetched instead
+    of the full one - this only has the CA atoms of proteins and the P atoms of
+    nucleic acids (plus any ligands), with coordinates to one decimal place,
+    and is much smaller and faster to parse.
+
+        >>> atomium.fetch('1lol.mmtf', reduced=True)
+
     :param str code: the file to fetch.
+    :param bool reduced: if ``True``, the reduced .mmtf file will be fetched.
     :param bool file_dict: if ``True``, parsing will stop at the file ``dict``.
     :param bool data_dict: if ``True``, parsing will stop at the data ``dict``.
+    :param bool metadata_only: if ``True``, atoms and models won't be parsed.
+    :param bool stack_models: if ``True``, models which share a topology will\
+    be kept as a :py:class:`.ModelStack`.
     :raises ValueError: if no file is found.
     :rtype: ``File``"""
 
     if code.startswith("http"):
         url = code
     elif code.endswith(".mmtf"):
-        url = "https://mmtf.rcsb.org/v1.0/full/{}".format(code[:-5].lower())
+        url = "https://mmtf.rcsb.org/v1.0/{}/{}".format(
+         "reduced" if reduced else "full", code[:-5].lower()
+        )
+    elif code.endswith(".bcif"):
+        url = "https://models.rcsb.org/{}.bcif".format(code[:-5].lower())
     else:
         if "." not in code: code += ".cif"
         url = "https://files.rcsb.org/view/" + code.lower()
     response = get(url, stream=True)
     if response.status_code == 200:
-        text = response.content if code.endswith(".mmtf") else response.text
+        text = response.content if code.endswith((".mmtf", ".bcif"))\
+         else response.text
         return parse_string(text, code, *args, **kwargs)
     raise ValueError("Could not find anything at {}".format(url))
 
@@ -85,6 +257,7 @@ def fetch_over_ssh(hostname, username, path, *args, password=None, **kwargs):
     :param str password: if needed, the password to use.
     :param bool file_dict: if ``True``, parsing will stop at the file ``dict``.
     :param bool data_dict: if ``True``, parsing will stop at the data ``dict``.
+    :param bool metadata_only: if ``True``, atoms and models won't be parsed.
     :rtype: ``File``"""
 
     client = paramiko.SSHClient()
@@ -104,7 +277,9 @@ def fetch_over_ssh(hostname, username, path, *args, password=None, **kwargs):
     return parse_string(filestring, path, *args, **kwargs)
 
 
-def parse_string(filestring, path, file_dict=False, data_dict=False):
+def parse_string(filestring, path, file_dict=False, data_dict=False,
+                 metadata_only=False, columnar=False, categories=None,
+                 stack_models=False, **filters):
     """Takes a filestring and parses it in the appropriate way. You must provide
     the string to parse itself, and some other string that ends in either .cif,
     .mmtf, or .cif - that will determine how the file is parsed.
@@ -112,19 +287,52 @@ def parse_string(filestring, path, file_dict=False, data_dict=False):
     (If this cannot be inferred from the path string, atomium will guess based
     on the filestring contents.)
 
+    Atoms can be discarded while the models are being built by giving any of
+    ``atoms``, ``chains``, ``hetatm`` or ``waters`` - see
+    :py:func:`.make_atom_filter`.
+
+    If ``stack_models`` is ``True``, each model dictionary is created only as
+    it is needed, and models which share a topology are kept as a
+    :py:class:`.ModelStack` (see :py:func:`.model_dicts_to_models`).
+
     :param str filestring: the contents of some file.
     :param str path: the filename of the file of origin.
     :param bool file_dict: if ``True``, parsing will stop at the file ``dict``.
     :param bool data_dict: if ``True``, parsing will stop at the data ``dict``.
+    :param bool metadata_only: if ``True``, atoms and models won't be parsed.
+    :param bool stack_models: if ``True``, models which share a topology will\
+    be kept as a :py:class:`.ModelStack`.
+    :param bool columnar: if ``True``, .cif tables will be stored as columns.
+    :param list categories: if given, the only .cif tables to read.
+    :param atoms: if given, the only atom name(s) to keep.
+    :param chains: if given, the only chain ID(s) to keep.
+    :param bool hetatm: if ``False``, ligands will be discarded.
+    :param bool waters: if ``False``, waters will be discarded.
+    :raises ValueError: if an option is given which the file type lacks.
     :rtype: ``File``"""
 
     file_func, data_func = get_parse_functions(filestring, path)
-    parsed = file_func(filestring)
+    options = {
+     "metadata_only": metadata_only, "columnar": columnar,
+     "categories": categories
+    }
+    options = {k: v for k, v in options.items() if v not in (None, False)}
+    if file_func in FILE_OPTIONS:
+        filetype, supported = FILE_OPTIONS[file_func]
+        unsupported = sorted(set(options) - supported)
+        if unsupported:
+            raise ValueError("{} files can't be parsed with {}".format(
+             filetype, ", ".join(unsupported)
+            ))
+    parsed = file_func(filestring, **options)
     if not file_dict:
-        parsed = data_func(parsed)
+        stack_models = stack_models and not data_dict
+        if stack_models: filters["lazy_models"] = True
+        parsed = data_func(parsed, **filters) if filters else data_func(parsed)
         if not data_dict:
             filetype = data_func.__name__.split("_")[0].replace("mmc", "c")
-            parsed = data_dict_to_file(parsed, filetype)
+            stacking = {"stack_models": True} if stack_models else {}
+            parsed = data_dict_to_file(parsed, filetype, **stacking)
     return parsed
 
 
@@ -141,13 +349,16 @@ def get_parse_functions(filestring, path):
 
     if "." in path:
         ending = path.split(".")[-1]
-        if ending in ("mmtf", "cif", "pdb"):
+        if ending in ("mmtf", "cif", "pdb", "bcif"):
             return {
              "cif": (mmcif_string_to_mmcif_dict, mmcif_dict_to_data_dict),
              "mmtf": (mmtf_bytes_to_mmtf_dict, mmtf_dict_to_data_dict),
-             "pdb": (pdb_string_to_pdb_dict, pdb_dict_to_data_dict)
+             "pdb": (pdb_string_to_pdb_dict, pdb_dict_to_data_dict),
+             "bcif": (bcif_bytes_to_bcif_dict, bcif_dict_to_data_dict)
             }[ending]
     if isinstance(filestring, bytes):
+        if b"dataBlocks" in filestring[:1000]:
+            return (bcif_bytes_to_bcif_dict, bcif_dict_to_data_dict)
         return (mmtf_bytes_to_mmtf_dict, mmtf_dict_to_data_dict)
     elif "_atom_sites" in filestring:
         return (mmcif_string_to_mmcif_dict, mmcif_dict_to_data_dict)
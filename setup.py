@@ -27,5 +27,5 @@ setup(
  keywords="chemistry bioinformatics proteins biochemistry molecules PDB MMCIF CIF MMTF",
  packages=["atomium"],
  python_requires="!=2.*, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*, !=3.5.*",
- install_requires=["numpy", "requests", "rmsd", "paramiko", "msgpack", "valerius"]
+ install_requires=["numpy", "requests", "paramiko", "msgpack", "valerius"]
 )
@@ -436,4 +436,52 @@ class ModelDictTests(DataDictTest):
             self.assertEqual(len(d["models"][0]["non-polymer"]), 0)
             self.assertEqual(len(d["models"][0]["water"]), 140)
             for water in d["models"][0]["water"].values():
-                self.assertEqual(water["name"], "DOD")
\ No newline at end of file
+                self.assertEqual(water["name"], "DOD")
+
+    def test_1lol_data_dict_columnar_model(self):
+        pdb_dict = atomium.open("tests/integration/files/1lol.pdb", file_dict=True)
+        d = atomium.pdb.pdb_dict_to_data_dict(pdb_dict, columnar=True)
+        self.assertEqual(len(d["models"]), 1)
+        columns = d["models"][0]
+        self.assertEqual(len(columns["id"]), 3431)
+        self.assertEqual(columns["id"][:3].tolist(), [1, 2, 3])
+        self.assertEqual(columns["name"][:3].tolist(), ["N", "CA", "C"])
+        self.assertEqual(columns["x"][:3].tolist(), [3.696, 3.198, 3.914])
+        self.assertEqual(columns["bvalue"][:3].tolist(), [21.5, 19.76, 19.29])
+        self.assertEqual(columns["occupancy"].tolist(), [1.0] * 3431)
+        self.assertEqual(columns["element"][-1], "O")
+        self.assertEqual(columns["charge"].tolist(), [0] * 3431)
+        self.assertEqual(columns["record"][[0, -1]].tolist(), ["ATOM", "HETATM"])
+        self.assertEqual(columns["residue_name"][:2].tolist(), ["VAL", "VAL"])
+        self.assertEqual(columns["residue_number"][:2].tolist(), [11, 11])
+        self.assertEqual(columns["insertion_code"][0], "")
+        self.assertEqual(columns["chain"][[0, -1]].tolist(), ["A", "B"])
+        self.assertEqual(columns["polymer"].sum(), 3191)
+        d2 = atomium.pdb.pdb_dict_to_data_dict(pdb_dict)["models"][0]
+        self.assertEqual(columns["polymer"].sum(), sum(len(res["atoms"])
+         for chain in d2["polymer"].values()
+         for res in chain["residues"].values()))
+        line = pdb_dict["MODEL"][0][0]
+        columns = atomium.pdb.model_lines_to_columns(
+         [line[:12] + " Cé " + line[16:]]
+        )
+        self.assertEqual(columns["name"].tolist(), ["Cé"])
+        self.assertEqual(columns["x"].tolist(), [3.696])
+
+
+    def test_1lol_data_dict_reduced_model(self):
+        mmtf_dict = atomium.open("tests/integration/files/1lol.mmtf", file_dict=True)
+        for key in ("bFactorList", "atomIdList", "altLocList", "occupancyList",
+         "insCodeList", "chainNameList", "sequenceIndexList", "bondAtomList",
+         "bondOrderList"):
+            del mmtf_dict[key]
+        d = atomium.mmtf.mmtf_dict_to_data_dict(mmtf_dict)
+        residue = d["models"][0]["polymer"]["A"]["residues"]["A.11"]
+        self.assertEqual(len(residue["atoms"]), 7)
+        self.assertEqual(residue["atoms"][2], {
+         "x": 3.198, "y": 33.218, "z": 61.983, "alt_loc": None, "bvalue": 0,
+         "occupancy": 1.0, "anisotropy": [0, 0, 0, 0, 0, 0], "name": "CA",
+         "element": "C", "charge": 0
+        })
+        self.assertEqual(len(d["models"][0]["water"]), 180)
+        self.assertIn("G.3005", d["models"][0]["water"])
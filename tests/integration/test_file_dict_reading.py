@@ -1,4 +1,8 @@
 import atomium
+import os
+import shutil
+import struct
+import tempfile
 from unittest import TestCase
 
 class MmcifFileDictReadingTests(TestCase):
@@ -27,6 +31,96 @@ class MmcifFileDictReadingTests(TestCase):
         self.assertTrue(d["citation"][0]["title"].endswith("decarboxylase."))
 
 
+    def test_1lol_columnar_file_dict(self):
+        d = atomium.open(
+         "tests/integration/files/1lol.cif", file_dict=True, columnar=True
+        )
+        self.assertEqual(d["entry"], {"id": ["1LOL"]})
+        self.assertEqual(d["audit_author"], {
+         "name": ["Wu, N.", "Pai, E.F."], "pdbx_ordinal": ["1", "2"]
+        })
+        self.assertEqual(len(d["atom_site"]["id"]), 3431)
+        self.assertEqual(d["atom_site"]["Cartn_x"][0], "3.696")
+        self.assertEqual(
+         repr(atomium.mmcif.mmcif_dict_to_data_dict(d)),
+         repr(atomium.open("tests/integration/files/1lol.cif", data_dict=True))
+        )
+
+
+    def test_1lol_selected_categories_file_dict(self):
+        path = "tests/integration/files/1lol.cif"
+        d = atomium.open(path, file_dict=True, categories=["entry", "entity"])
+        full = atomium.open(path, file_dict=True)
+        self.assertEqual(d, {"entry": full["entry"], "entity": full["entity"]})
+        d = atomium.open(path, file_dict=True, categories=[])
+        self.assertEqual(d, {})
+
+
+    def test_1lol_indexed_categories(self):
+        full = atomium.open("tests/integration/files/1lol.cif", file_dict=True)
+        categories = ["entity", "struct", "pdbx_struct_assembly_gen"]
+        expected = {c: full[c] for c in categories}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "1lol.cif")
+            shutil.copy("tests/integration/files/1lol.cif", path)
+            self.assertEqual(atomium.open_categories(path, categories), expected)
+            index = atomium.build_index(path)
+            self.assertTrue(os.path.exists(path + ".idx"))
+            self.assertEqual(index["size"], os.path.getsize(path))
+            self.assertEqual(set(index["categories"]), set(full))
+            self.assertEqual(atomium.open_categories(path, categories), expected)
+            self.assertEqual(
+             atomium.open_categories(path, ["atom_site"], columnar=True),
+             atomium.open(path, file_dict=True, columnar=True,
+              categories=["atom_site"])
+            )
+            with open(path) as f: filestring = f.read()
+            with open(path, "w") as f:
+                f.write(filestring.replace("data_1LOL", "data_1LO", 1).replace(
+                 "absF               6", "absF                6", 1
+                ))
+            os.utime(path, ns=(index["mtime"], index["mtime"]))
+            self.assertEqual(os.path.getsize(path), index["size"])
+            self.assertEqual(atomium.open_categories(path, ["entry"]),
+             {"entry": [{"id": "1LOL"}]})
+            with open(path + ".idx", "w") as f: f.write("[]")
+            self.assertEqual(atomium.open_categories(path, categories), expected)
+            empty = os.path.join(directory, "empty.cif")
+            open(empty, "w").close()
+            atomium.build_index(empty)
+            self.assertEqual(atomium.open_categories(empty, ["entity"]), {})
+
+
+    def test_tokenizer_edge_cases(self):
+        d = atomium.mmcif.mmcif_string_to_mmcif_dict("\n".join([
+         "data_TEST", "#", "_entry.id TEST", "_struct.title",
+         ";A title broken", "over two lines", ";", "_struct.pdbx_descriptor",
+         "'quoted   value'", "#", "loop_", "_atom_site.id",
+         "_atom_site.label_atom_id", "_atom_site.auth_comp_id",
+         "1 \"O5'\" 'A B'", "2", "C1' ", "ALA", "loop_", "_other.name",
+         ";text", "field", ";", "\"x\""
+        ]))
+        self.assertEqual(d["entry"], [{"id": "TEST"}])
+        self.assertEqual(d["struct"], [{
+         "title": "A title broken over two lines",
+         "pdbx_descriptor": "quoted   value"
+        }])
+        self.assertEqual(d["atom_site"], [
+         {"id": "1", "label_atom_id": "O5'", "auth_comp_id": "A B"},
+         {"id": "2", "label_atom_id": "C1'", "auth_comp_id": "ALA"}
+        ])
+        self.assertEqual(d["other"], [{"name": "text field"}, {"name": "x"}])
+        d = atomium.mmcif.mmcif_string_to_mmcif_dict("\r\n".join([
+         "data_TEST", "#", "_entry.id\tTEST", "_struct.title", "'A title'",
+         "", "_entity_poly.pdbx_seq_one_letter_code", ";MALW", ";", "#"
+        ]))
+        self.assertEqual(d["entry"], [{"id": "TEST"}])
+        self.assertEqual(d["struct"], [{"title": "A title"}])
+        self.assertEqual(
+         d["entity_poly"], [{"pdbx_seq_one_letter_code": "MALW"}]
+        )
+
+
 
 class MmtfFileDictReadingTests(TestCase):
 
@@ -38,25 +132,68 @@ class MmtfFileDictReadingTests(TestCase):
         self.assertAlmostEqual(d["resolution"], 1.9, delta=0.00005)
         self.assertEqual(d["numAtoms"], 3431)
         self.assertEqual(len(d["secStructList"]), 602)
-        self.assertEqual(d["secStructList"][:5], (7, 4, 4, 4, 3))
+        self.assertEqual(d["secStructList"][:5].tolist(), [7, 4, 4, 4, 3])
         self.assertEqual(len(d["bondAtomList"]), 828)
-        self.assertEqual(d["bondAtomList"][:6], (7, 2, 15, 9, 23, 17))
+        self.assertEqual(d["bondAtomList"][:6].tolist(), [7, 2, 15, 9, 23, 17])
         self.assertEqual(d["chainIdList"], list("ABCDEFGH"))
         self.assertEqual(d["insCodeList"], [""] * 602)
-        self.assertEqual(d["sequenceIndexList"][:6], [10, 11, 12, 13, 14, 15])
-        self.assertEqual(d["occupancyList"], [1.0] * 3431)
-        self.assertEqual(d["xCoordList"][:3], [3.696, 3.198, 3.914])
-        self.assertEqual(d["bFactorList"][:3], [21.5, 19.76, 19.29])
+        self.assertEqual(d["sequenceIndexList"][:6].tolist(), [10, 11, 12, 13, 14, 15])
+        self.assertEqual(d["occupancyList"].tolist(), [1.0] * 3431)
+        self.assertEqual(d["xCoordList"][:3].tolist(), [3.696, 3.198, 3.914])
+        self.assertEqual(d["bFactorList"][:3].tolist(), [21.5, 19.76, 19.29])
         self.assertEqual(d["groupList"][0]["groupName"], "ASN")
         self.assertEqual(d["groupList"][0]["atomNameList"][:3], ["N", "CA", "C"])
 
 
+    def test_1lol_file_dict_is_always_decoded(self):
+        d = atomium.open("tests/integration/files/1lol.mmtf", file_dict=True)
+        self.assertIsInstance(d.copy()._fields["yCoordList"], bytes)
+        self.assertIsInstance(d._fields["xCoordList"], bytes)
+        for copy in (dict(d), {**d}, d.copy()):
+            self.assertNotIsInstance(copy["xCoordList"], bytes)
+        self.assertNotIsInstance(dict(d.items())["yCoordList"], bytes)
+        self.assertFalse(any(isinstance(v, bytes) for v in d.values()))
+        self.assertEqual(d.pop("bFactorList")[:3].tolist(), [21.5, 19.76, 19.29])
+        self.assertNotIn("bFactorList", d)
+        self.assertEqual(d, dict(d))
+
+
     def test_1igt_file_dict(self):
         d = atomium.open("tests/integration/files/1igt.mmtf", file_dict=True)
         self.assertEqual(d["mmtfVersion"], "1.0.0")
         self.assertEqual(d["insCodeList"][266], "A")
 
 
+    def test_1lol_fields_decoded_lazily(self):
+        d = atomium.open("tests/integration/files/1lol.mmtf", file_dict=True)
+        self.assertIsInstance(d._fields["bFactorList"], bytes)
+        self.assertIsInstance(d._fields["xCoordList"], bytes)
+        self.assertEqual(d["xCoordList"][:3].tolist(), [3.696, 3.198, 3.914])
+        self.assertIs(d._fields["xCoordList"], d["xCoordList"])
+        self.assertIsInstance(d._fields["bFactorList"], bytes)
+        self.assertEqual(d.get("bFactorList")[:3].tolist(), [21.5, 19.76, 19.29])
+        self.assertIsNone(d.get("xxx"))
+        self.assertEqual(dict(d.items())["chainIdList"], list("ABCDEFGH"))
+
+
+    def test_binary_codecs(self):
+        field = lambda codec, params, fmt, *values: struct.pack(
+         ">iii" + fmt, codec, len(values), params, *values
+        )
+        parse = atomium.mmtf.parse_binary_field
+        self.assertEqual(parse(field(2, 0, "bbb", 1, -2, 3)).tolist(), [1, -2, 3])
+        self.assertEqual(parse(field(3, 0, "hh", 300, -2)).tolist(), [300, -2])
+        self.assertEqual(parse(field(4, 0, "ii", 70000, -2)).tolist(), [70000, -2])
+        self.assertEqual(parse(field(5, 0, "4s4s", b"A\0\0\0", b"AB\0\0")), ["A", "AB"])
+        self.assertEqual(parse(field(6, 0, "iiii", 0, 2, 65, 1)), ["", "", "A"])
+        self.assertEqual(parse(field(7, 0, "iiii", 5, 3, 1, 1)).tolist(), [5, 5, 5, 1])
+        self.assertEqual(parse(field(8, 0, "iiii", 1, 3, 10, 1)).tolist(), [1, 2, 3, 13])
+        self.assertEqual(parse(field(9, 10, "ii", 15, 2)).tolist(), [1.5, 1.5])
+        self.assertEqual(parse(field(10, 100, "hhhhhh", 32767, 32767, 10, 5, -32768, -2)).tolist(), [655.44, 655.49, 327.79])
+        with self.assertRaises(ValueError):
+            parse(field(11, 0, ""))
+
+
 
 class PdbFileDictReadingTests(TestCase):
 
@@ -113,6 +113,23 @@ class MmtfFileSavingTests(SavingTest):
         self.assertEqual(f.model.chain("A"), chain)
 
 
+    def test_saved_mmtf_is_compressed(self):
+        f = atomium.open("tests/integration/files/1lol.cif")
+        f.model.save("tests/integration/files/saved_1lol.mmtf")
+        self.assertLess(
+         os.path.getsize("tests/integration/files/saved_1lol.mmtf"),
+         os.path.getsize("tests/integration/files/1lol.cif") / 5
+        )
+        d = atomium.open("tests/integration/files/saved_1lol.mmtf", file_dict=True)
+        self.assertEqual(d["xCoordList"][:3].tolist(), [3.696, 3.198, 3.914])
+        self.assertEqual(d["chainIdList"][:2], ["A", "B"])
+        f2 = atomium.open("tests/integration/files/saved_1lol.mmtf")
+        self.assertEqual(
+         [len(h) for h in f.model.chain("A").helices],
+         [len(h) for h in f2.model.chain("A").helices]
+        )
+
+
     def test_biological_assembly_warns_on_saving(self):
         f = atomium.open("tests/integration/files/1xda.cif")
         model = f.generate_assembly(5)
@@ -163,3 +180,80 @@ class PdbFileSavingTests(SavingTest):
         model = f.generate_assembly(5)
         with self.assertWarns(Warning):
             model.save("tests/integration/files/assembly.cif")
+
+
+
+class BcifFileSavingTests(SavingTest):
+
+    def check_bcif_saving(self, filename):
+        f = atomium.open("tests/integration/files/" + filename)
+        path = "tests/integration/files/saved_{}.bcif".format(
+         filename.split(".")[0]
+        )
+        f.model.save(path)
+        f2 = atomium.open(path)
+        self.assertEqual(f2.filetype, "bcif")
+        self.assertEqual(f.model, f2.model)
+        for chain1, chain2 in zip(sorted(f.model.chains(), key=lambda c: c.id),
+         sorted(f2.model.chains(), key=lambda c: c.id)):
+            self.assertEqual(chain1.sequence, chain2.sequence)
+            self.assertEqual(chain1, chain2)
+        for lig1, lig2 in zip(sorted(f.model.ligands(), key=lambda c: c.id),
+         sorted(f2.model.ligands(), key=lambda c: c.id)):
+            self.assertEqual(lig1.name, lig2.name)
+            self.assertEqual(lig1.id, lig2.id)
+        for atom in f.model.atoms():
+            atom2 = f2.model.atom(atom.id)
+            self.assertEqual(atom.location, atom2.location)
+            self.assertEqual(atom.name, atom2.name)
+            self.assertEqual(atom.bvalue, atom2.bvalue)
+            self.assertEqual(atom.anisotropy, atom2.anisotropy)
+
+
+    def test_can_save_1lol(self):
+        self.check_bcif_saving("1lol.cif")
+
+
+    def test_can_save_5xme(self):
+        self.check_bcif_saving("5xme.mmtf")
+
+
+    def test_can_save_4y60(self):
+        self.check_bcif_saving("4y60.pdb")
+
+
+    def test_bcif_metadata_only(self):
+        f = atomium.open("tests/integration/files/1lol.cif")
+        f.model.save("tests/integration/files/saved_1lol.bcif")
+        d = atomium.open(
+         "tests/integration/files/saved_1lol.bcif", file_dict=True,
+         metadata_only=True
+        )
+        self.assertNotIn("atom_site", d)
+        self.assertIn("entity", d)
+        f2 = atomium.open(
+         "tests/integration/files/saved_1lol.bcif", metadata_only=True
+        )
+        self.assertEqual(f2.models, [])
+
+
+    def test_bcif_keeps_zero_padded_values(self):
+        from atomium.bcif import encode_column, decode_column
+        for values in (["007", "01", "10"], ["01.5", "2.0"]):
+            column = decode_column(encode_column("x", values))
+            self.assertEqual(list(column), values)
+        from atomium.bcif import column_to_strings
+        for values in (["1.50", "2.25", "-0.10"], ["1.50", "?", "."]):
+            column = decode_column(encode_column("x", values))
+            self.assertEqual(column_to_strings(column), values)
+        self.assertEqual(column_to_strings(column[:1]), ["1.50"])
+
+
+    def test_bcif_is_smaller_than_cif(self):
+        f = atomium.open("tests/integration/files/1lol.cif")
+        f.model.save("tests/integration/files/saved_1lol.cif")
+        f.model.save("tests/integration/files/saved_1lol.bcif")
+        self.assertLess(
+         os.path.getsize("tests/integration/files/saved_1lol.bcif") * 2,
+         os.path.getsize("tests/integration/files/saved_1lol.cif")
+        )
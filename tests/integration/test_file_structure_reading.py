@@ -1,6 +1,9 @@
 from datetime import date
+import gc
 import math
+import weakref
 import atomium
+import numpy as np
 from unittest import TestCase
 
 class DeNovoStructureTests(TestCase):
@@ -568,6 +571,7 @@ class FileReadingTests(TestCase):
             lig1, lig2 = model.ligands(name="XMP")
             self.assertAlmostEqual(lig1.rmsd_with(lig2), 0.133, delta=0.001)
             self.assertAlmostEqual(lig2.rmsd_with(lig1), 0.133, delta=0.001)
+            self.assertAlmostEqual(lig1.rmsd_with(lig2, superpose=False), 32.065, delta=0.001)
 
             atom = model.atom(934)
             self.assertEqual(atom.anisotropy, [0, 0, 0, 0, 0, 0])
@@ -724,3 +728,488 @@ class FileReadingTests(TestCase):
             f = atomium.open("tests/integration/files/6xlu." + e)
             self.assertEqual(len(f.model.chains()), 3 if e == "pdb" else 18)
             self.assertEqual(len(f.model.ligands()), 62 if e == "pdb" else 32)
+
+
+    def test_5xme_iter_models(self):
+        for e in ["cif", "mmtf", "pdb"]:
+            path = "tests/integration/files/5xme." + e
+            models = atomium.open(path).models
+            iterated = list(atomium.iter_models(path))
+            self.assertEqual(len(iterated), 10)
+            for model, iterated_model in zip(models, iterated):
+                self.assertEqual(
+                 sorted((a.id, a.name, a.location) for a in model.atoms()),
+                 sorted((a.id, a.name, a.location) for a in iterated_model.atoms())
+                )
+                self.assertEqual(
+                 [c.sequence for c in model.chains()],
+                 [c.sequence for c in iterated_model.chains()]
+                )
+        for e in ["cif", "pdb"]:
+            iterated = list(atomium.iter_models(
+             "tests/integration/files/1lol.{}.gz".format(e)
+            ))
+            self.assertEqual(len(iterated), 1)
+            self.assertEqual(len(iterated[0].atoms()), 3431)
+
+
+    def test_1lol_metadata_only(self):
+        for e in ["cif", "mmtf", "pdb"]:
+            f = atomium.open("tests/integration/files/1lol." + e)
+            m = atomium.open(
+             "tests/integration/files/1lol." + e, metadata_only=True
+            )
+            self.assertEqual(m.models, [])
+            self.assertIsNone(m.model)
+            for attr in [
+             "code", "title", "deposition_date", "classification", "keywords",
+             "authors", "technique", "source_organism", "expression_system",
+             "missing_residues", "resolution", "rvalue", "rfree", "assemblies"
+            ]:
+                self.assertEqual(getattr(m, attr), getattr(f, attr))
+
+
+    def test_1lol_parse_filters(self):
+        for e in ["cif", "mmtf", "pdb"]:
+            path = "tests/integration/files/1lol." + e
+            f = atomium.open(path)
+            filtered = atomium.open(path, atoms="CA", chains="A")
+            self.assertEqual(
+             {a.id for a in filtered.model.atoms()},
+             {a.id for a in f.model.atoms(name="CA") if a.chain
+              and a.chain.id == "A"}
+            )
+            self.assertEqual(len(filtered.model.chains()), 1)
+            self.assertEqual(
+             filtered.model.chain("A").sequence, f.model.chain("A").sequence
+            )
+            filtered = atomium.open(path, hetatm=False, waters=False)
+            self.assertEqual(filtered.model.ligands(), set())
+            self.assertEqual(filtered.model.waters(), set())
+            self.assertEqual(
+             len(filtered.model.atoms()),
+             sum(len(c.atoms()) for c in f.model.chains())
+            )
+
+
+    def test_1lol_model_coordinates(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        coordinates = model.coordinates
+        self.assertEqual(coordinates.shape, (3431, 3))
+        self.assertTrue(np.shares_memory(model.coordinates, coordinates))
+        atom = model.atom(1)
+        self.assertEqual(coordinates[0].tolist(), list(atom.location))
+        residue = model.residue("A.11")
+        self.assertEqual(
+         residue.coordinates.tolist(),
+         [list(a.location) for a in sorted(residue.atoms(), key=lambda a: a.id)]
+        )
+        self.assertTrue(np.shares_memory(residue.coordinates, coordinates))
+        with self.assertRaises(ValueError):
+            coordinates[0] += 1
+        with self.assertRaises(ValueError):
+            residue.coordinates[0] += 1
+        with self.assertRaises(ValueError):
+            model.chain("A").coordinates[0] += 1
+        moved = model.get_coordinates()
+        moved[0] += 1
+        model.set_coordinates(moved)
+        self.assertEqual(atom.location, (4.696, 34.898, 64.219))
+        atom.move_to(1, 2, 3)
+        self.assertEqual(coordinates[0].tolist(), [1, 2, 3])
+        model.translate(10, 0, 0)
+        self.assertEqual(atom.location, (11, 2, 3))
+        self.assertTrue(np.shares_memory(model.coordinates, coordinates))
+        model.chain("A").rotate(math.pi, "x")
+        self.assertEqual(atom.location, (11, -2, -3))
+        self.assertEqual(coordinates[0].tolist(), [11, -2, -3])
+
+
+    def test_1lol_model_from_other_model(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        centre = model.center_of_mass
+        atom = model.atom(1)
+        other = atomium.Model(model.chain("A"), *model.ligands())
+        self.assertIs(atom.model, model)
+        self.assertIs(model.chain("A").model, model)
+        self.assertIsNot(other.chain("A"), model.chain("A"))
+        self.assertEqual(len(other.atoms()), len(model.chain("A").atoms())
+         + sum(len(ligand.atoms()) for ligand in model.ligands()))
+        self.assertIs(other.ligand("A.5001").chain, other.chain("A"))
+        model.translate(10, 0, 0)
+        self.assertEqual(model.coordinates[0].tolist(), list(atom.location))
+        self.assertEqual(atom.location, (13.696, 33.898, 63.219))
+        self.assertEqual(model.atoms_in_sphere(atom.location, 0.5), {atom})
+        self.assertAlmostEqual(model.center_of_mass[0], centre[0] + 10, delta=0.001)
+        self.assertEqual(other.atom(1).location, (3.696, 33.898, 63.219))
+
+
+    def test_1lol_bulk_coordinates(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        coordinates = model.get_coordinates()
+        self.assertIsNot(coordinates, model.coordinates)
+        self.assertEqual(coordinates.tolist(), model.coordinates.tolist())
+        model.set_coordinates(coordinates + 1)
+        self.assertEqual(model.atom(1).location, (4.696, 34.898, 64.219))
+        residue = model.residue("A.11")
+        atoms = sorted(residue.atoms(), key=lambda a: a.name)
+        residue.set_coordinates([[n, n, n] for n in range(7)], order=atoms)
+        self.assertEqual([a.location for a in atoms], [(n, n, n) for n in range(7)])
+        self.assertEqual(
+         residue.get_coordinates(order=atoms[::-1]).tolist(),
+         [[n, n, n] for n in range(6, -1, -1)]
+        )
+        with self.assertRaises(ValueError):
+            residue.set_coordinates([[0, 0, 0]] * 6)
+        with self.assertRaises(ValueError):
+            residue.get_coordinates(order=atoms[:-1] + [model.atom(1000)])
+
+
+    def test_1lol_atom_property_arrays(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        self.assertEqual(model.elements[:3].tolist(), ["N", "C", "C"])
+        self.assertEqual(model.names[:3].tolist(), ["N", "CA", "C"])
+        self.assertEqual(model.bvalues[:3].tolist(), [21.5, 19.76, 19.29])
+        self.assertEqual(model.charges.tolist(), [0] * 3431)
+        self.assertAlmostEqual(model.masses[0], 14.0067, delta=0.0001)
+        self.assertIs(model.masses, model.masses)
+        self.assertEqual(model.residue_indices[:8].tolist(), [0] * 7 + [1])
+        self.assertEqual(model.residue_indices[-1], -1)
+        self.assertEqual(set(model.chain_indices.tolist()), {0, 1})
+        residue = model.residue("A.11")
+        self.assertEqual(
+         residue.names.tolist(),
+         [a.name for a in sorted(residue.atoms(), key=lambda a: a.id)]
+        )
+        self.assertEqual(residue.formula, {"C": 5, "N": 1, "O": 1})
+        self.assertAlmostEqual(residue.mass, 90.0596, delta=0.0001)
+        model.atom(1).charge = -1
+        model.atom(1).bvalue = 5
+        self.assertEqual(model.charge, -1)
+        self.assertEqual(residue.charges.tolist(), [-1] + [0] * 6)
+        self.assertEqual(model.bvalues[0], 5)
+        atoms = [atomium.Atom(None, 0, 0, 0, 1, None, 0, 0, [0] * 6),
+         atomium.Atom("C", 1, 0, 0, 2, "CA", 0, 0, [0] * 6)]
+        residue = atomium.Residue(*atoms, id="A.1", name="GLY")
+        self.assertEqual(residue.elements.tolist(), ["", "C"])
+        self.assertEqual(residue.names.tolist(), ["", "CA"])
+        self.assertEqual(residue.formula, {None: 1, "C": 1})
+        self.assertEqual(atomium.Model(atomium.Chain(residue)).formula,
+         {None: 1, "C": 1})
+
+
+    def test_1lol_spatial_index(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        centre = model.atom(1586).location
+        brute = {a for a in model.atoms() if a.distance_to(centre) <= 6}
+        self.assertEqual(model.atoms_in_sphere(centre, 6), brute)
+        index = model._internal_grid
+        self.assertEqual(index.cell_size, 5)
+        self.assertEqual(model.residue("A.131").atoms_in_sphere(centre, 6),
+         brute & model.residue("A.131").atoms())
+        model.optimise_distances(cell_size=2)
+        self.assertEqual(model.atoms_in_sphere(centre, 6), brute)
+        self.assertEqual(model.atoms_in_sphere([1000, 0, 0], 6), set())
+        model.atom(1).move_to(*centre)
+        self.assertIsNone(model._internal_grid)
+        self.assertIn(model.atom(1), model.atoms_in_sphere(centre, 0.1))
+        model.atom(1586).het.translate(100, 0, 0)
+        self.assertIsNone(model._internal_grid)
+        self.assertEqual(len(model.atoms_in_sphere(centre, 0.5)), 1)
+        model.optimise_distances(cell_size=3)
+        model.set_coordinates(np.zeros((3431, 3)))
+        self.assertIsNone(model._internal_grid)
+        self.assertEqual(len(model.atoms_in_sphere((0, 0, 0), 5)), 3431)
+        model.chain("A").set_coordinates(
+         np.full((len(model.chain("A").atoms()), 3), 50)
+        )
+        self.assertEqual(model.atoms_in_sphere((50, 50, 50), 1),
+         model.chain("A").atoms())
+        self.assertFalse(
+         model.chain("B").nearby_atoms(1) & model.chain("A").atoms()
+        )
+
+
+    def test_1lol_contacts(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        atoms = sorted(model.atoms(), key=lambda a: a.id)
+        chaina, chainb = model.chain("A"), model.chain("B")
+        a, b = model.contacts(4, chaina, chainb)
+        atoms_a, atoms_b = chaina.atoms(), chainb.atoms()
+        rows_a = [i for i, atom in enumerate(atoms) if atom in atoms_a]
+        rows_b = [i for i, atom in enumerate(atoms) if atom in atoms_b]
+        distances = np.linalg.norm(
+         model.coordinates[rows_a][:, None] - model.coordinates[rows_b], axis=2
+        )
+        brute = [(rows_a[i], rows_b[j]) for i, j in zip(*np.nonzero(distances <= 4))]
+        self.assertEqual(list(zip(a.tolist(), b.tolist())), brute)
+        self.assertEqual(
+         model.contacts(4, chaina, chainb, atoms=True),
+         [(atoms[i], atoms[j]) for i, j in brute]
+        )
+        ligand = model.ligand("A.5001")
+        pairs = model.contacts(3.5, ligand, atoms=True)
+        self.assertEqual(
+         {y for x, y in pairs} - ligand.atoms(), ligand.nearby_atoms(3.5)
+        )
+        a, b = model.contacts(2)
+        self.assertTrue((a < b).all())
+        self.assertEqual(len(a), len({frozenset(p) for p in zip(a, b)}))
+        self.assertEqual(len(model.contacts(1, chaina, chaina)[0]), 0)
+        with self.assertRaises(ValueError):
+            model.contacts(4, atomium.open("tests/integration/files/1lol.cif").model.chain("A"))
+
+
+    def test_1lol_batched_nearby_structures(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        for structure in [model.ligand("A.5001"), model.residue("A.131"), model.chain("B")]:
+            for kwargs in [{}, {"element": "O"}, {"het__is_water": False}]:
+                atoms, hets, chains = set(), set(), set()
+                for atom in structure.atoms():
+                    atoms.update(atom.nearby_atoms(5, **kwargs))
+                    hets.update(atom.nearby_hets(5, **kwargs))
+                    chains.update(atom.nearby_chains(5, **kwargs))
+                self.assertEqual(structure.nearby_atoms(5, **kwargs), atoms - structure.atoms())
+                self.assertEqual(structure.nearby_hets(5, **kwargs),
+                 hets - {a.het for a in structure.atoms()})
+                self.assertEqual(structure.nearby_chains(5, **kwargs),
+                 chains - {a.chain for a in structure.atoms()})
+        self.assertEqual(
+         model.ligand("A.5001").nearby_hets(5, residues=False),
+         {h for h in model.ligand("A.5001").nearby_hets(5) if isinstance(h, atomium.Ligand)}
+        )
+        self.assertTrue(any(h._water for h in model.ligand("A.5001").nearby_hets(5)
+         if isinstance(h, atomium.Ligand)))
+        model.dehydrate()
+        self.assertFalse(any(h._water for h in model.ligand("A.5001").nearby_hets(5)
+         if isinstance(h, atomium.Ligand)))
+
+
+    def test_1lol_nearby_structures_outside_one_model(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        water = model.water("A.3005")
+        model.dehydrate()
+        self.assertIsNone(list(water.atoms())[0]._model)
+        atom = list(water.atoms())[0]
+        self.assertEqual(water.nearby_atoms(5), atom.nearby_atoms(5))
+        self.assertTrue(water.nearby_atoms(5))
+        self.assertEqual(water.nearby_hets(5), atom.nearby_hets(5) - {water})
+        self.assertEqual(water.nearby_chains(5),
+         atom.nearby_chains(5) - {water.chain})
+        chain = atomium.Chain(atomium.Residue(
+         atomium.Atom("C", 0, 0, 0, 1, "CA", 0, 0, [0] * 6), id="A.1"
+        ), id="A")
+        self.assertEqual(chain.nearby_atoms(5), set())
+        self.assertEqual(chain.nearby_hets(5), set())
+
+
+    def test_1lol_superposition(self):
+        model = atomium.open("tests/integration/files/1lol.cif").model
+        lig1, lig2 = sorted(model.ligands(name="XMP"), key=lambda l: l.id)
+        start = lig1.get_coordinates()
+        rotation, translation = lig1.superpose_onto(lig2, move=False)
+        self.assertEqual(lig1.get_coordinates().tolist(), start.tolist())
+        self.assertAlmostEqual(np.linalg.det(rotation), 1)
+        self.assertFalse(np.allclose(rotation, np.eye(3), atol=0.001))
+        self.assertEqual(lig1.superpose_onto(lig2)[0].tolist(), rotation.tolist())
+        self.assertAlmostEqual(lig1.rmsd_with(lig2, superpose=False), 0.133, delta=0.001)
+        self.assertTrue(np.allclose(
+         lig1.get_coordinates(), start @ rotation.T + translation
+        ))
+        rotation, translation = lig1.superpose_onto(lig2)
+        self.assertTrue(np.allclose(rotation, np.eye(3), atol=1e-6))
+        self.assertTrue(np.allclose(translation, 0, atol=1e-6))
+        with self.assertRaises(ValueError):
+            model.chain("A").superpose_onto(model.chain("B"))
+
+
+    def test_5xme_rmsd_matrix(self):
+        models = atomium.open("tests/integration/files/5xme.cif").models
+        matrix = atomium.rmsd_matrix(models)
+        self.assertEqual(matrix.shape, (10, 10))
+        self.assertTrue(np.allclose(matrix, matrix.T))
+        for i in range(0, 10, 3):
+            for j in range(10):
+                self.assertAlmostEqual(
+                 matrix[i, j], models[i].rmsd_with(models[j]), delta=1e-9
+                )
+        self.assertTrue(np.allclose(
+         atomium.rmsd_matrix(models, processes=2, chunk=4), matrix
+        ))
+        self.assertEqual(atomium.rmsd_matrix([]).shape, (0, 0))
+        with self.assertRaises(ValueError):
+            atomium.rmsd_matrix([models[0], models[0].residue("A.199")])
+
+
+    def test_5xme_index_pairing(self):
+        models = atomium.open("tests/integration/files/5xme.cif").models
+        pairing = models[0].index_pairing_with(models[1])
+        self.assertEqual(len(pairing), 1827)
+        atoms = sorted(models[0].atoms(), key=lambda a: a.id)
+        others = sorted(models[1].atoms(), key=lambda a: a.id)
+        self.assertEqual(models[0].pairing_with(models[1]), {
+         atoms[i]: others[j] for i, j in zip(pairing.indices, pairing.other_indices)
+        })
+        for model in models[1:]:
+            self.assertEqual(
+             models[0].rmsd_with(model, pairing=pairing), models[0].rmsd_with(model)
+            )
+        self.assertTrue(np.allclose(
+         atomium.rmsd_matrix(models, pairing=pairing), atomium.rmsd_matrix(models)
+        ))
+        residue = models[0].residue("A.199")
+        other = models[1].residue("A.199")
+        res_pairing = residue.index_pairing_with(other)
+        rotation, translation = residue.superpose_onto(other, pairing=res_pairing)
+        self.assertAlmostEqual(
+         residue.rmsd_with(other, superpose=False, pairing=res_pairing),
+         residue.rmsd_with(other), delta=1e-9
+        )
+        with self.assertRaises(ValueError):
+            models[0].rmsd_with(other, pairing=pairing)
+
+
+    def test_5xme_rmsf(self):
+        f = atomium.open("tests/integration/files/5xme.cif")
+        coordinates = np.stack([model.coordinates for model in f.models])
+        atoms, residues, structures = f.rmsf(superpose=False)
+        self.assertEqual(atoms.shape, (1827,))
+        self.assertEqual(residues.shape, (114,))
+        self.assertEqual(len(structures), 114)
+        self.assertIs(structures[0], f.model.residue("A.199"))
+        self.assertTrue(np.allclose(atoms, np.sqrt(np.mean(np.sum(
+         (coordinates - coordinates.mean(axis=0)) ** 2, axis=2
+        ), axis=0))))
+        first = sorted(f.model.residue("A.199").atoms(), key=lambda a: a.id)
+        self.assertAlmostEqual(
+         residues[0], np.sqrt(np.mean(atoms[:len(first)] ** 2)), delta=1e-9
+        )
+        fitted, fitted_residues, _ = atomium.rmsf(f.models)
+        self.assertLess(np.sum(fitted ** 2), np.sum(atoms ** 2))
+        ca, ca_residues, _ = f.rmsf(name="CA")
+        self.assertEqual(ca.shape, (114,))
+        self.assertTrue(np.allclose(ca, ca_residues))
+        moved = f.models[3]
+        moved.rotate(1, "x")
+        moved.translate(30, 0, 0)
+        before = moved.get_coordinates()
+        self.assertTrue(np.allclose(atomium.rmsf(f.models)[0], fitted, atol=1e-6))
+        self.assertEqual(moved.coordinates.tolist(), before.tolist())
+        atoms, residues, structures = atomium.rmsf([])
+        self.assertEqual(atoms.shape, (0,))
+        self.assertEqual(residues.shape, (0,))
+        self.assertEqual(structures, [])
+        f._models = []
+        self.assertEqual(f.rmsf()[2], [])
+
+
+    def test_5xme_model_stack(self):
+        from atomium.data import ModelStack, model_dict_to_model
+        from atomium.data import model_dicts_to_models
+        for e in ["cif", "pdb"]:
+            path = "tests/integration/files/5xme." + e
+            self.assertIsInstance(atomium.open(path).models, list)
+            f = atomium.open(path, stack_models=True)
+            models = f.models
+            self.assertIsInstance(models, ModelStack)
+            self.assertEqual(models.coordinates.shape, (10, 1827, 3))
+            self.assertIs(models[-10], f.model)
+            self.assertEqual(models[8:], [models[8], models[9]])
+            with self.assertRaises(IndexError): models[10]
+            d = atomium.open(path, data_dict=True)
+            for index in (1, 9):
+                model = model_dict_to_model(d["models"][index])
+                atoms = sorted(models[index].atoms(), key=lambda a: a.id)
+                self.assertEqual(
+                 [(a.id, a.name, a.het.id) for a in atoms],
+                 [(a.id, a.name, a.het.id) for a in model._atom_list]
+                )
+                self.assertEqual(
+                 models[index].coordinates.tolist(),
+                 model.coordinates.tolist()
+                )
+            first = min(models[4].atoms(), key=lambda a: a.id)
+            first.move_to(1, 2, 3)
+            first.name = "X"
+            del first
+            gc.collect()
+            self.assertEqual(models[4].coordinates[0].tolist(), [1, 2, 3])
+            self.assertEqual(models.coordinates[4, 0].tolist(), [1, 2, 3])
+            self.assertEqual(min(models[4].atoms(), key=lambda a: a.id).name, "X")
+            self.assertEqual(min(models[5].atoms(), key=lambda a: a.id).name, "N")
+            model = models[7]
+            model.residue("A.199").name = "XXX"
+            copy = model.residue("A.199").copy()
+            self.assertIs(type(copy), atomium.Residue)
+            self.assertEqual(copy.name, "XXX")
+            model_copy = model.copy()
+            self.assertIs(type(model_copy), atomium.Model)
+            self.assertEqual(
+             model_copy.coordinates.tolist(), model.coordinates.tolist()
+            )
+            reference = weakref.ref(model)
+            del model, copy, model_copy
+            gc.collect()
+            self.assertIsNone(reference())
+            self.assertEqual(models[7].residue("A.199").name, "XXX")
+            self.assertEqual(models[7].residue("A.199").next.name, "GLN")
+            residue = models[2].residue("A.199")
+            residue.atom(name="CA").bond(residue.atom(name="N"))
+            del residue
+            gc.collect()
+            residue = models[2].residue("A.199")
+            self.assertEqual(
+             residue.atom(name="N").bonded_atoms, {residue.atom(name="CA")}
+            )
+            self.assertTrue(models.intact)
+            self.assertTrue(np.allclose(
+             atomium.rmsd_matrix(models), atomium.rmsd_matrix(list(models))
+            ))
+            d["models"][6]["polymer"]["A"]["residues"]["A.199"]["name"] = "XXX"
+            models = model_dicts_to_models(iter(d["models"]))
+            self.assertIsInstance(models, list)
+            self.assertEqual(len(models), 10)
+            for index, model in enumerate(models):
+                self.assertEqual(
+                 model.coordinates.tolist(),
+                 model_dict_to_model(d["models"][index]).coordinates.tolist()
+                )
+            self.assertEqual(models[6].residue("A.199").name, "XXX")
+            self.assertEqual(models[5].residue("A.199").name, "ALA")
+        f = atomium.open("tests/integration/files/5xme.mmtf", stack_models=True)
+        self.assertIsInstance(f.models, ModelStack)
+        self.assertEqual(f.models.coordinates.shape, (10, 1827, 3))
+        unstacked = atomium.open("tests/integration/files/5xme.mmtf").models
+        for model, other in zip(f.models, unstacked):
+            self.assertEqual(
+             model.coordinates.tolist(), other.coordinates.tolist()
+            )
+            for section in ("helices", "strands"):
+                self.assertEqual([
+                 [residue.id for residue in residues]
+                 for residues in getattr(model.chain("A"), section)
+                ], [
+                 [residue.id for residue in residues]
+                 for residues in getattr(other.chain("A"), section)
+                ])
+        self.assertNotEqual(
+         [len(helix) for helix in f.models[3].chain("A").helices],
+         [len(helix) for helix in f.models[2].chain("A").helices]
+        )
+        self.assertTrue(f.models[2].chain("A").helices[0][0].helix)
+
+
+    def test_model_stack_of_different_sized_models(self):
+        line = "ATOM  {:>5}  CA  ALA A{:>4}    {:8.3f}{:8.3f}{:8.3f}" \
+         "  1.00  0.00           C"
+        filestring = "\n".join(["MODEL        1"] + [
+         line.format(n, n, n, 0, 0) for n in (1, 2, 3)
+        ] + ["ENDMDL", "MODEL        2"] + [
+         line.format(n, n, n, 1, 0) for n in (1, 2)
+        ] + ["ENDMDL", "END"])
+        f = atomium.utilities.parse_string(
+         filestring, "poses.pdb", stack_models=True
+        )
+        self.assertIsInstance(f.models, list)
+        self.assertEqual([len(m.atoms()) for m in f.models], [3, 2])
+        self.assertEqual(f.models[1].atom(2).location, (2, 1, 0))
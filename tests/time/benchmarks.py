@@ -0,0 +1,64 @@
+"""Setup shared by the timing scripts in this directory. The scripts are run
+from the root of the repository (``python tests/time/rmsf.py 10 100`` for
+example), and importing this module makes that copy of atomium importable."""
+
+import sys
+sys.path.insert(0, ".")
+from timeit import repeat
+import numpy as np
+import atomium
+
+def arguments(*defaults, type=int):
+    """Returns the values given on the command line, converted to some type,
+    or the defaults if none were given.
+
+    :param \*defaults: the values to use if there are none on the command line.
+    :param type: the function to convert each command line value with.
+    :rtype: ``list``"""
+
+    return [type(argument) for argument in sys.argv[1:]] or list(defaults)
+
+
+def best_time(function, repeats=3):
+    """Calls a function several times, and returns how long the fastest call
+    took, in seconds.
+
+    :param function: the function to time.
+    :param int repeats: how many times to call it.
+    :rtype: ``float``"""
+
+    return min(repeat(function, number=1, repeat=repeats))
+
+
+def protein_cube(atom_count):
+    """Returns random coordinates for some number of atoms, spread at roughly
+    protein density through a cube, and the length of the cube's sides.
+
+    :param int atom_count: how many atoms to make coordinates for.
+    :rtype: ``tuple``"""
+
+    side = (atom_count * 10) ** (1 / 3)
+    return np.random.uniform(0, side, (atom_count, 3)), side
+
+
+def make_atoms(coordinates):
+    """Makes a carbon atom at each row of an N×3 array of coordinates, with
+    IDs counting up from 1.
+
+    :param coordinates: the atoms' locations.
+    :rtype: ``list``"""
+
+    return [atomium.Atom("C", *location, n + 1, "C", 0, 0, [])
+     for n, location in enumerate(coordinates)]
+
+
+def make_residues(atoms):
+    """Groups a list of atoms into ten-atom alanine residues, with the IDs
+    A.1, A.2 and so on.
+
+    :param list atoms: the atoms to group.
+    :rtype: ``list``"""
+
+    return [atomium.Residue(*atoms[start:start + 10], id="A.{}".format(
+     start // 10 + 1
+    ), name="ALA") for start in range(0, len(atoms), 10)]
@@ -0,0 +1,35 @@
+from benchmarks import arguments, best_time, make_atoms, make_residues
+import numpy as np
+import atomium
+
+def make_model(ligand_count, ligand_size=20, protein_size=100_000):
+    """Makes a model of one chain of ten-atom residues and many twenty-atom
+    ligands, each a cluster of atoms, spread at roughly protein density through
+    a cube."""
+
+    atom_count = protein_size + ligand_count * ligand_size
+    side = (atom_count * 10) ** (1 / 3)
+    centres = np.random.uniform(0, side, (atom_count // 10, 3))
+    atoms = make_atoms(np.repeat(centres, 10, axis=0) + np.random.normal(
+     0, 1.5, (atom_count, 3)
+    ))
+    chain = atomium.Chain(*make_residues(atoms[:protein_size]), id="A")
+    ligands = [atomium.Ligand(*atoms[start:start + ligand_size],
+     id="A.{}".format(start), name="LIG", chain=chain) for start in range(
+      protein_size, atom_count, ligand_size
+    )]
+    return atomium.Model(chain, *ligands)
+
+
+# Time finding the residues and ligands within 5 Å of every ligand, in models
+# with this many ligands
+for size in arguments(100, 1_000, 10_000):
+    model = make_model(size)
+    model.optimise_distances()
+    ligands = list(model.ligands())
+    seconds = best_time(
+     lambda: [ligand.nearby_hets(5) for ligand in ligands]
+    )
+    print("{:>10} ligands {:8.3f} s {:8.3f} ms/ligand".format(
+     size, seconds, seconds / size * 1000
+    ))
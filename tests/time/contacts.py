@@ -0,0 +1,19 @@
+from benchmarks import arguments, best_time, protein_cube
+from benchmarks import make_atoms, make_residues
+import atomium
+
+# Time finding all 4 Å contacts between the two chains of a model of this many
+# atoms
+for size in arguments(10_000, 100_000, 1_000_000):
+    residues = make_residues(make_atoms(protein_cube(size)[0]))
+    half = len(residues) // 2
+    model = atomium.Model(
+     atomium.Chain(*residues[:half], id="A"),
+     atomium.Chain(*residues[half:], id="B")
+    )
+    chaina, chainb = model.chain("A"), model.chain("B")
+    seconds = best_time(lambda: model.contacts(4, chaina, chainb))
+    print("{:>10} atoms {:8.3f} s {:8.2f} us/atom  {} contacts".format(
+     size, seconds, seconds / size * 1_000_000,
+     len(model.contacts(4, chaina, chainb)[0])
+    ))
@@ -0,0 +1,20 @@
+from benchmarks import arguments, best_time
+import os
+import atomium
+
+# Time the file dict stage of these files on its own, as that is where the
+# tokenizer is
+for path in arguments(*["tests/integration/files/{}".format(f) for f in [
+ "1lol.cif", "5xme.cif", "6xlu.cif", "1m4x.cif", "4v6x.cif"
+]], type=str):
+    if not os.path.exists(path):
+        print("{:<40} not found".format(path))
+        continue
+    with open(path) as f: filestring = f.read()
+    seconds = best_time(
+     lambda: atomium.mmcif.mmcif_string_to_mmcif_dict(filestring)
+    )
+    megabytes = len(filestring) / 1024 / 1024
+    print("{:<40} {:8.1f} MB {:8.3f} s {:8.1f} MB/s".format(
+     path, megabytes, seconds, megabytes / seconds
+    ))
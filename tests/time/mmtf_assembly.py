@@ -0,0 +1,50 @@
+from benchmarks import arguments, best_time
+import numpy as np
+import atomium
+
+def make_mmtf_dict(atom_count, group_size=10, chain_size=1000):
+    """Makes a .mmtf dict of a single model, with chains of identical
+    ten-atom residues, as it would be after decoding."""
+
+    group_count = atom_count // group_size
+    chain_count = -(-group_count // chain_size)
+    groups_per_chain = [chain_size] * (group_count // chain_size)
+    if group_count % chain_size:
+        groups_per_chain.append(group_count % chain_size)
+    atom_count = group_count * group_size
+    coordinates = np.random.uniform(-100, 100, atom_count).round(3)
+    return {
+     "numModels": 1, "chainsPerModel": [chain_count],
+     "xCoordList": coordinates, "yCoordList": coordinates,
+     "zCoordList": coordinates, "bFactorList": np.full(atom_count, 20.0),
+     "occupancyList": np.ones(atom_count), "altLocList": [""] * atom_count,
+     "atomIdList": np.arange(1, atom_count + 1),
+     "groupList": [{
+      "groupName": "ALA", "atomNameList": ["A{}".format(n)
+       for n in range(group_size)], "elementList": ["C"] * group_size,
+      "formalChargeList": [0] * group_size
+     }], "groupTypeList": np.zeros(group_count, dtype=int),
+     "groupIdList": np.concatenate(
+      [np.arange(1, n + 1) for n in groups_per_chain]
+     ), "insCodeList": [""] * group_count,
+     "secStructList": np.full(group_count, -1),
+     "chainIdList": ["C{}".format(n) for n in range(chain_count)],
+     "chainNameList": ["C{}".format(n) for n in range(chain_count)],
+     "groupsPerChain": groups_per_chain, "entityList": [{
+      "type": "polymer", "chainIndexList": list(range(chain_count)),
+      "sequence": "A" * chain_size
+     }]
+    }
+
+
+# Time the data dict stage, which is where the models are assembled, for
+# structures of this many atoms
+for size in arguments(1_000, 10_000, 100_000, 1_000_000, 5_000_000):
+    mmtf_dict = make_mmtf_dict(size)
+    seconds = best_time(
+     lambda: atomium.mmtf.mmtf_dict_to_data_dict(mmtf_dict),
+     repeats=3 if size < 1_000_000 else 1
+    )
+    print("{:>10} atoms {:8.3f} s {:8.2f} us/atom".format(
+     size, seconds, seconds / size * 1_000_000
+    ))
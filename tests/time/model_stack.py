@@ -0,0 +1,59 @@
+from benchmarks import arguments, best_time
+import os
+import tempfile
+import tracemalloc
+import numpy as np
+import atomium
+from atomium.pdb import structure_to_pdb_string
+
+def make_pdb(path, model_count):
+    """Writes a .pdb file of many poses, each a randomly jiggled copy of the
+    first model of 5xme."""
+
+    model = atomium.open("tests/integration/files/5xme.pdb").model
+    lines = [line for line in structure_to_pdb_string(model).splitlines()
+     if line.startswith(("ATOM", "HETATM", "TER"))]
+    with open(path, "w") as f:
+        for number in range(1, model_count + 1):
+            f.write("MODEL     {:>4}\n".format(number))
+            for line in lines:
+                if line.startswith(("ATOM", "HETATM")):
+                    x, y, z = np.array([float(line[n:n + 8])
+                     for n in (30, 38, 46)]) + np.random.normal(0, 0.5, 3)
+                    line = "{}{:8.3f}{:8.3f}{:8.3f}{}".format(
+                     line[:30], x, y, z, line[54:]
+                    )
+                f.write(line + "\n")
+            f.write("ENDMDL\n")
+        f.write("END\n")
+
+
+def measure(path, stack_models):
+    """Opens the file, and returns how long it took, how much memory the
+    models take up once built, the most memory used while opening it, and how
+    much memory is in use after going through every model's atoms."""
+
+    seconds = best_time(
+     lambda: atomium.open(path, stack_models=stack_models), repeats=1
+    )
+    tracemalloc.start()
+    f = atomium.open(path, stack_models=stack_models)
+    current, peak = tracemalloc.get_traced_memory()
+    for model in f.models: model.atoms()
+    walked = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return seconds, current, peak, walked
+
+
+# Compare opening files of this many poses as lists of models and as stacks
+with tempfile.TemporaryDirectory() as directory:
+    for size in arguments(10, 100, 1_000):
+        path = os.path.join(directory, "poses.pdb")
+        make_pdb(path, size)
+        for stack_models in (False, True):
+            seconds, current, peak, walked = measure(path, stack_models)
+            print("{:>6} models {:>6} {:8.2f} s {:9.1f} MB {:9.1f} MB peak"
+             " {:9.1f} MB walked".format(
+              size, "stack" if stack_models else "list", seconds,
+              current / 1e6, peak / 1e6, walked / 1e6
+             ))
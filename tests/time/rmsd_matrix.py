@@ -0,0 +1,21 @@
+from benchmarks import arguments, best_time, make_atoms
+import numpy as np
+import atomium
+
+def make_poses(pose_count, atom_count=50):
+    """Makes a number of ligands with the same atoms, each a randomly jiggled
+    copy of the first."""
+
+    coordinates = np.random.uniform(-5, 5, (atom_count, 3))
+    return [atomium.Ligand(*make_atoms(
+     coordinates + np.random.normal(0, 0.5, coordinates.shape)
+    ), id="A.1", name="LIG") for _ in range(pose_count)]
+
+
+# Time the all-vs-all RMSD matrix of this many poses
+for size in arguments(10, 100, 1_000):
+    poses = make_poses(size)
+    seconds = best_time(lambda: atomium.rmsd_matrix(poses))
+    print("{:>10} poses {:8.3f} s {:10.2f} us/pair".format(
+     size, seconds, seconds / size ** 2 * 1_000_000
+    ))
@@ -0,0 +1,21 @@
+from benchmarks import arguments, best_time, make_atoms, make_residues
+import numpy as np
+import atomium
+
+def make_models(model_count, residue_count=100):
+    """Makes an ensemble of models of one chain of ten-atom residues, each a
+    randomly jiggled copy of the first."""
+
+    coordinates = np.random.uniform(-20, 20, (residue_count * 10, 3))
+    return [atomium.Model(atomium.Chain(*make_residues(make_atoms(
+     coordinates + np.random.normal(0, 0.5, coordinates.shape)
+    )), id="A")) for _ in range(model_count)]
+
+
+# Time the per-atom and per-residue RMSF across ensembles of this many models
+for size in arguments(10, 100, 1_000):
+    models = make_models(size)
+    seconds = best_time(lambda: atomium.rmsf(models))
+    print("{:>10} models {:8.3f} s {:8.2f} ms/model".format(
+     size, seconds, seconds / size * 1000
+    ))
@@ -0,0 +1,22 @@
+from benchmarks import arguments, best_time, protein_cube
+from benchmarks import make_atoms, make_residues
+import numpy as np
+import atomium
+
+# Time building the spatial index of a one chain model of this many atoms,
+# and 8 Å sphere queries once it's built
+for size in arguments(10_000, 100_000, 1_000_000):
+    coordinates, side = protein_cube(size)
+    model = atomium.Model(atomium.Chain(
+     *make_residues(make_atoms(coordinates)), id="A"
+    ))
+    centres = np.random.uniform(0, side, (100, 3))
+    build = best_time(model.optimise_distances)
+    raw = best_time(lambda: [model._internal_grid.query(c, 8)
+     for c in centres]) / len(centres)
+    sphere = best_time(lambda: [model.atoms_in_sphere(c, 8)
+     for c in centres]) / len(centres)
+    print("{:>10} atoms  build {:7.3f} s  query {:7.3f} ms  "
+     "atoms_in_sphere {:7.3f} ms".format(
+      size, build, raw * 1000, sphere * 1000
+    ))
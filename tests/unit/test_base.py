@@ -171,6 +171,15 @@ class StructureClassMetaclassTests(TestCase):
         self.assertEqual(obj.b(), 2000)
 
 
+    def test_structure_class_subclasses_inherit_decorated_methods(self):
+        class TestClass(metaclass=StructureClass):
+            def atoms(self): return StructureSet(Mock(_id=1), Mock(_id=2))
+        class SubClass(TestClass): pass
+        self.assertIs(SubClass.atoms, TestClass.atoms)
+        self.assertEqual(len(SubClass().atoms()), 2)
+        self.assertEqual(len(SubClass().atoms(1)), 1)
+
+
 
 class StructureSetTests(TestCase):
 
@@ -0,0 +1,119 @@
+import numpy as np
+from unittest import TestCase
+from unittest.mock import Mock
+from atomium.superposition import *
+
+class KabschTests(TestCase):
+
+    def setUp(self):
+        self.coordinates = np.array([
+         [0, 0, 0], [1, 0, 0], [0, 2, 0], [0, 0, 3], [1, 1, 1]
+        ], dtype=float)
+        angle = 0.7
+        self.rotation = np.array([
+         [np.cos(angle), -np.sin(angle), 0], [np.sin(angle), np.cos(angle), 0],
+         [0, 0, 1]
+        ])
+        self.target = self.coordinates @ self.rotation.T + [5, -2, 1]
+
+
+    def test_can_find_transformation(self):
+        rotation, translation = kabsch(self.coordinates, self.target)
+        self.assertTrue(np.allclose(rotation, self.rotation))
+        self.assertTrue(np.allclose(translation, [5, -2, 1]))
+
+
+    def test_rotation_is_never_a_reflection(self):
+        mirrored = self.target * [1, 1, -1]
+        rotation, translation = kabsch(self.coordinates, mirrored)
+        self.assertAlmostEqual(np.linalg.det(rotation), 1)
+
+
+    def test_can_find_transformations_of_stacks(self):
+        rotation, translation = kabsch(
+         np.stack([self.coordinates] * 2), np.stack([self.target, self.coordinates])
+        )
+        self.assertEqual(rotation.shape, (2, 3, 3))
+        self.assertTrue(np.allclose(rotation[0], self.rotation))
+        self.assertTrue(np.allclose(rotation[1], np.eye(3)))
+        self.assertTrue(np.allclose(translation[1], [0, 0, 0]))
+
+
+
+class RmsdTests(TestCase):
+
+    def test_can_get_superposed_rmsd(self):
+        coordinates = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 1]])
+        moved = coordinates + [10, 10, 10]
+        moved[0] += [1, 0, 0]
+        self.assertLess(rmsd(coordinates, moved), 0.4)
+        self.assertGreater(rmsd(coordinates, moved), 0.3)
+        self.assertAlmostEqual(rmsd(coordinates, coordinates + 10), 0)
+
+
+    def test_can_get_rmsd_without_superposing(self):
+        coordinates = np.zeros((4, 3))
+        self.assertAlmostEqual(rmsd(coordinates, coordinates + [3, 4, 0], False), 5)
+
+
+    def test_can_apply_transformation(self):
+        self.assertEqual(apply_transformation(
+         np.array([[1, 2, 3]]), np.eye(3)[[1, 0, 2]], [1, 1, 1]
+        ).tolist(), [[3, 2, 4]])
+
+
+
+class RmsdMatrixTests(TestCase):
+
+    def setUp(self):
+        generator = np.random.RandomState(7)
+        self.stack = generator.normal(0, 5, (7, 30, 3))
+
+
+    def test_can_get_pairwise_rmsds(self):
+        matrix = pairwise_rmsds(self.stack)
+        self.assertEqual(matrix.shape, (7, 7))
+        for i in range(7):
+            self.assertEqual(matrix[i, i], 0)
+            for j in range(7):
+                self.assertAlmostEqual(
+                 matrix[i, j], rmsd(self.stack[i], self.stack[j]), delta=1e-9
+                )
+
+
+    def test_pairwise_rmsds_can_be_chunked(self):
+        self.assertTrue(np.allclose(
+         pairwise_rmsds(self.stack, chunk=3), pairwise_rmsds(self.stack)
+        ))
+
+
+    def test_pairwise_rmsds_account_for_reflections(self):
+        stack = np.stack([self.stack[0], self.stack[0] * [1, 1, -1]])
+        self.assertAlmostEqual(
+         pairwise_rmsds(stack)[0, 1], rmsd(stack[0], stack[1]), delta=1e-9
+        )
+        self.assertGreater(pairwise_rmsds(stack)[0, 1], 1)
+
+
+
+class AtomPairingTests(TestCase):
+
+    def test_can_make_pairing(self):
+        pairing = AtomPairing([0, 1, 2], [2, 0, 1])
+        self.assertEqual(pairing.indices.tolist(), [0, 1, 2])
+        self.assertEqual(pairing.other_indices.tolist(), [2, 0, 1])
+        self.assertEqual(len(pairing), 3)
+        self.assertEqual(repr(pairing), "<AtomPairing (3 atoms)>")
+
+
+    def test_can_get_paired_coordinates(self):
+        pairing = AtomPairing([0, 1], [1, 0])
+        structure, other = Mock(), Mock()
+        structure.coordinates = np.array([[0, 0, 0], [1, 1, 1]])
+        other.coordinates = np.array([[2, 2, 2], [3, 3, 3]])
+        coordinates, other_coordinates = pairing.coordinates(structure, other)
+        self.assertEqual(coordinates.tolist(), [[0, 0, 0], [1, 1, 1]])
+        self.assertEqual(other_coordinates.tolist(), [[3, 3, 3], [2, 2, 2]])
+        other.coordinates = np.array([[2, 2, 2]])
+        with self.assertRaises(ValueError):
+            pairing.coordinates(structure, other)
@@ -72,6 +72,14 @@ class FetchingTests(TestCase):
         self.assertEqual(f, self.mock_parse.return_value)
 
 
+    def test_can_fetch_reduced_mmtf(self):
+        self.mock_get.return_value.content = b"ABC"
+        f = fetch("1ABC.mmtf", 1, b=2, reduced=True)
+        self.mock_get.assert_called_with("https://mmtf.rcsb.org/v1.0/reduced/1abc", stream=True)
+        self.mock_parse.assert_called_with(b"ABC", "1ABC.mmtf", 1, b=2)
+        self.assertEqual(f, self.mock_parse.return_value)
+
+
     def test_can_fetch_by_url(self):
         f = fetch("https://website.com/1ABC", 1, b=2)
         self.mock_get.assert_called_with("https://website.com/1ABC", stream=True)
@@ -174,6 +182,60 @@ class StringParsingTests(TestCase):
         self.assertEqual(f, mock_data.return_value)
 
 
+    @patch("atomium.utilities.get_parse_functions")
+    @patch("atomium.utilities.data_dict_to_file")
+    def test_can_get_file_with_model_stack(self, mock_data, mock_get):
+        mock_get.return_value = [MagicMock(), MagicMock()]
+        mock_get.return_value[1].__name__ = "mmcif_Z"
+        f = parse_string("ABCD", "file.cif", stack_models=True, atoms="CA")
+        mock_get.return_value[1].assert_called_with(
+         mock_get.return_value[0].return_value, atoms="CA", lazy_models=True
+        )
+        mock_data.assert_called_with(
+         mock_get.return_value[1].return_value, "cif", stack_models=True
+        )
+        self.assertEqual(f, mock_data.return_value)
+
+
+    @patch("atomium.utilities.get_parse_functions")
+    def test_model_stack_not_used_for_data_dict(self, mock_get):
+        mock_get.return_value = [MagicMock(), MagicMock()]
+        f = parse_string("ABCD", "file.xyz", data_dict=True, stack_models=True)
+        mock_get.return_value[1].assert_called_with(
+         mock_get.return_value[0].return_value
+        )
+        self.assertEqual(f, mock_get.return_value[1].return_value)
+
+
+    @patch("atomium.utilities.get_parse_functions")
+    def test_can_get_metadata_only_file_dict(self, mock_get):
+        mock_get.return_value = [MagicMock(), MagicMock()]
+        f = parse_string("ABCD", "file.xyz", file_dict=True, metadata_only=True)
+        mock_get.return_value[0].assert_called_with("ABCD", metadata_only=True)
+        self.assertEqual(f, mock_get.return_value[0].return_value)
+
+
+    @patch("atomium.utilities.get_parse_functions")
+    def test_unsupported_options_rejected(self, mock_get):
+        from atomium.utilities import pdb_string_to_pdb_dict
+        mock_get.return_value = [pdb_string_to_pdb_dict, MagicMock()]
+        with self.assertRaises(ValueError) as e:
+            parse_string("ABCD", "file.pdb", columnar=True, categories=["x"])
+        self.assertIn(".pdb", str(e.exception))
+        self.assertIn("categories, columnar", str(e.exception))
+
+
+    @patch("atomium.utilities.get_parse_functions")
+    def test_can_pass_filters_to_data_function(self, mock_get):
+        mock_get.return_value = [MagicMock(), MagicMock()]
+        f = parse_string("ABCD", "file.xyz", data_dict=True, atoms="CA", waters=False)
+        mock_get.return_value[0].assert_called_with("ABCD")
+        mock_get.return_value[1].assert_called_with(
+         mock_get.return_value[0].return_value, atoms="CA", waters=False
+        )
+        self.assertEqual(f, mock_get.return_value[1].return_value)
+
+
 
 class ParseFunctionGettingTests(TestCase):
 
@@ -195,6 +257,18 @@ class ParseFunctionGettingTests(TestCase):
         self.assertIs(f2, pdb_dict_to_data_dict)
 
 
+    def test_can_get_bcif_functions(self):
+        f1, f2 = get_parse_functions(b"ABC", "x.bcif")
+        self.assertIs(f1, bcif_bytes_to_bcif_dict)
+        self.assertIs(f2, bcif_dict_to_data_dict)
+
+
+    def test_can_identify_bcif(self):
+        f1, f2 = get_parse_functions(b"\x83\xaadataBlocks", "x.xxx")
+        self.assertIs(f1, bcif_bytes_to_bcif_dict)
+        self.assertIs(f2, bcif_dict_to_data_dict)
+
+
     def test_bytes_mean_mmtf(self):
         f1, f2 = get_parse_functions(b"ABC", "x.xxx")
         self.assertIs(f1, mmtf_bytes_to_mmtf_dict)